@@ -0,0 +1,247 @@
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timezone
+from typing import TYPE_CHECKING, Optional
+
+from app.config import DB_PATH, MEMORY_DB
+from app.stats import DONE_STATUSES
+
+if TYPE_CHECKING:
+    import duckdb
+
+# Reports running at once; each is a full scan, DuckDB already spreads one over the cores
+ANALYTICS_WORKERS = int(os.getenv("TASKFLOW_ANALYTICS_WORKERS", 2))
+# Threads DuckDB uses for one query, 0 for one per core
+ANALYTICS_THREADS = int(os.getenv("TASKFLOW_ANALYTICS_THREADS", 0))
+# Directory Parquet snapshots are written to
+EXPORT_DIR = os.getenv("TASKFLOW_EXPORT_DIR", "data/exports")
+# Tables exported to Parquet; users hold password hashes and are left out
+EXPORT_TABLES = ("projects", "tasks", "archived_tasks")
+
+# The SQLite store is attached under this catalog name, queries name it explicitly
+CATALOG = "taskflow"
+
+
+class AnalyticsUnavailable(Exception):
+    """DuckDB could not open the database or run a report; the message is safe to show to clients."""
+
+
+# There is no status history: a finished task's last modification is when it was finished
+_DONE = ", ".join(f"'{status}'" for status in DONE_STATUSES)
+
+# Reports cover the whole history: the tasks on the boards and the archived ones
+ALL_TASKS = f"""
+    (SELECT project_id, assigned_user_id, status, created_date, modified_date FROM {CATALOG}.tasks
+     UNION ALL
+     SELECT project_id, assigned_user_id, status, created_date, modified_date FROM {CATALOG}.archived_tasks)
+"""
+
+# Days from creation to completion of every finished task; dates are ISO 8601 text
+CYCLE_DAYS = f"""
+    SELECT t.project_id, t.assigned_user_id,
+           date_trunc('week', TRY_CAST(t.modified_date AS TIMESTAMP))::DATE AS week,
+           date_diff('second', TRY_CAST(t.created_date AS TIMESTAMP), TRY_CAST(t.modified_date AS TIMESTAMP)) / 86400.0 AS days
+    FROM {ALL_TASKS} t
+    WHERE t.status IN ({_DONE}) AND (?::INTEGER IS NULL OR t.project_id = ?)
+"""
+
+CYCLE_TIME_QUERY = f"""
+    WITH done AS ({CYCLE_DAYS})
+    SELECT p.id AS project_id, p.name, count(*) AS done,
+           avg(done.days) AS avg_days, quantile_cont(done.days, [0.5, 0.9]) AS quantiles
+    FROM done
+    JOIN {CATALOG}.projects p ON p.id = done.project_id
+    WHERE done.days IS NOT NULL
+    GROUP BY p.id, p.name
+    ORDER BY p.id
+"""
+
+THROUGHPUT_QUERY = f"""
+    WITH last AS (SELECT date_trunc('week', ?::DATE)::TIMESTAMP AS week),
+    weeks AS (
+        SELECT unnest(range(last.week - to_weeks(? - 1), last.week + INTERVAL 1 WEEK, INTERVAL 1 WEEK))::DATE AS week FROM last
+    ),
+    created AS (
+        SELECT date_trunc('week', TRY_CAST(created_date AS TIMESTAMP))::DATE AS week, count(*) AS count
+        FROM {ALL_TASKS}
+        WHERE ?::INTEGER IS NULL OR project_id = ?
+        GROUP BY 1
+    ),
+    done AS (
+        SELECT week, count(*) AS count FROM ({CYCLE_DAYS}) GROUP BY 1
+    )
+    SELECT weeks.week, coalesce(created.count, 0) AS created, coalesce(done.count, 0) AS done
+    FROM weeks
+    LEFT JOIN created ON created.week = weeks.week
+    LEFT JOIN done ON done.week = weeks.week
+    ORDER BY weeks.week
+"""
+
+ASSIGNEE_HISTORY_QUERY = f"""
+    WITH done AS ({CYCLE_DAYS})
+    SELECT done.assigned_user_id AS user_id, u.username, done.week, count(*) AS done, avg(done.days) AS avg_days
+    FROM done
+    JOIN {CATALOG}.users u ON u.id = done.assigned_user_id
+    WHERE done.week BETWEEN (date_trunc('week', ?::DATE) - to_weeks(? - 1))::DATE AND date_trunc('week', ?::DATE)
+      AND (?::INTEGER IS NULL OR done.assigned_user_id = ?)
+    GROUP BY 1, 2, 3
+    ORDER BY 1, 3
+"""
+
+
+def _days(value) -> Optional[float]:
+    return None if value is None else round(value, 3)
+
+
+def _week(value: date) -> str:
+    return value.isoformat()
+
+
+def cycle_time(conn: "duckdb.DuckDBPyConnection", project_id: Optional[int] = None) -> list:
+    """Per project: finished tasks and the mean, median and 90th percentile of their days from creation to completion."""
+    rows = conn.execute(CYCLE_TIME_QUERY, [project_id, project_id]).fetchall()
+    return [
+        {
+            "project_id": pid,
+            "name": name,
+            "done": done,
+            "avg_days": _days(avg_days),
+            "p50_days": _days(quantiles[0]),
+            "p90_days": _days(quantiles[1]),
+        }
+        for pid, name, done, avg_days, quantiles in rows
+    ]
+
+
+def throughput(conn: "duckdb.DuckDBPyConnection", weeks: int = 12, until: Optional[date] = None, project_id: Optional[int] = None) -> list:
+    """Tasks created and finished in each of the `weeks` weeks up to `until` (today by default), empty weeks included."""
+    until = until or date.today()
+    rows = conn.execute(THROUGHPUT_QUERY, [until, weeks, project_id, project_id, project_id, project_id]).fetchall()
+    return [{"week": _week(week), "created": created, "done": done} for week, created, done in rows]
+
+
+def assignee_history(
+    conn: "duckdb.DuckDBPyConnection",
+    weeks: int = 12,
+    until: Optional[date] = None,
+    project_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+) -> list:
+    """Tasks each assignee finished per week, with their mean cycle time, over the `weeks` weeks up to `until`."""
+    until = until or date.today()
+    rows = conn.execute(ASSIGNEE_HISTORY_QUERY, [project_id, project_id, until, weeks, until, user_id, user_id]).fetchall()
+    return [
+        {"user_id": uid, "username": username, "week": _week(week), "done": done, "avg_days": _days(avg_days)}
+        for uid, username, week, done, avg_days in rows
+    ]
+
+
+def export_parquet(conn: "duckdb.DuckDBPyConnection", directory: str = EXPORT_DIR) -> dict:
+    """
+    Write a Parquet snapshot of each table in EXPORT_TABLES.
+
+    Files are named after the table and the UTC time of the export, so older
+    snapshots are kept next to the new ones.
+
+    Returns:
+        dict: {table: {"path": ..., "rows": ...}} for every exported table.
+    """
+    os.makedirs(directory, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    exported = {}
+    for table in EXPORT_TABLES:
+        path = os.path.join(directory, f"{table}-{stamp}.parquet")
+        # COPY takes no bound parameter for its target
+        target = path.replace("'", "''")
+        rows = conn.execute(
+            f"COPY (SELECT * FROM {CATALOG}.{table} ORDER BY id) TO '{target}' (FORMAT parquet, COMPRESSION zstd)"
+        ).fetchone()[0]
+        exported[table] = {"path": path, "rows": rows}
+    return exported
+
+
+def attach_sqlite(path: str, threads: int = ANALYTICS_THREADS) -> "duckdb.DuckDBPyConnection":
+    """
+    Open an in-memory DuckDB database with the SQLite file at `path` attached read-only.
+
+    The sqlite extension is installed on first use, which needs network access
+    once per machine. DuckDB scans the live file through SQLite, so reports see
+    committed writes without an export step. The in-memory SQLite database
+    lives inside the API process, where DuckDB cannot attach it.
+    """
+    if path == MEMORY_DB:
+        raise AnalyticsUnavailable(f"Analytics need a database file, the database is {MEMORY_DB}")
+    # DuckDB is imported on first use: workers that never run a report do not load it
+    import duckdb
+
+    conn = duckdb.connect()
+    if threads:
+        conn.execute(f"SET threads = {int(threads)}")
+    conn.execute("INSTALL sqlite")
+    conn.execute("LOAD sqlite")
+    source = path.replace("'", "''")
+    conn.execute(f"ATTACH '{source}' AS {CATALOG} (TYPE sqlite, READ_ONLY)")
+    return conn
+
+
+class Analytics:
+    """
+    Runs report functions on DuckDB, off the API's SQLite pools and event loop.
+
+    The DuckDB database is opened on first use and shared; each report gets
+    its own cursor, and at most ANALYTICS_WORKERS of them run at once.
+    """
+
+    def __init__(self, path: str = DB_PATH, open_database=attach_sqlite, workers: int = ANALYTICS_WORKERS):
+        self.path = path
+        self._open_database = open_database
+        self.workers = workers
+        self._conn: Optional["duckdb.DuckDBPyConnection"] = None
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def cursor(self) -> "duckdb.DuckDBPyConnection":
+        with self._lock:
+            if self._conn is None:
+                self._conn = self._open_database(self.path)
+            return self._conn.cursor()
+
+    def call(self, fn, *args, **kwargs):
+        """Call fn(cursor, *args, **kwargs); DuckDB errors are raised as AnalyticsUnavailable."""
+        import duckdb
+
+        try:
+            cursor = self.cursor()
+            try:
+                return fn(cursor, *args, **kwargs)
+            finally:
+                cursor.close()
+        except duckdb.Error as e:
+            raise AnalyticsUnavailable("Analytics are unavailable") from e
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="taskflow-analytics")
+            return self._executor
+
+    async def run(self, fn, *args, **kwargs):
+        """Call fn(cursor, *args, **kwargs) on an analytics thread."""
+        return await asyncio.get_running_loop().run_in_executor(self._get_executor(), functools.partial(self.call, fn, *args, **kwargs))
+
+    def close(self):
+        """Wait for the running reports and close DuckDB; the next report opens both again."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+analytics = Analytics()
@@ -0,0 +1,170 @@
+"""
+Hot/archive split of the tasks.
+
+Tasks done for longer than ARCHIVE_AFTER_DAYS are moved from tasks to
+archived_tasks by a background job, so the board queries only scan and
+serialize the open work and recently finished cards, however long the history.
+
+The job moves ARCHIVE_BATCH_SIZE tasks per write transaction and pauses between
+batches, leaving the write lock to requests. A move keeps the task id and its
+counters (archived_tasks has the same counter triggers). It is logged as a
+deletion with {"archived": true} in the change log, and restore_task() brings
+the task back as a creation.
+"""
+import asyncio
+import json
+import os
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from app.cache import board_cache
+from app.changelog import TASK, record_change, record_changes
+from app.database import connect
+from app.events import CREATED, DELETED, event_bus
+from app.stats import DONE_STATUSES
+from app.utils.logger import logger
+
+# Set TASKFLOW_ARCHIVE=off to keep every task in the hot table
+ARCHIVE = os.getenv("TASKFLOW_ARCHIVE", "on") == "on"
+# Days a task stays on its board after it was last modified as done
+ARCHIVE_AFTER_DAYS = float(os.getenv("TASKFLOW_ARCHIVE_AFTER_DAYS", 30))
+# Tasks moved per write transaction
+ARCHIVE_BATCH_SIZE = int(os.getenv("TASKFLOW_ARCHIVE_BATCH_SIZE", 200))
+# Seconds between two runs of the job
+ARCHIVE_INTERVAL = float(os.getenv("TASKFLOW_ARCHIVE_INTERVAL", 600))
+# Seconds between two batches of one run
+ARCHIVE_PAUSE = 0.01
+
+COLUMNS = "id, project_id, title, description, status, assigned_user_id, created_by, created_date, modified_date, version"
+
+# There is no status history: a finished task's last modification is when it was finished
+ARCHIVE_BATCH_QUERY = f"""
+    INSERT INTO archived_tasks ({COLUMNS}, archived_at)
+    SELECT {COLUMNS}, ? FROM tasks
+    WHERE status IN ({", ".join("?" * len(DONE_STATUSES))}) AND modified_date < ?
+    LIMIT ?
+    RETURNING project_id, id
+"""
+
+# Back on the board as a new modification, or the next run would archive it again
+RESTORE_TASK_QUERY = f"""
+    INSERT INTO tasks ({COLUMNS})
+    SELECT id, project_id, title, description, status, assigned_user_id, created_by, created_date, ?, version + 1
+    FROM archived_tasks WHERE id = ?
+"""
+
+# Archived tasks of one project with the assigned and creating users, in the column order of GET /tasks
+ARCHIVED_TASKS_QUERY = """
+    SELECT t.id, t.project_id, t.title, t.description, t.status, t.created_date, t.modified_date, t.version,
+           au.id, au.username, cu.id, cu.username, t.archived_at
+    FROM archived_tasks t
+    LEFT JOIN users au ON t.assigned_user_id = au.id
+    LEFT JOIN users cu ON t.created_by = cu.id
+    WHERE t.project_id = ? AND t.id > ?
+    ORDER BY t.id
+    LIMIT ?
+"""
+
+
+def archive_cutoff(days: float = ARCHIVE_AFTER_DAYS, now: Optional[datetime] = None) -> str:
+    """ISO 8601 time before which a done task is archived; compared as text with modified_date."""
+    return ((now or datetime.now(timezone.utc)) - timedelta(days=days)).isoformat()
+
+
+def archive_batch(conn: sqlite3.Connection, cutoff: str, batch_size: int = ARCHIVE_BATCH_SIZE) -> list:
+    """
+    Move up to `batch_size` tasks done before `cutoff` to the archive; call it inside a transaction.
+
+    Returns:
+        list: (project_id, task_id) of every task moved.
+    """
+    archived_at = datetime.now(timezone.utc).isoformat()
+    moved = [tuple(row) for row in conn.execute(ARCHIVE_BATCH_QUERY, (archived_at, *DONE_STATUSES, cutoff, batch_size)).fetchall()]
+    if moved:
+        conn.execute("DELETE FROM tasks WHERE id IN (SELECT value FROM json_each(?))", (json.dumps([task_id for _, task_id in moved]),))
+        record_changes(conn, [(project_id, TASK, task_id, DELETED, {"archived": True}) for project_id, task_id in moved])
+    return moved
+
+
+def restore_task(conn: sqlite3.Connection, task_id: int) -> Optional[dict]:
+    """Move an archived task back to its board; call it inside a transaction. None if it is not archived."""
+    modified_date = datetime.now(timezone.utc).isoformat()
+    if conn.execute(RESTORE_TASK_QUERY, (modified_date, task_id)).rowcount == 0:
+        return None
+    conn.execute("DELETE FROM archived_tasks WHERE id = ?", (task_id,))
+    fields = dict(conn.execute("SELECT * FROM tasks WHERE id = ?", (task_id,)).fetchone())
+    record_change(conn, fields["project_id"], TASK, task_id, CREATED, fields)
+    return fields
+
+
+def _notify(moved: list):
+    for project_id in {project_id for project_id, _ in moved}:
+        board_cache.invalidate(project_id)
+    # Board viewers drop the cards, folded into one frame per project by the event bus
+    for project_id, task_id in moved:
+        event_bus.emit(project_id, DELETED, task_id)
+
+
+async def archive_done_tasks(
+    days: float = ARCHIVE_AFTER_DAYS,
+    batch_size: int = ARCHIVE_BATCH_SIZE,
+    pause: float = ARCHIVE_PAUSE,
+    stopping: Optional[asyncio.Event] = None,
+) -> int:
+    """
+    Archive every task done for longer than `days`, one batch per transaction.
+
+    A connection is only borrowed for the length of a batch. Setting `stopping`
+    ends the run after the batch in progress.
+
+    Returns:
+        int: Number of tasks archived.
+    """
+    cutoff = archive_cutoff(days)
+    total = 0
+    while stopping is None or not stopping.is_set():
+        async with connect() as db:
+            moved = await db.transaction(archive_batch, cutoff, batch_size)
+        _notify(moved)
+        total += len(moved)
+        if len(moved) < batch_size:
+            break
+        await asyncio.sleep(pause)
+    return total
+
+
+class Archiver:
+    """Runs archive_done_tasks() when started, then every `interval` seconds, on the running loop."""
+
+    def __init__(self, interval: float = ARCHIVE_INTERVAL):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self._stopping: Optional[asyncio.Event] = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._stopping = asyncio.Event()
+            self._task = asyncio.create_task(self._run(self._stopping))
+
+    async def _run(self, stopping: asyncio.Event):
+        while not stopping.is_set():
+            try:
+                archived = await archive_done_tasks(stopping=stopping)
+                if archived:
+                    logger.info(f"Archived {archived} done tasks")
+            except Exception as e:
+                logger.error(f"Error archiving done tasks: {e}")
+            try:
+                await asyncio.wait_for(stopping.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def stop(self):
+        """Let the batch in progress commit, then end the job; cancelling it could leave its connection mid-transaction."""
+        if self._task is not None:
+            self._stopping.set()
+            await self._task
+            self._task = None
+
+
+archiver = Archiver()
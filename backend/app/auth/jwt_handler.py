@@ -1,4 +1,3 @@
-import jwt
 from datetime import datetime, timedelta, timezone
 
 # Secret key used to sign the JWT tokens
@@ -18,6 +17,9 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     Returns:
         str: The encoded JWT token as a string.
     """
+    # Imported on first use, like passlib: a worker that never signs a token never pays for it
+    import jwt
+
     to_encode = data.copy()  # Copy the data to avoid mutating the original
     # Set the expiration time using a timezone-aware UTC datetime
     expire = datetime.now(timezone.utc) + (expires_delta or timedelta(minutes=15))
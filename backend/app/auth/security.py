@@ -1,9 +1,75 @@
-from passlib.context import CryptContext
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Optional, Tuple
+
+if TYPE_CHECKING:
+    from passlib.context import CryptContext
+
+# bcrypt work factor of new hashes; a hash made with another factor is redone at the next login
+BCRYPT_ROUNDS = int(os.getenv("TASKFLOW_BCRYPT_ROUNDS", 12))
+# Processes hashing passwords, one per core by default
+AUTH_WORKERS = int(os.getenv("TASKFLOW_AUTH_WORKERS", 0)) or os.cpu_count() or 1
+
+
+def make_context(rounds: int = BCRYPT_ROUNDS) -> "CryptContext":
+    # passlib is imported on first use: the server only needs it for logins, the auth processes always do
+    from passlib.context import CryptContext
+
+    # min == max rounds makes needs_update() flag hashes of any other factor, lower or higher
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds,
+    )
+
+
+_context: Optional["CryptContext"] = None
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_context() -> "CryptContext":
+    """The CryptContext of this process, built on first use."""
+    global _context
+    if _context is None:
+        _context = make_context()
+    return _context
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return get_context().hash(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_context().verify(plain_password, hashed_password)
+
+def verify_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Check a password; on success also return a new hash when the stored one uses another work factor."""
+    return get_context().verify_and_update(plain_password, hashed_password)
+
+
+def get_auth_pool() -> ProcessPoolExecutor:
+    """The process pool bcrypt runs in, started on first use."""
+    global _pool
+    if _pool is None:
+        # spawn, not fork: the server process already runs threads (database executor, broker)
+        _pool = ProcessPoolExecutor(max_workers=AUTH_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def shutdown_auth_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+
+async def hash_password_async(password: str) -> str:
+    """hash_password in the auth process pool, so bcrypt never blocks the event loop."""
+    return await asyncio.get_running_loop().run_in_executor(get_auth_pool(), hash_password, password)
+
+async def verify_and_update_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """verify_and_update in the auth process pool."""
+    return await asyncio.get_running_loop().run_in_executor(get_auth_pool(), verify_and_update, plain_password, hashed_password)
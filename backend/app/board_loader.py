@@ -0,0 +1,308 @@
+import sqlite3
+from app.cache import BoardCache, board_cache, dump_json
+from app.models import TaskFilters
+from app.pagination import next_cursor, task_filter_clause
+
+# The loader always runs these three queries, whatever the number of projects
+PROJECTS_QUERY = "SELECT id, name, description FROM projects ORDER BY id"
+
+MEMBERS_QUERY = """
+    SELECT up.project_id, u.id, u.username
+    FROM user_projects up
+    JOIN users u ON u.id = up.user_id
+    ORDER BY up.project_id, up.user_id
+"""
+
+TASKS_SELECT = """
+    SELECT t.id, t.project_id, t.title, t.description, t.status,
+           t.assigned_user_id, t.created_by, t.created_date, t.modified_date, t.version,
+           au.username AS assigned_user_name,
+           cu.username AS created_by_name
+    FROM tasks t
+    LEFT JOIN users au ON t.assigned_user_id = au.id
+    LEFT JOIN users cu ON t.created_by = cu.id
+"""
+
+TASKS_QUERY = TASKS_SELECT + "ORDER BY t.id"
+
+# Rows fetched per fetchmany() call when streaming boards
+STREAM_BATCH_SIZE = 500
+
+# Paged variants, restricted to the window of project ids on the current page
+PROJECTS_PAGE_QUERY = "SELECT id, name, description FROM projects WHERE id > ? ORDER BY id LIMIT ?"
+
+MEMBERS_WINDOW_QUERY = """
+    SELECT up.project_id, u.id, u.username
+    FROM user_projects up
+    JOIN users u ON u.id = up.user_id
+    WHERE up.project_id BETWEEN ? AND ?
+    ORDER BY up.project_id, up.user_id
+"""
+
+# Variants for an arbitrary set of projects, used to rebuild only the stale cache entries
+PROJECT_VERSIONS_WINDOW_QUERY = "SELECT project_id, version FROM project_versions WHERE project_id BETWEEN ? AND ?"
+
+MEMBERS_IN_QUERY = """
+    SELECT up.project_id, u.id, u.username
+    FROM user_projects up
+    JOIN users u ON u.id = up.user_id
+    WHERE up.project_id IN ({})
+    ORDER BY up.project_id, up.user_id
+"""
+
+TASKS_IN_QUERY = TASKS_SELECT + "WHERE t.project_id IN ({}) ORDER BY t.project_id, t.id"
+
+# Project ids bound per IN (...) list, well below SQLite's variable limit
+IDS_CHUNK_SIZE = 500
+
+
+def intern_user(users: dict, user_id, username) -> dict:
+    """
+    The {"id", "username"} object of a user, built once per response.
+
+    Every task and member list pointing at the same user shares one dict, so a
+    large board holds one object per user instead of two per task.
+    """
+    user = users.get(user_id)
+    if user is None:
+        user = users[user_id] = {"id": user_id, "username": username}
+    return user
+
+
+def format_task(task: sqlite3.Row, users: dict = None) -> dict:
+    """Task payload used by GET /projects/ (BoardTask); `users` interns the nested users across a response."""
+    if users is None:
+        users = {}
+    # Positional unpacking of TASKS_SELECT, much cheaper than a lookup by name per column
+    (task_id, project_id, title, description, status, assigned_user_id, created_by,
+     created_date, modified_date, version, assigned_user_name, created_by_name) = task
+    return {
+        "id": task_id,
+        "project_id": project_id,
+        "title": title,
+        "description": description,
+        "status": status,
+        "assigned_user_id": assigned_user_id,  # Assigned user ID
+        "assignedUser": intern_user(users, assigned_user_id, assigned_user_name) if assigned_user_id else None,
+        "created_by": created_by,  # Created by user ID
+        "createdBy": intern_user(users, created_by, created_by_name),
+        "created_date": created_date,
+        "modified_date": modified_date,
+        "version": version,
+    }
+
+
+def format_task_details(task: sqlite3.Row, users: dict = None) -> dict:
+    """Task payload used by GET /projects-with-details/ (BoardTaskDetails, users nested in place of the ids)."""
+    if users is None:
+        users = {}
+    (task_id, _, title, description, status, assigned_user_id, created_by,
+     created_date, modified_date, version, assigned_user_name, created_by_name) = task
+    return {
+        "id": task_id,
+        "title": title,
+        "description": description,
+        "status": status,
+        "assigned_user_id": intern_user(users, assigned_user_id, assigned_user_name) if assigned_user_id else None,
+        "created_by": intern_user(users, created_by, created_by_name),
+        "created_date": created_date,
+        "modified_date": modified_date,
+        "version": version,
+    }
+
+
+def _tasks_query(window: tuple, filters: TaskFilters, by_project: bool = False) -> tuple:
+    conditions, params = task_filter_clause(filters) if filters else ([], [])
+    if window is not None:
+        conditions.insert(0, "t.project_id BETWEEN ? AND ?")
+        params[:0] = window
+    order = "ORDER BY t.project_id, t.id" if by_project or window is not None else "ORDER BY t.id"
+    where = f"WHERE {' AND '.join(conditions)} " if conditions else ""
+    return TASKS_SELECT + where + order, params
+
+
+def _empty_projects(project_rows) -> dict:
+    return {
+        row["id"]: {
+            "id": row["id"],
+            "name": row["name"],
+            "description": row["description"],
+            "users": [],
+            "tasks": [],
+        }
+        for row in project_rows
+    }
+
+
+def _fill(projects: dict, members, tasks, format_task):
+    # Group members and tasks with a single pass over each result set
+    users = {}
+    for project_id, user_id, username in members:
+        project = projects.get(project_id)
+        if project is not None:
+            project["users"].append(intern_user(users, user_id, username))
+
+    for task in tasks:
+        project = projects.get(task[1])
+        if project is not None:
+            project["tasks"].append(format_task(task, users))
+
+
+def _group(conn: sqlite3.Connection, project_rows, format_task, window: tuple = None, filters: TaskFilters = None) -> list:
+    projects = _empty_projects(project_rows)
+    if not projects:
+        return []
+    members = conn.execute(MEMBERS_QUERY) if window is None else conn.execute(MEMBERS_WINDOW_QUERY, window)
+    _fill(projects, members, conn.execute(*_tasks_query(window, filters)), format_task)
+    return list(projects.values())
+
+
+def load_boards(conn: sqlite3.Connection, format_task=format_task, filters: TaskFilters = None) -> list:
+    """
+    Load every project with its members and tasks in a fixed number of queries.
+
+    Args:
+        conn (sqlite3.Connection): Connection to read from.
+        format_task (callable): Turns a row of TASKS_SELECT and the users dict of the response into the task payload.
+        filters (TaskFilters, optional): Only include the tasks matching these filters.
+
+    Returns:
+        list: Projects ordered by id, each with "users" and "tasks" lists.
+    """
+    return _group(conn, conn.execute(PROJECTS_QUERY), format_task, filters=filters)
+
+
+def load_board_page(conn: sqlite3.Connection, limit: int, after: int = 0, format_task=format_task, filters: TaskFilters = None) -> tuple:
+    """
+    Load one keyset page of projects, still in a fixed number of queries.
+
+    Args:
+        conn (sqlite3.Connection): Connection to read from.
+        limit (int): Number of projects on the page.
+        after (int): Id of the last project of the previous page.
+        format_task (callable): Turns a row of TASKS_SELECT and the users dict of the response into the task payload.
+        filters (TaskFilters, optional): Only include the tasks matching these filters.
+
+    Returns:
+        tuple: The projects of the page and the cursor of the next page (None on the last page).
+    """
+    # One extra row tells whether another page follows
+    project_rows = conn.execute(PROJECTS_PAGE_QUERY, (after, limit + 1)).fetchall()
+    project_rows, cursor = next_cursor(project_rows, limit)
+    if not project_rows:
+        return [], None
+    window = (project_rows[0]["id"], project_rows[-1]["id"])
+    return _group(conn, project_rows, format_task, window, filters), cursor
+
+
+def _load_rows(conn: sqlite3.Connection, project_rows: list, format_task) -> list:
+    projects = []
+    for start in range(0, len(project_rows), IDS_CHUNK_SIZE):
+        chunk = _empty_projects(project_rows[start:start + IDS_CHUNK_SIZE])
+        marks = ", ".join("?" * len(chunk))
+        ids = list(chunk)
+        members = conn.execute(MEMBERS_IN_QUERY.format(marks), ids)
+        _fill(chunk, members, conn.execute(TASKS_IN_QUERY.format(marks), ids), format_task)
+        projects.extend(chunk.values())
+    return projects
+
+
+def load_board_snapshots(conn: sqlite3.Connection, project_rows: list, kind: str, format_task=format_task, cache: BoardCache = board_cache) -> bytes:
+    """
+    Build the serialized {"projects": [...]} body for these projects from the board cache.
+
+    Only the projects whose snapshot is missing or older than their change log
+    version are loaded, then cached for the next reader. Each snapshot is
+    serialized straight to bytes, the dicts are dropped right after.
+
+    Args:
+        conn (sqlite3.Connection): Connection to read from.
+        project_rows (list): Rows of PROJECTS_QUERY or PROJECTS_PAGE_QUERY, ordered by id.
+        kind (str): Name of the payload shape, one cache entry per project and kind.
+        format_task (callable): Turns a row of TASKS_SELECT and the users dict of the response into the task payload.
+        cache (BoardCache): Where the snapshots are kept.
+
+    Returns:
+        bytes: The JSON response body.
+    """
+    if not project_rows:
+        return b'{"projects":[]}'
+    # Read the versions before the data: a write in between only makes an entry look older than it is
+    versions = dict(conn.execute(PROJECT_VERSIONS_WINDOW_QUERY, (project_rows[0]["id"], project_rows[-1]["id"])).fetchall())
+    parts, stale = {}, []
+    for row in project_rows:
+        payload = cache.get(kind, row["id"], versions.get(row["id"], 0))
+        if payload is None:
+            stale.append(row)
+        else:
+            parts[row["id"]] = payload
+    for project in _load_rows(conn, stale, format_task):
+        payload = dump_json(project)
+        cache.put(kind, project["id"], versions.get(project["id"], 0), payload)
+        parts[project["id"]] = payload
+    return b'{"projects":[' + b",".join(parts[row["id"]] for row in project_rows) + b"]}"
+
+
+def load_cached_boards(conn: sqlite3.Connection, kind: str, format_task=format_task, limit: int = None, after: int = 0) -> tuple:
+    """
+    Unfiltered boards, whole or one keyset page, served from the snapshot cache.
+
+    Returns:
+        tuple: The JSON response body and the cursor of the next page (None on the last page).
+    """
+    if limit is None:
+        return load_board_snapshots(conn, conn.execute(PROJECTS_QUERY).fetchall(), kind, format_task), None
+    project_rows, cursor = next_cursor(conn.execute(PROJECTS_PAGE_QUERY, (after, limit + 1)).fetchall(), limit)
+    return load_board_snapshots(conn, project_rows, kind, format_task), cursor
+
+
+def _fetch_in_batches(cursor: sqlite3.Cursor, batch_size: int):
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        yield from rows
+
+
+def iter_boards(conn: sqlite3.Connection, format_task=format_task, filters: TaskFilters = None, batch_size: int = STREAM_BATCH_SIZE):
+    """
+    Yield projects one at a time, with their members and tasks, in constant memory.
+
+    Members and tasks are read ordered by project id and merged with the project
+    cursor, so only the project being yielded is held in memory.
+
+    Args:
+        conn (sqlite3.Connection): Connection to read from.
+        format_task (callable): Turns a row of TASKS_SELECT and the users dict of the response into the task payload.
+        filters (TaskFilters, optional): Only include the tasks matching these filters.
+        batch_size (int): Rows fetched from SQLite at a time.
+    """
+    # Each query gets its own cursor, the three are consumed side by side
+    members = _fetch_in_batches(conn.execute(MEMBERS_QUERY), batch_size)
+    tasks = _fetch_in_batches(conn.execute(*_tasks_query(None, filters, by_project=True)), batch_size)
+    # Users are interned per project: a long stream must not keep every user it met
+    member = next(members, None)
+    task = next(tasks, None)
+
+    for row in _fetch_in_batches(conn.execute(PROJECTS_QUERY), batch_size):
+        project_id = row["id"]
+        project = {
+            "id": project_id,
+            "name": row["name"],
+            "description": row["description"],
+            "users": [],
+            "tasks": [],
+        }
+        users = {}
+        # Skip rows pointing at projects that no longer exist
+        while member is not None and member[0] < project_id:
+            member = next(members, None)
+        while member is not None and member[0] == project_id:
+            project["users"].append(intern_user(users, member[1], member[2]))
+            member = next(members, None)
+        while task is not None and task[1] < project_id:
+            task = next(tasks, None)
+        while task is not None and task[1] == project_id:
+            project["tasks"].append(format_task(task, users))
+            task = next(tasks, None)
+        yield project
@@ -0,0 +1,182 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Optional
+from app.database import run_blocking
+from app.utils.logger import logger
+
+# Backend used when the manager is created: "memory" (single process) or "sqlite" (several workers)
+BROKER = os.getenv("TASKFLOW_BROKER", "memory")
+BROKER_PATH = os.getenv("TASKFLOW_BROKER_PATH", "data/broker.db")
+# Seconds between two reads of the shared message table
+POLL_INTERVAL = 0.02
+# Seconds a relayed message is kept before it is pruned
+RETENTION = 60
+
+
+class Broker:
+    """
+    Carries broadcasts to the ConnectionManager of every worker.
+
+    The manager binds its local fan-out with bind(); publish() must hand each
+    message to that callback exactly once in every process. Coalesce keys are
+    encoded to JSON text before anything else, so a message carries the same
+    key in the worker that published it and in the ones it is relayed to.
+    """
+
+    def __init__(self):
+        self.deliver = None
+
+    def bind(self, deliver):
+        """Set the callback called as deliver(message, project_id, key) in this process."""
+        self.deliver = deliver
+
+    async def start(self):
+        """Start receiving messages from other processes, if the backend needs to."""
+
+    async def publish(self, message: dict, project_id: Optional[int] = None, key=None):
+        await self._publish(message, project_id, None if key is None else json.dumps(key))
+
+    async def _publish(self, message: dict, project_id: Optional[int], key: Optional[str]):
+        raise NotImplementedError
+
+    async def stop(self):
+        pass
+
+
+class InProcessBroker(Broker):
+    """Delivers straight to the local manager; enough for a single worker."""
+
+    async def _publish(self, message: dict, project_id: Optional[int], key: Optional[str]):
+        self.deliver(message, project_id, key)
+
+
+class SQLiteBroker(Broker):
+    """
+    Relays broadcasts between processes through a shared SQLite table.
+
+    Each worker appends what it publishes and polls for rows written by the
+    others, so live board updates reach every worker without an external service.
+    Local subscribers get their own messages immediately, without the poll delay.
+    """
+
+    def __init__(self, path: str = BROKER_PATH, poll_interval: float = POLL_INTERVAL, retention: float = RETENTION):
+        super().__init__()
+        self.path = path
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self.origin = uuid.uuid4().hex
+        self._lock = threading.Lock()
+        self._conn = None
+        self._last_id = None
+        self._poller: Optional[asyncio.Task] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            # Messages are transient, losing the last ones on power failure is acceptable
+            conn.execute("PRAGMA synchronous=OFF")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS broker_messages (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    origin TEXT NOT NULL,
+                    project_id INTEGER,
+                    coalesce_key TEXT,
+                    payload TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+            self._conn = conn
+        return self._conn
+
+    def _insert(self, message: dict, project_id: Optional[int], key: Optional[str]):
+        with self._lock:
+            self._connection().execute(
+                "INSERT INTO broker_messages (origin, project_id, coalesce_key, payload, created_at) VALUES (?, ?, ?, ?, ?)",
+                (self.origin, project_id, key, json.dumps(message), time.time()),
+            )
+
+    def _read_last_id(self) -> int:
+        with self._lock:
+            return self._connection().execute("SELECT COALESCE(MAX(id), 0) FROM broker_messages").fetchone()[0]
+
+    def _read_new(self) -> list:
+        with self._lock:
+            conn = self._connection()
+            rows = conn.execute(
+                "SELECT id, origin, project_id, coalesce_key, payload FROM broker_messages WHERE id > ? ORDER BY id",
+                (self._last_id,),
+            ).fetchall()
+            if rows:
+                self._last_id = rows[-1][0]
+            return rows
+
+    def _prune(self):
+        with self._lock:
+            self._connection().execute("DELETE FROM broker_messages WHERE created_at < ?", (time.time() - self.retention,))
+
+    async def start(self):
+        # Poll from the running loop; restarted if the previous loop went away
+        if self._poller is None or self._poller.done():
+            if self._last_id is None:
+                # Only messages published after we started listening matter. Read before returning
+                # rather than on the first poll, which would skip what is published in between.
+                last_id = await run_blocking(self._read_last_id)
+                if self._last_id is None:
+                    self._last_id = last_id
+            # Another socket may have started the poller during the read
+            if self._poller is None or self._poller.done():
+                self._poller = asyncio.create_task(self._poll())
+
+    async def _publish(self, message: dict, project_id: Optional[int], key: Optional[str]):
+        self.deliver(message, project_id, key)
+        await run_blocking(self._insert, message, project_id, key)
+
+    async def _poll(self):
+        last_prune = time.monotonic()
+        while True:
+            try:
+                for _, origin, project_id, key, payload in await run_blocking(self._read_new):
+                    if origin != self.origin:
+                        self.deliver(json.loads(payload), project_id, key)
+                if time.monotonic() - last_prune > self.retention:
+                    await run_blocking(self._prune)
+                    last_prune = time.monotonic()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error relaying broker messages: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    def _close(self):
+        # Under the lock: a read started by the cancelled poller may still be running on the executor
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    async def stop(self):
+        if self._poller is not None:
+            self._poller.cancel()
+            self._poller = None
+        await run_blocking(self._close)
+        # Started again, the broker listens from that point on
+        self._last_id = None
+
+
+def create_broker(name: str = BROKER) -> Broker:
+    """Build the broker selected by TASKFLOW_BROKER."""
+    if name == "memory":
+        return InProcessBroker()
+    if name == "sqlite":
+        return SQLiteBroker()
+    raise ValueError(f"Unknown broker backend: {name}")
@@ -0,0 +1,104 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+try:
+    import orjson
+except ImportError:  # Optional: the standard library encoder gives the same bytes, only slower
+    orjson = None
+
+# Upper bound on the serialized bytes kept in the board cache of each worker
+CACHE_MAX_BYTES = int(os.getenv("TASKFLOW_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+
+
+def dump_json(content) -> bytes:
+    """Serialize like FastAPI's JSONResponse (compact, UTF-8), with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+class BoardCache:
+    """
+    LRU cache of serialized board snapshots, keyed by project.
+
+    Each entry remembers the change log version of its project when it was built.
+    A lookup only hits when that version is still current, so entries left over
+    after a write made by another worker are never served; the writes of this
+    worker also drop their entries right away with invalidate().
+    Safe to use from the event loop and from the database threads.
+    """
+
+    def __init__(self, max_bytes: int = CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        # (kind, project_id) -> (version, payload)
+        self._entries: OrderedDict = OrderedDict()
+        # Kinds of snapshot stored so far, so invalidate() pops keys instead of scanning
+        self._kinds = set()
+        self._lock = threading.Lock()
+
+    def get(self, kind: str, project_id: int, version: int) -> Optional[bytes]:
+        """Return the payload cached for this version of the project, or None."""
+        key = (kind, project_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, kind: str, project_id: int, version: int, payload: bytes):
+        key = (kind, project_id)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous[1])
+            if len(payload) > self.max_bytes:
+                return
+            self._entries[key] = (version, payload)
+            self._kinds.add(kind)
+            self.size += len(payload)
+            while self.size > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+                self.evictions += 1
+
+    def invalidate(self, project_id: int):
+        """Drop every snapshot of a project; call it after a write to the project commits."""
+        with self._lock:
+            for kind in self._kinds:
+                entry = self._entries.pop((kind, project_id), None)
+                if entry is not None:
+                    self.size -= len(entry[1])
+                    self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+board_cache = BoardCache()
@@ -0,0 +1,94 @@
+import hashlib
+import json
+import sqlite3
+from datetime import datetime, timezone
+from fastapi import Request
+
+# Entities recorded in the change log
+TASK = "task"
+PROJECT = "project"
+MEMBER = "member"
+
+CHANGES_SINCE_QUERY = """
+    SELECT version, entity, entity_id, op, data, changed_at
+    FROM changes
+    WHERE project_id = ? AND version > ?
+    ORDER BY version
+    LIMIT ?
+"""
+
+PROJECT_VERSION_QUERY = "SELECT COALESCE((SELECT version FROM project_versions WHERE project_id = ?), 0)"
+
+LATEST_VERSION_QUERY = "SELECT COALESCE(MAX(version), 0) FROM changes"
+
+# Response header with the change log version a board response is current as of;
+# clients pass it as `since` to GET /changes to catch up after a reconnect
+VERSION_HEADER = "X-Board-Version"
+
+
+def record_change(conn: sqlite3.Connection, project_id: int, entity: str, entity_id: int, op: str, data: dict = None) -> int:
+    """
+    Append a change to the log; call it inside the transaction of the write it describes.
+
+    Args:
+        conn (sqlite3.Connection): The connection running the write.
+        project_id (int): Board the change belongs to.
+        entity (str): TASK, PROJECT or MEMBER.
+        entity_id (int): Id of the task, project or user that changed.
+        op (str): created, updated or deleted.
+        data (dict, optional): The new values of the fields that changed.
+
+    Returns:
+        int: The version of the change, increasing across the whole database.
+    """
+    cursor = conn.execute(
+        "INSERT INTO changes (project_id, entity, entity_id, op, data, changed_at) VALUES (?, ?, ?, ?, ?, ?)",
+        (project_id, entity, entity_id, op, None if data is None else json.dumps(data), datetime.now(timezone.utc).isoformat()),
+    )
+    return cursor.lastrowid
+
+
+def record_changes(conn: sqlite3.Connection, changes: list):
+    """Append several changes at once, as (project_id, entity, entity_id, op, data) tuples, in the caller's transaction."""
+    changed_at = datetime.now(timezone.utc).isoformat()
+    conn.executemany(
+        "INSERT INTO changes (project_id, entity, entity_id, op, data, changed_at) VALUES (?, ?, ?, ?, ?, ?)",
+        [
+            (project_id, entity, entity_id, op, None if data is None else json.dumps(data), changed_at)
+            for project_id, entity, entity_id, op, data in changes
+        ],
+    )
+
+
+def changes_since(conn: sqlite3.Connection, project_id: int, since: int, limit: int) -> list:
+    return [
+        {
+            "version": row["version"],
+            "entity": row["entity"],
+            "entity_id": row["entity_id"],
+            "op": row["op"],
+            "data": None if row["data"] is None else json.loads(row["data"]),
+            "changed_at": row["changed_at"],
+        }
+        for row in conn.execute(CHANGES_SINCE_QUERY, (project_id, since, limit))
+    ]
+
+
+def set_version_headers(response, version: int, etag: str):
+    response.headers["ETag"] = etag
+    response.headers[VERSION_HEADER] = str(version)
+
+
+def make_etag(version: int, request: Request) -> str:
+    """Weak ETag for a board response: the data version plus the exact path and query."""
+    digest = hashlib.sha1(f"{request.url.path}?{request.url.query}".encode()).hexdigest()[:16]
+    return f'W/"{version}-{digest}"'
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """True when the If-None-Match header of the request already names this ETag."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = {candidate.strip() for candidate in header.split(",")}
+    return "*" in candidates or etag in candidates or etag.removeprefix("W/") in candidates
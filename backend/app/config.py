@@ -0,0 +1,65 @@
+"""
+Settings of the database layer, read from the environment.
+
+    TASKFLOW_DB_PATH       SQLite file, or :memory: for one database shared by every
+                           connection of the process (tests, throwaway servers)
+    TASKFLOW_POOL_SIZE     connections per pool, one pool for writes and one for reads;
+                           with :memory: the write pool has a single connection
+    TASKFLOW_POOL_TIMEOUT  seconds a request waits for a free connection
+    TASKFLOW_MAX_STREAMS   streamed responses reading at once, each holding a read
+                           connection; half the pool by default
+    TASKFLOW_PRAGMAS       name=value pairs separated by commas, replacing the
+                           defaults of the same name: "cache_size=-64000,mmap_size=0"
+    TASKFLOW_GROUP_COMMIT  "on" to commit the transactions of concurrent requests in
+                           batches from one writer thread, with
+                           TASKFLOW_GROUP_COMMIT_MAX_BATCH and TASKFLOW_GROUP_COMMIT_MAX_DELAY
+
+Nothing here touches the disk: the database is opened and its schema created
+by app.database.init_db() when the application starts.
+"""
+import os
+
+# Value of TASKFLOW_DB_PATH selecting the shared in-memory database
+MEMORY_DB = ":memory:"
+# Named in-memory database with a shared cache: every connection opening it sees the same data
+MEMORY_DB_URI = "file:taskflow?mode=memory&cache=shared"
+
+DB_PATH = os.getenv("TASKFLOW_DB_PATH", "data/taskflow.db")
+# Maximum number of open connections per pool (one pool for writes, one for reads)
+POOL_SIZE = int(os.getenv("TASKFLOW_POOL_SIZE", 8))
+# Seconds a request waits for a free connection before failing
+POOL_TIMEOUT = float(os.getenv("TASKFLOW_POOL_TIMEOUT", 30))
+# Streamed responses holding a read connection at once; the others wait, so slow clients never take the whole pool
+MAX_STREAMS = min(int(os.getenv("TASKFLOW_MAX_STREAMS", max(1, POOL_SIZE // 2))), POOL_SIZE)
+
+# Group commit: transactions are queued to one writer thread that commits them in batches
+GROUP_COMMIT = os.getenv("TASKFLOW_GROUP_COMMIT", "off") == "on"
+# Most transactions committed together
+GROUP_COMMIT_MAX_BATCH = int(os.getenv("TASKFLOW_GROUP_COMMIT_MAX_BATCH", 64))
+# Seconds the writer waits for more transactions after the first one of a batch
+GROUP_COMMIT_MAX_DELAY = float(os.getenv("TASKFLOW_GROUP_COMMIT_MAX_DELAY", 0.0005))
+
+# Pragmas applied to every connection when it is opened
+DEFAULT_PRAGMAS = {
+    "busy_timeout": 5000,      # wait up to 5s on a locked database instead of failing
+    "synchronous": "NORMAL",   # safe with WAL, one fsync per checkpoint instead of per commit
+    "cache_size": -16000,      # 16 MB page cache per connection
+    "mmap_size": 268435456,    # 256 MB memory-mapped I/O
+}
+
+
+def parse_pragmas(overrides: str, defaults: dict = DEFAULT_PRAGMAS) -> dict:
+    """The default pragmas updated with the name=value pairs of `overrides`."""
+    pragmas = dict(defaults)
+    for item in overrides.split(","):
+        if not item.strip():
+            continue
+        name, _, value = (part.strip() for part in item.partition("="))
+        # Names and values are pasted into PRAGMA statements, keep them to plain words
+        if not name.isidentifier() or not value.lstrip("-").replace("_", "").isalnum():
+            raise ValueError(f"Invalid pragma in TASKFLOW_PRAGMAS: {item!r}")
+        pragmas[name] = value
+    return pragmas
+
+
+PRAGMAS = parse_pragmas(os.getenv("TASKFLOW_PRAGMAS", ""))
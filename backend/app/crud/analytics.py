@@ -0,0 +1,38 @@
+from datetime import date
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query
+from app import analytics as reports
+from app.utils.logger import logger
+
+router = APIRouter()
+
+# Reports scan every task in DuckDB, never through the API's SQLite connections
+
+async def run_report(fn, *args, **kwargs):
+    try:
+        return await reports.analytics.run(fn, *args, **kwargs)
+    except reports.AnalyticsUnavailable as e:
+        logger.error(f"Analytics query failed: {e.__cause__ or e}")
+        raise HTTPException(status_code=503, detail=str(e))
+
+@router.get("/analytics/cycle-time")
+async def get_cycle_time(project_id: Optional[int] = None):
+    return await run_report(reports.cycle_time, project_id)
+
+@router.get("/analytics/throughput")
+async def get_throughput(weeks: int = Query(12, ge=1, le=520), until: Optional[date] = None, project_id: Optional[int] = None):
+    return await run_report(reports.throughput, weeks, until, project_id)
+
+@router.get("/analytics/assignees")
+async def get_assignee_history(
+    weeks: int = Query(12, ge=1, le=520),
+    until: Optional[date] = None,
+    project_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+):
+    return await run_report(reports.assignee_history, weeks, until, project_id, user_id)
+
+@router.post("/analytics/export")
+async def export_snapshot():
+    """Write Parquet snapshots of the projects and tasks to EXPORT_DIR on the server."""
+    return await run_report(reports.export_parquet, reports.EXPORT_DIR)
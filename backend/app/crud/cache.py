@@ -0,0 +1,9 @@
+from fastapi import APIRouter
+from app.cache import board_cache
+
+router = APIRouter()
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """Counters of this worker's board cache, to size CACHE_MAX_BYTES from a real hit ratio."""
+    return board_cache.stats()
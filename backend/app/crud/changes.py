@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from app.changelog import changes_since
+from app.database import AsyncConnection, get_read_db
+from app.pagination import MAX_PAGE_SIZE
+from app.utils.logger import logger
+
+router = APIRouter()
+
+@router.get("/changes")
+async def get_changes(
+    project_id: int,
+    since: int = Query(0, ge=0),
+    limit: int = Query(MAX_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncConnection = Depends(get_read_db),
+):
+    """
+    Return the changes of a board made after version `since`.
+
+    A reconnecting client passes the last version it applied and replays the
+    result instead of downloading the whole board again. When `has_more` is true
+    it calls again with `since` set to the returned `version`.
+    """
+    try:
+        changes = await db.run(changes_since, project_id, since, limit + 1)
+        has_more = len(changes) > limit
+        changes = changes[:limit]
+        version = changes[-1]["version"] if changes else since
+        return {"project_id": project_id, "version": version, "has_more": has_more, "changes": changes}
+    except Exception as e:
+        logger.error(f"Error fetching changes for project_id {project_id}: {e}")
+        raise HTTPException(status_code=500, detail="An error occurred while fetching changes")
@@ -0,0 +1,29 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app import database, metrics
+from app.cache import board_cache
+
+router = APIRouter()
+
+# Values other modules already count, read when /metrics is scraped
+
+@metrics.register_collector
+def collect_board_cache():
+    stats = board_cache.stats()
+    yield "taskflow_board_cache_bytes", "gauge", "Bytes held by the board cache.", [({}, stats["bytes"])]
+    yield "taskflow_board_cache_entries", "gauge", "Boards held by the board cache.", [({}, stats["entries"])]
+    for name in ("hits", "misses", "evictions", "invalidations"):
+        yield f"taskflow_board_cache_{name}_total", "counter", f"Board cache {name}.", [({}, stats[name])]
+
+@metrics.register_collector
+def collect_group_writer():
+    writer = database.group_writer
+    if writer is None:
+        return
+    yield "taskflow_group_commit_batches_total", "counter", "Commits made by the group-commit writer.", [({}, writer.batches)]
+    yield "taskflow_group_commit_transactions_total", "counter", "Transactions committed by the group-commit writer.", [({}, writer.transactions)]
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Prometheus text exposition of this worker's metrics."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
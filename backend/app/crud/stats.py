@@ -0,0 +1,15 @@
+from fastapi import APIRouter, Depends
+from app.database import AsyncConnection, get_read_db
+from app.stats import project_stats, user_workload
+
+router = APIRouter()
+
+# Both read the counters kept by triggers on tasks, never the tasks themselves
+
+@router.get("/projects/{project_id}/stats")
+async def get_project_stats(project_id: int, db: AsyncConnection = Depends(get_read_db)):
+    return await db.run(project_stats, project_id)
+
+@router.get("/users/{user_id}/workload")
+async def get_user_workload(user_id: int, db: AsyncConnection = Depends(get_read_db)):
+    return await db.run(user_workload, user_id)
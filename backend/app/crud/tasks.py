@@ -1,30 +1,306 @@
-from fastapi import APIRouter, HTTPException
-from app.database import cursor, conn
-from app.models import Task
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query, Request, Response
+from typing import List, Optional
+from app.archive import ARCHIVED_TASKS_QUERY, restore_task
+from app.board_loader import intern_user
+from app.cache import board_cache, dump_json
+from app.changelog import PROJECT_VERSION_QUERY, TASK, is_not_modified, make_etag, record_change, record_changes, set_version_headers
+from app.database import AsyncConnection, get_db, get_read_db
+from app.events import CREATED, DELETED, UPDATED, changed_fields, event_bus
+from app.models import ArchivedTask, BulkTaskPatch, ProjectTask, Task, TaskFilters, TaskPatch
+from app.pagination import MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, decode_cursor, encode_cursor, next_cursor, task_filter_clause
+from app.search import fts_query, search_tasks
 from datetime import datetime, timezone
 from app.utils.logger import logger
+import json
+import sqlite3
 
 router = APIRouter()
 
+# Kind of the GET /tasks snapshots in the board cache
+TASKS_SNAPSHOT = "tasks"
+
+# Tasks of one project with the assigned and creating users
+TASKS_BY_PROJECT_QUERY = """
+    SELECT 
+        t.id,
+        t.project_id,
+        t.title,
+        t.description,
+        t.status,
+        t.created_date,
+        t.modified_date,
+        t.version,
+        assigned_user.id AS assigned_user_id,
+        assigned_user.username AS assigned_user_username,
+        created_user.id AS created_user_id,
+        created_user.username AS created_user_username
+    FROM 
+        tasks t
+    LEFT JOIN 
+        users AS assigned_user ON t.assigned_user_id = assigned_user.id
+    LEFT JOIN 
+        users AS created_user ON t.created_by = created_user.id
+    WHERE 
+        t.project_id = ?
+"""
+
+
+def _tasks_page_query(filters: TaskFilters, after: Optional[int], limit: Optional[int]) -> tuple:
+    """Extend TASKS_BY_PROJECT_QUERY with the filters and the keyset page bounds."""
+    conditions, params = task_filter_clause(filters)
+    if after is not None:
+        conditions.append("t.id > ?")
+        params.append(after)
+    query = TASKS_BY_PROJECT_QUERY + "".join(f"        AND {condition}\n" for condition in conditions)
+    query += "    ORDER BY t.id\n"
+    if limit is not None:
+        # One extra row tells whether another page follows
+        query += "    LIMIT ?\n"
+        params.append(limit + 1)
+    return query, params
+
+# Search results per page unless the client asks for another size
+SEARCH_PAGE_SIZE = 20
+
+# Largest array accepted by the bulk endpoints
+MAX_BULK_ITEMS = 1000
+
+INSERT_TASK_QUERY = """
+    INSERT INTO tasks (title, description, status, assigned_user_id, project_id, created_by, created_date, modified_date)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+UPDATE_TASK_QUERY = """
+    UPDATE tasks
+    SET title = ?, description = ?, status = ?, assigned_user_id = ?, project_id = ?, created_by = ?, created_date = ?, modified_date = ?,
+        version = version + 1
+    WHERE id = ?
+"""
+
+# Compare-and-swap variant: only applies if the row is still at the version it was read at
+UPDATE_TASK_VERSION_QUERY = UPDATE_TASK_QUERY + "    AND version = ?\n"
+
+# Tasks whose id is in a JSON array, bound as a single parameter whatever its length
+TASKS_BY_IDS_QUERY = "SELECT * FROM tasks WHERE id IN (SELECT value FROM json_each(?))"
+
+# Columns of a task, in the order of INSERT_TASK_QUERY and UPDATE_TASK_QUERY
+TASK_COLUMNS = ("title", "description", "status", "assigned_user_id", "project_id", "created_by", "created_date", "modified_date")
+
+# Columns a patch may not set to null
+REQUIRED_COLUMNS = ("project_id", "title", "description", "created_by")
+
+
+def _bulk_error(status_code: int, message: str, errors: list) -> HTTPException:
+    # Nothing was written: the errors name the items that made the whole request fail
+    return HTTPException(status_code=status_code, detail={"message": message, "errors": errors})
+
+
+def _duplicate_errors(ids: list) -> list:
+    seen, errors = set(), []
+    for index, task_id in enumerate(ids):
+        if task_id in seen:
+            errors.append({"index": index, "id": task_id, "error": "Task listed more than once"})
+        seen.add(task_id)
+    return errors
+
+
+def _missing_errors(ids: list, found) -> list:
+    return [{"index": index, "id": task_id, "error": "Task not found"} for index, task_id in enumerate(ids) if task_id not in found]
+
+
+def _version_conflict(task) -> HTTPException:
+    # The current row lets the client merge its change and retry with the new version
+    return HTTPException(status_code=409, detail={
+        "message": "Task was modified by someone else",
+        "version": task["version"],
+        "task": dict(task),
+    })
+
+
+def _parse_if_match(header: Optional[str]) -> Optional[int]:
+    """Read the task version from an If-Match header: 3, "3" or W/"3". * matches any version."""
+    if header is None or header.strip() == "*":
+        return None
+    try:
+        return int(header.strip().removeprefix("W/").strip('"'))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="If-Match must be a task version")
+
+
+def _empty_errors(index: int, patch: BulkTaskPatch) -> list:
+    # A write changing nothing would still bump the version and fail other clients' If-Match
+    if patch.model_fields_set - {"id", "version"}:
+        return []
+    return [{"index": index, "id": patch.id, "error": "No field to update"}]
+
+
+def _null_errors(index: int, patch: TaskPatch) -> list:
+    return [
+        {"index": index, "id": getattr(patch, "id", None), "error": f"{column} cannot be null"}
+        for column in REQUIRED_COLUMNS
+        if column in patch.model_fields_set and getattr(patch, column) is None
+    ]
+
+
+def _notify(events: list):
+    """Invalidate the cache and tell board viewers once a bulk write committed."""
+    for project_id in {event[0] for event in events}:
+        board_cache.invalidate(project_id)
+    # Emitted in one loop turn, the event bus folds them into a single frame per project
+    for project_id, op, task_id, fields in events:
+        event_bus.emit(project_id, op, task_id, fields)
+
+
+@router.get("/tasks/search")
+async def search_tasks_endpoint(
+    response: Response,
+    q: str = Query(..., max_length=200),
+    project_id: Optional[int] = None,
+    limit: int = Query(SEARCH_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    db: AsyncConnection = Depends(get_read_db),
+):
+    """
+    Full-text search over task titles and descriptions, best match first.
+
+    Results carry highlighted snippets. Ranks are not unique, so the cursor of
+    the next page is an offset into the ranking rather than a task id.
+    """
+    match = fts_query(q)
+    if match is None:
+        raise HTTPException(status_code=400, detail="The search needs at least one word")
+    offset = decode_cursor(after) if after else 0
+    try:
+        # One extra row tells whether another page follows
+        results = await db.run(search_tasks, match, project_id, limit + 1, offset)
+    except Exception as e:
+        logger.error(f"Error searching tasks for {q!r}: {e}")
+        raise HTTPException(status_code=500, detail="An error occurred while searching tasks")
+    if len(results) > limit:
+        results = results[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(offset + limit)
+    return results
+
+
+# Bulk endpoints: one transaction and one executemany per request, all or nothing.
+# Declared before the /tasks/{task_id} routes, which would otherwise take "bulk" as an id.
+
+@router.post("/tasks/bulk")
+async def create_tasks_bulk(tasks: List[Task] = Body(..., min_length=1, max_length=MAX_BULK_ITEMS), db: AsyncConnection = Depends(get_db)):
+    def write(conn):
+        conn.executemany(INSERT_TASK_QUERY, [
+            (task.title, task.description, task.status, task.assigned_user_id, task.project_id, task.created_by, task.created_date, task.modified_date)
+            for task in tasks
+        ])
+        # AUTOINCREMENT ids given by one statement inside one write transaction are consecutive
+        first_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0] - len(tasks) + 1
+        created = [{**task.model_dump(), "id": first_id + index} for index, task in enumerate(tasks)]
+        record_changes(conn, [(fields["project_id"], TASK, fields["id"], CREATED, fields) for fields in created])
+        return created
+
+    try:
+        created = await db.transaction(write)
+    except sqlite3.IntegrityError as e:
+        raise _bulk_error(400, "No task was created", [{"error": str(e)}])
+    _notify([(fields["project_id"], CREATED, fields["id"], fields) for fields in created])
+    return {"results": [{"index": index, "id": fields["id"], "status": CREATED} for index, fields in enumerate(created)]}
+
+
+@router.patch("/tasks/bulk")
+async def update_tasks_bulk(patches: List[BulkTaskPatch] = Body(..., min_length=1, max_length=MAX_BULK_ITEMS), db: AsyncConnection = Depends(get_db)):
+    ids = [patch.id for patch in patches]
+    errors = _duplicate_errors(ids) + [
+        error for index, patch in enumerate(patches) for error in _empty_errors(index, patch) + _null_errors(index, patch)
+    ]
+    if errors:
+        raise _bulk_error(400, "No task was updated", errors)
+    modified_date = datetime.now(timezone.utc).isoformat()
+
+    def write(conn):
+        # Read the previous versions in the same transaction to know what changed: transaction() began it
+        # with BEGIN IMMEDIATE, so the 404 and 409 checks below see the rows the updates are made to
+        old_rows = {row["id"]: row for row in conn.execute(TASKS_BY_IDS_QUERY, (json.dumps(ids),))}
+        missing = _missing_errors(ids, old_rows)
+        if missing:
+            raise _bulk_error(404, "No task was updated", missing)
+        conflicts = [
+            {"index": index, "id": patch.id, "error": "Task was modified by someone else", "version": old_rows[patch.id]["version"]}
+            for index, patch in enumerate(patches)
+            if patch.version is not None and patch.version != old_rows[patch.id]["version"]
+        ]
+        if conflicts:
+            raise _bulk_error(409, "No task was updated", conflicts)
+        updates, changes, events = [], [], []
+        for patch in patches:
+            old = old_rows[patch.id]
+            new = {column: old[column] for column in TASK_COLUMNS}
+            new.update(patch.model_dump(exclude_unset=True, exclude={"id", "version"}), modified_date=modified_date)
+            # Every row is also swapped against the version read above, in case the callback ever runs
+            # outside such a transaction: a concurrent write is then refused rather than overwritten
+            updates.append((*(new[column] for column in TASK_COLUMNS), patch.id, old["version"]))
+            new["version"] = old["version"] + 1
+            if old["project_id"] != new["project_id"]:
+                changes += [(old["project_id"], TASK, patch.id, DELETED, None), (new["project_id"], TASK, patch.id, CREATED, {"id": patch.id, **new})]
+                events += [(old["project_id"], DELETED, patch.id, None), (new["project_id"], CREATED, patch.id, {"id": patch.id, **new})]
+            else:
+                fields = changed_fields(old, new)
+                changes.append((new["project_id"], TASK, patch.id, UPDATED, fields))
+                events.append((new["project_id"], UPDATED, patch.id, fields))
+        if conn.executemany(UPDATE_TASK_VERSION_QUERY, updates).rowcount != len(updates):
+            raise _bulk_error(409, "No task was updated", [{"error": "Tasks were modified concurrently, retry"}])
+        record_changes(conn, changes)
+        return events
+
+    try:
+        events = await db.transaction(write)
+    except sqlite3.IntegrityError as e:
+        raise _bulk_error(400, "No task was updated", [{"error": str(e)}])
+    _notify(events)
+    versions = {task_id: fields["version"] for _, op, task_id, fields in events if op != DELETED}
+    return {"results": [{"index": index, "id": task_id, "status": UPDATED, "version": versions[task_id]} for index, task_id in enumerate(ids)]}
+
+
+@router.delete("/tasks/bulk")
+async def delete_tasks_bulk(ids: List[int] = Body(..., min_length=1, max_length=MAX_BULK_ITEMS), db: AsyncConnection = Depends(get_db)):
+    errors = _duplicate_errors(ids)
+    if errors:
+        raise _bulk_error(400, "No task was deleted", errors)
+
+    def write(conn):
+        projects = {row["id"]: row["project_id"] for row in conn.execute(TASKS_BY_IDS_QUERY, (json.dumps(ids),))}
+        missing = _missing_errors(ids, projects)
+        if missing:
+            raise _bulk_error(404, "No task was deleted", missing)
+        if conn.executemany("DELETE FROM tasks WHERE id = ?", [(task_id,) for task_id in ids]).rowcount != len(ids):
+            raise _bulk_error(409, "No task was deleted", [{"error": "Tasks were deleted concurrently, retry"}])
+        record_changes(conn, [(projects[task_id], TASK, task_id, DELETED, None) for task_id in ids])
+        return projects
+
+    projects = await db.transaction(write)
+    _notify([(projects[task_id], DELETED, task_id, None) for task_id in ids])
+    return {"results": [{"index": index, "id": task_id, "status": DELETED} for index, task_id in enumerate(ids)]}
+
 # REST Methods for Tasks
 
 @router.post("/tasks/")
-async def create_task(task: Task):
-    # Print the received task object for debugging
-    print(task.dict())  # Debug: show received object
-    # Insert the new task into the database
-    cursor.execute("""
-        INSERT INTO tasks (title, description, status, assigned_user_id, project_id, created_by, created_date, modified_date)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-    """, (task.title, task.description, task.status, task.assigned_user_id, task.project_id, task.created_by, task.created_date, task.modified_date))
-    conn.commit()
+async def create_task(task: Task, db: AsyncConnection = Depends(get_db)):
+    def write(conn):
+        # Insert the new task into the database
+        cursor = conn.execute(INSERT_TASK_QUERY, (task.title, task.description, task.status, task.assigned_user_id, task.project_id, task.created_by, task.created_date, task.modified_date))
+        fields = {**task.model_dump(), "id": cursor.lastrowid}
+        record_change(conn, task.project_id, TASK, cursor.lastrowid, CREATED, fields)
+        return fields
+
+    fields = await db.transaction(write)
+    board_cache.invalidate(task.project_id)
+    # Tell the board viewers, now that the row is committed
+    event_bus.emit(task.project_id, CREATED, fields["id"], fields)
     # Return a success message and the created task
     return {"message": "Task created successfully", "task": task}
 
 
 @router.put("/tasks/{task_id}")
-async def update_task(task_id: int, task_data: dict):
-    print(f"Updating task with ID: {task_data}")
+async def update_task(task_id: int, task_data: dict, db: AsyncConnection = Depends(get_db)):
     try:
         # Extract all fields from the request data
         title = task_data.get("title")
@@ -37,19 +313,7 @@ async def update_task(task_id: int, task_data: dict):
         # Always update modified_date to now
         modified_date = datetime.now(timezone.utc).isoformat()
 
-        # Update all fields in the database
-        cursor.execute(
-            """
-            UPDATE tasks
-            SET title = ?, description = ?, status = ?, assigned_user_id = ?, project_id = ?, created_by = ?, created_date = ?, modified_date = ?
-            WHERE id = ?
-            """,
-            (title, description, status, assigned_user_id, project_id, created_by, created_date, modified_date, task_id),
-        )
-        conn.commit()
-
-        # Return the updated task information
-        return {
+        updated = {
             "id": task_id,
             "title": title,
             "description": description,
@@ -61,79 +325,213 @@ async def update_task(task_id: int, task_data: dict):
             "modified_date": modified_date,
         }
 
+        def write(conn):
+            # Read the previous version in the same transaction to know what changed; transaction()
+            # began it before this read, so no other write can land between the read and the update
+            old = conn.execute("SELECT * FROM tasks WHERE id = ?", (task_id,)).fetchone()
+            # Update all fields in the database
+            conn.execute(
+                UPDATE_TASK_QUERY,
+                (title, description, status, assigned_user_id, project_id, created_by, created_date, modified_date, task_id),
+            )
+            if old is not None:
+                # Clients following the change stream need the new version for their next If-Match
+                updated["version"] = old["version"] + 1
+                if old["project_id"] != project_id:
+                    record_change(conn, old["project_id"], TASK, task_id, DELETED)
+                    record_change(conn, project_id, TASK, task_id, CREATED, updated)
+                else:
+                    record_change(conn, project_id, TASK, task_id, UPDATED, changed_fields(old, updated))
+            return old
+
+        old = await db.transaction(write)
+        if old is not None:
+            board_cache.invalidate(old["project_id"])
+            board_cache.invalidate(project_id)
+            if old["project_id"] != project_id:
+                event_bus.emit(old["project_id"], DELETED, task_id)
+                event_bus.emit(project_id, CREATED, task_id, updated)
+            else:
+                event_bus.emit(project_id, UPDATED, task_id, changed_fields(old, updated))
+
+        # Return the updated task information
+        return updated
+
     except Exception as e:
         logger.error(f"Error updating task {task_id}: {e}")
         raise HTTPException(status_code=500, detail="An error occurred while updating the task")
 
+@router.patch("/tasks/{task_id}")
+async def patch_task(
+    task_id: int,
+    patch: TaskPatch,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    db: AsyncConnection = Depends(get_db),
+):
+    """
+    Update only the fields sent, leaving the others untouched.
+
+    The expected version comes from the body or an If-Match header. When the
+    task has moved past it the update is refused with 409 and the current task,
+    so two concurrent drags never silently overwrite each other.
+    """
+    fields = patch.model_dump(exclude_unset=True, exclude={"version"})
+    if not fields:
+        raise HTTPException(status_code=400, detail="No field to update")
+    errors = _null_errors(0, patch)
+    if errors:
+        raise HTTPException(status_code=400, detail=errors[0]["error"])
+    expected = patch.version if patch.version is not None else _parse_if_match(if_match)
+    modified_date = datetime.now(timezone.utc).isoformat()
+    # Column names come from the TaskPatch fields, never from the client
+    assignments = "".join(f"{column} = ?, " for column in fields)
+
+    def write(conn):
+        old = conn.execute("SELECT * FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        if old is None:
+            raise HTTPException(status_code=404, detail="Task not found")
+        if expected is not None and expected != old["version"]:
+            raise _version_conflict(old)
+        cursor = conn.execute(
+            f"UPDATE tasks SET {assignments}modified_date = ?, version = version + 1 WHERE id = ? AND version = ?",
+            (*fields.values(), modified_date, task_id, old["version"]),
+        )
+        if cursor.rowcount == 0:
+            # Another write landed between the read and the update
+            raise _version_conflict(conn.execute("SELECT * FROM tasks WHERE id = ?", (task_id,)).fetchone() or old)
+        new = {**dict(old), **fields, "modified_date": modified_date, "version": old["version"] + 1}
+        if old["project_id"] != new["project_id"]:
+            record_change(conn, old["project_id"], TASK, task_id, DELETED)
+            record_change(conn, new["project_id"], TASK, task_id, CREATED, new)
+        else:
+            record_change(conn, new["project_id"], TASK, task_id, UPDATED, changed_fields(old, new))
+        return old, new
+
+    old, new = await db.transaction(write)
+    if old["project_id"] != new["project_id"]:
+        _notify([(old["project_id"], DELETED, task_id, None), (new["project_id"], CREATED, task_id, new)])
+    else:
+        _notify([(new["project_id"], UPDATED, task_id, changed_fields(old, new))])
+    response.headers["ETag"] = f'"{new["version"]}"'
+    return new
+
 @router.delete("/tasks/{task_id}")
-async def delete_task(task_id: int):
+async def delete_task(task_id: int, db: AsyncConnection = Depends(get_db)):
     try:
-        # Check if the task exists
-        cursor.execute("SELECT id FROM tasks WHERE id = ?", (task_id,))
-        task = cursor.fetchone()
-        if not task:
-            raise HTTPException(status_code=404, detail="Task not found")
+        def write(conn):
+            # Check the task exists and delete it in one transaction, so a concurrent delete is a 404 here
+            task = conn.execute("SELECT id, project_id FROM tasks WHERE id = ?", (task_id,)).fetchone()
+            if task is None or conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,)).rowcount == 0:
+                raise HTTPException(status_code=404, detail="Task not found")
+            record_change(conn, task["project_id"], TASK, task_id, DELETED)
+            return task
 
-        # Delete the task from the database
-        cursor.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
-        conn.commit()
+        task = await db.transaction(write)
+        board_cache.invalidate(task["project_id"])
+        event_bus.emit(task["project_id"], DELETED, task_id)
 
         # Return a success message
         return {"message": f"Task with ID {task_id} deleted successfully"}
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error deleting task {task_id}: {e}")
         raise HTTPException(status_code=500, detail="An error occurred while deleting the task")
         
-@router.get("/tasks")
-async def get_all_tasks_by_project(project_id: int):
+def format_project_task(task: sqlite3.Row, users: dict) -> dict:
+    """Item of GET /tasks (ProjectTask) from a row of TASKS_BY_PROJECT_QUERY."""
+    (task_id, project_id, title, description, status, created_date, modified_date, version,
+     assigned_user_id, assigned_user_username, created_user_id, created_user_username) = task
+    return {
+        "id": task_id,
+        "projectId": project_id,
+        "title": title,
+        "description": description,
+        "status": status,
+        "createdDate": created_date,
+        "modifiedDate": modified_date,
+        "version": version,
+        "assignedUser": intern_user(users, assigned_user_id, assigned_user_username) if assigned_user_id else None,
+        "createdBy": intern_user(users, created_user_id, created_user_username),
+    }
+
+
+def _render_tasks(conn: sqlite3.Connection, query: str, params: tuple, limit: Optional[int]) -> tuple:
+    """The JSON body of one GET /tasks page and the cursor of the next one."""
+    tasks, cursor = next_cursor(conn.execute(query, params).fetchall(), limit)
+    users = {}
+    return dump_json([format_project_task(task, users) for task in tasks]), cursor
+
+
+@router.get("/tasks", response_model=List[ProjectTask])
+async def get_all_tasks_by_project(
+    project_id: int,
+    request: Request,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    filters: TaskFilters = Depends(),
+    db: AsyncConnection = Depends(get_read_db),
+):
+    after_id = decode_cursor(after) if after else None
     try:
-        print(f"Fetching all tasks for project_id: {project_id}")
-        # Query all tasks for the given project, joining user info
-        cursor.execute("""
-            SELECT 
-                t.id,
-                t.project_id,
-                t.title,
-                t.description,
-                t.status,
-                t.created_date,
-                t.modified_date,
-                assigned_user.id AS assigned_user_id,
-                assigned_user.username AS assigned_user_username,
-                created_user.id AS created_user_id,
-                created_user.username AS created_user_username
-            FROM 
-                tasks t
-            LEFT JOIN 
-                users AS assigned_user ON t.assigned_user_id = assigned_user.id
-            LEFT JOIN 
-                users AS created_user ON t.created_by = created_user.id
-            WHERE 
-                t.project_id = ?
-        """, (project_id,))
-        tasks = cursor.fetchall()
-
-        # Convert rows to dictionaries and structure the response
-        return [
-            {
-                "id": task["id"],
-                "projectId": task["project_id"],
-                "title": task["title"],
-                "description": task["description"],
-                "status": task["status"],
-                "createdDate": task["created_date"],
-                "modifiedDate": task["modified_date"],
-                "assignedUser": {
-                    "id": task["assigned_user_id"],
-                    "username": task["assigned_user_username"]
-                } if task["assigned_user_id"] else None,
-                "createdBy": {
-                    "id": task["created_user_id"],
-                    "username": task["created_user_username"]
-                }
-            }
-            for task in tasks
-        ]
+        # Read the version before the tasks: a write in between only makes the ETag older than the data
+        version = (await db.fetchone(PROJECT_VERSION_QUERY, (project_id,)))[0]
+        etag = make_etag(version, request)
+        if is_not_modified(request, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        set_version_headers(response, version, etag)
+        # The whole unfiltered list is the common case, served from the board cache while the version holds
+        cacheable = limit is None and after_id is None and not filters.model_dump(exclude_none=True)
+        if cacheable:
+            body = board_cache.get(TASKS_SNAPSHOT, project_id, version)
+            if body is not None:
+                return Response(body, media_type="application/json", headers=dict(response.headers))
+        # Query, format and serialize in one hop to the database thread
+        query, params = _tasks_page_query(filters, after_id, limit)
+        body, cursor = await db.run(_render_tasks, query, (project_id, *params), limit)
+        if cursor:
+            response.headers[NEXT_CURSOR_HEADER] = cursor
+        if cacheable:
+            board_cache.put(TASKS_SNAPSHOT, project_id, version, body)
+        return Response(body, media_type="application/json", headers=dict(response.headers))
     except Exception as e:
         logger.error(f"Error fetching tasks for project_id {project_id}: {e}")
-        raise HTTPException(status_code=500, detail="An error occurred while fetching tasks for the project")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="An error occurred while fetching tasks for the project")
+
+def _render_archived(conn: sqlite3.Connection, project_id: int, after: int, limit: int) -> tuple:
+    """The JSON body of one page of archived tasks and the cursor of the next one."""
+    rows, cursor = next_cursor(conn.execute(ARCHIVED_TASKS_QUERY, (project_id, after, limit + 1)).fetchall(), limit)
+    users = {}
+    # Same shape as GET /tasks, plus the time the task was archived
+    return dump_json([{**format_project_task(row[:12], users), "archivedDate": row[12]} for row in rows]), cursor
+
+
+@router.get("/projects/{project_id}/archived-tasks", response_model=List[ArchivedTask])
+async def get_archived_tasks(
+    project_id: int,
+    response: Response,
+    limit: int = Query(MAX_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    db: AsyncConnection = Depends(get_read_db),
+):
+    """Tasks of a project moved to the archive, oldest id first; GET /tasks only returns the others."""
+    after_id = decode_cursor(after) if after else 0
+    body, cursor = await db.run(_render_archived, project_id, after_id, limit)
+    if cursor:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
+    return Response(body, media_type="application/json", headers=dict(response.headers))
+
+
+@router.post("/tasks/{task_id}/restore")
+async def restore_archived_task(task_id: int, db: AsyncConnection = Depends(get_db)):
+    try:
+        fields = await db.transaction(restore_task, task_id)
+    except sqlite3.IntegrityError:
+        # Only a database written around the API can have the id in both tables
+        raise HTTPException(status_code=409, detail="A task with this ID is already on a board")
+    if fields is None:
+        raise HTTPException(status_code=404, detail="Archived task not found")
+    _notify([(fields["project_id"], CREATED, task_id, fields)])
+    return {"message": f"Task with ID {task_id} restored", "task": fields}
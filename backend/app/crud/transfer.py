@@ -0,0 +1,68 @@
+from fastapi import APIRouter, HTTPException, Query, Request
+from typing import Optional
+from app.database import connect, run_blocking
+from app.streaming import csv_response, ndjson_response
+from app.transfer import COLUMNS, CSV, ENTITIES, NDJSON, Importer, InvalidUpload, insert_chunk, iter_records, iter_rows, notify
+from app.utils.logger import logger
+
+router = APIRouter()
+
+# Import and export of whole tables in constant memory, for onboarding and dumps
+
+FORMAT_PATTERN = f"^({NDJSON}|{CSV})$"
+
+
+def _check_entity(entity: str):
+    if entity not in ENTITIES:
+        raise HTTPException(status_code=404, detail=f"Unknown entity, expected one of {', '.join(ENTITIES)}")
+
+
+@router.post("/import/{entity}")
+async def import_entity(
+    entity: str,
+    request: Request,
+    format: Optional[str] = Query(None, pattern=FORMAT_PATTERN),
+    new_ids: bool = False,
+):
+    """
+    Import projects, tasks or memberships from an NDJSON or CSV upload.
+
+    The body is parsed as it arrives and inserted in chunks, one transaction
+    each: the valid rows are kept even when others fail. The format is taken
+    from `format`, else from the Content-Type (text/csv), else NDJSON.
+
+    Ids of the upload are kept, and a row whose id is in use fails. With
+    `new_ids` they are dropped and every row gets a new one, to copy rows
+    into a database that has them; project and user ids are kept as given.
+    """
+    _check_entity(entity)
+    if format is None:
+        format = CSV if "csv" in request.headers.get("content-type", "") else NDJSON
+    importer = Importer(entity, format, new_ids=new_ids)
+
+    async def write(chunks: list):
+        for chunk in chunks:
+            # A connection is only borrowed for one chunk, not for the length of the upload
+            async with connect() as db:
+                inserted, errors = await db.transaction(insert_chunk, entity, chunk)
+            importer.done(inserted, errors)
+            notify(entity, inserted)
+
+    try:
+        async for data in request.stream():
+            await write(await run_blocking(importer.feed, data))
+        await write(await run_blocking(importer.finish))
+    except InvalidUpload as e:
+        raise HTTPException(status_code=400, detail={"message": str(e), "imported": importer.imported})
+    logger.info(f"Imported {importer.imported} {entity}, {importer.failed} rows failed")
+    return {"imported": importer.imported, "failed": importer.failed, "errors": importer.errors}
+
+
+@router.get("/export/{entity}")
+async def export_entity(entity: str, format: str = Query(NDJSON, pattern=FORMAT_PATTERN)):
+    """Stream every project, task (archived ones included) or membership, in the columns the import takes."""
+    _check_entity(entity)
+    headers = {"Content-Disposition": f'attachment; filename="{entity}.{format}"'}
+    if format == CSV:
+        return csv_response(iter_rows, COLUMNS[entity], entity, headers=headers)
+    return ndjson_response(iter_records, entity, headers=headers)
@@ -1,5 +1,8 @@
-from fastapi import APIRouter, HTTPException
-from app.database import cursor, conn
+from fastapi import APIRouter, Depends, HTTPException
+from app.cache import board_cache
+from app.changelog import MEMBER, record_change
+from app.database import AsyncConnection, get_db
+from app.events import DELETED
 from app.models import Task
 from datetime import datetime
 from app.utils.logger import logger
@@ -7,24 +10,27 @@ from app.utils.logger import logger
 router = APIRouter()
 
 @router.delete("/projects/{project_id}/users/{user_id}")
-async def remove_user_from_project(project_id: int, user_id: int):
+async def remove_user_from_project(project_id: int, user_id: int, db: AsyncConnection = Depends(get_db)):
     try:
         # Check if the user is part of the project
-        cursor.execute("""
+        user_project = await db.fetchone("""
             SELECT * FROM user_projects
             WHERE project_id = ? AND user_id = ?
         """, (project_id, user_id))
-        user_project = cursor.fetchone()
 
         if not user_project:
             raise HTTPException(status_code=404, detail="User is not part of the project")
 
-        # Remove the user from the project
-        cursor.execute("""
-            DELETE FROM user_projects
-            WHERE project_id = ? AND user_id = ?
-        """, (project_id, user_id))
-        conn.commit()
+        def write(conn):
+            # Remove the user from the project
+            conn.execute("""
+                DELETE FROM user_projects
+                WHERE project_id = ? AND user_id = ?
+            """, (project_id, user_id))
+            record_change(conn, project_id, MEMBER, user_id, DELETED)
+
+        await db.transaction(write)
+        board_cache.invalidate(project_id)
 
         return {"message": f"User {user_id} removed from project {project_id}"}
     except Exception as e:
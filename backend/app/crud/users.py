@@ -1,20 +1,33 @@
-from fastapi import APIRouter, HTTPException
-from app.database import cursor, conn
-from app.auth.security import hash_password, verify_password
+from fastapi import APIRouter, Depends, HTTPException
+from app.database import AsyncConnection, connect, get_read_db
+from app.auth.security import hash_password_async, verify_and_update_async
 from app.auth.jwt_handler import create_access_token
 from app.models import RegisterRequest, LoginRequest
 from app.utils.logger import logger
 
 router = APIRouter()
 
+# Projects the user is a member of
+USER_PROJECTS_QUERY = "SELECT * FROM projects WHERE id IN (SELECT project_id FROM user_projects WHERE user_id = ?)"
+
+# Members of every project the user belongs to
+TEAM_MEMBERS_QUERY = """
+    SELECT u.id, u.username FROM users u
+    JOIN user_projects pu ON u.id = pu.user_id
+    WHERE pu.project_id IN (SELECT project_id FROM user_projects WHERE user_id = ?)
+"""
+
+# bcrypt runs in the auth process pool, and connections are only borrowed around
+# the queries, so a burst of logins neither blocks the loop nor drains the pools.
+
 @router.post("/register/")
 async def register_user(request: RegisterRequest):
     username = request.username
     password = request.password
-    hashed_password = hash_password(password)
+    hashed_password = await hash_password_async(password)
     try:
-        cursor.execute("INSERT INTO users (username, password) VALUES (?, ?)", (username, hashed_password))
-        conn.commit()
+        async with connect() as db:
+            await db.transaction(lambda conn: conn.execute("INSERT INTO users (username, password) VALUES (?, ?)", (username, hashed_password)))
     except Exception:
         logger.warning(f"Failed register attempt for {username}")
         raise HTTPException(status_code=400, detail="Username already exists")
@@ -25,37 +38,36 @@ async def register_user(request: RegisterRequest):
 async def login_user(request: LoginRequest):
     username = request.username
     password = request.password
-    cursor.execute("SELECT id, password FROM users WHERE username = ?", (username,))
-    user = cursor.fetchone()
-    if not user or not verify_password(password, user[1]):
+    async with connect(read_only=True) as db:
+        user = await db.fetchone("SELECT id, password FROM users WHERE username = ?", (username,))
+    verified, new_hash = await verify_and_update_async(password, user[1]) if user else (False, None)
+    if not verified:
         logger.warning(f"Failed login for {username}")
         raise HTTPException(status_code=401, detail="Invalid username or password")
-    
+    if new_hash:
+        # The work factor changed since this password was hashed: store it with the current one
+        async with connect() as db:
+            await db.transaction(lambda conn: conn.execute("UPDATE users SET password = ? WHERE id = ? AND password = ?", (new_hash, user[0], user[1])))
+        logger.info(f"Rehashed password of {username}")
+
     token = create_access_token({"sub": user[0], "username": username})
     return {"token": token}
 
 @router.get("/users/")
-async def get_all_users():
-    cursor.execute("SELECT id, username FROM users")
-    users = cursor.fetchall()
+async def get_all_users(db: AsyncConnection = Depends(get_read_db)):
+    users = await db.fetchall("SELECT id, username FROM users")
     return {"users": [{"id": user["id"], "username": user["username"]} for user in users]}
 
 @router.get("/user-data/")
-async def get_user_data(user_id: int):
+async def get_user_data(user_id: int, db: AsyncConnection = Depends(get_read_db)):
     try:
         logger.info(f"Fetching data for user_id: {user_id}")
 
         # Récupérer les projets de l'utilisateur
-        cursor.execute("SELECT * FROM projects WHERE id IN (SELECT project_id FROM user_projects WHERE user_id = ?)", (user_id,))
-        projects = cursor.fetchall()
+        projects = await db.fetchall(USER_PROJECTS_QUERY, (user_id,))
 
         # Récupérer les membres de l'équipe
-        cursor.execute("""
-            SELECT u.id, u.username FROM users u
-            JOIN user_projects pu ON u.id = pu.user_id
-            WHERE pu.project_id IN (SELECT project_id FROM user_projects WHERE user_id = ?)
-        """, (user_id,))
-        team_members = cursor.fetchall()
+        team_members = await db.fetchall(TEAM_MEMBERS_QUERY, (user_id,))
 
         return {
             "projects": [{"id": p[0], "name": p[1], "description": p[2]} for p in projects],
@@ -1,15 +1,365 @@
+import asyncio
+import contextvars
+import functools
 import os
+import queue
 import sqlite3
+import threading
+import time
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+from app.config import (
+    DB_PATH, GROUP_COMMIT, GROUP_COMMIT_MAX_BATCH, GROUP_COMMIT_MAX_DELAY, MEMORY_DB, MEMORY_DB_URI, POOL_SIZE, POOL_TIMEOUT,
+    PRAGMAS,
+)
+from app.migrations import migrate
+from app.metrics import METRICS, MeteredConnection
 
-# Ensure the "data" folder exists
-os.makedirs("data", exist_ok=True)
 
-# Initialize SQLite
-conn = sqlite3.connect("data/taskflow.db", check_same_thread=False)
-conn.row_factory = sqlite3.Row
-cursor = conn.cursor()
+def _connect(path: str, read_only: bool = False) -> sqlite3.Connection:
+    """
+    Open a SQLite connection configured for concurrent use.
 
-def create_tables():
+    Args:
+        path (str): Path to the database file, or MEMORY_DB.
+        read_only (bool): Open the file in read-only mode (used for GET routes).
+
+    Returns:
+        sqlite3.Connection: A connection returning sqlite3.Row objects.
+    """
+    # Metered connections count and time every statement for /metrics
+    factory = MeteredConnection if METRICS else sqlite3.Connection
+    if path == MEMORY_DB:
+        # No WAL in memory, and mode=ro cannot be combined with mode=memory: query_only guards the reads below
+        conn = sqlite3.connect(MEMORY_DB_URI, uri=True, check_same_thread=False, factory=factory)
+        # Shared-cache connections lock each other out with table locks, which fail at once and
+        # ignore busy_timeout. Readers skip the read locks, at the cost of seeing uncommitted rows,
+        # and the write pool holds one connection so writers wait for it instead (see below)
+        conn.execute("PRAGMA read_uncommitted=ON")
+    elif read_only:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False, factory=factory)
+    else:
+        conn = sqlite3.connect(path, check_same_thread=False, factory=factory)
+        # WAL lets readers run in parallel with the single writer
+        conn.execute("PRAGMA journal_mode=WAL")
+    conn.row_factory = sqlite3.Row
+    for name, value in PRAGMAS.items():
+        conn.execute(f"PRAGMA {name}={value}")
+    if read_only:
+        conn.execute("PRAGMA query_only=ON")
+    return conn
+
+
+class ConnectionPool:
+    """
+    A bounded pool of SQLite connections.
+
+    Connections are opened lazily up to `size` and handed out one per request,
+    so concurrent requests never share a cursor.
+    """
+
+    def __init__(self, path: str, size: int = POOL_SIZE, read_only: bool = False, timeout: float = POOL_TIMEOUT):
+        self.path = path
+        self.size = size
+        self.read_only = read_only
+        self.timeout = timeout
+        self._idle = queue.LifoQueue(maxsize=size)
+        # Semaphore-like counter of connections still allowed to be opened
+        self._slots = queue.Queue(maxsize=size)
+        for _ in range(size):
+            self._slots.put_nowait(None)
+
+    def acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            self._slots.get_nowait()
+        except queue.Empty:
+            # Pool is full, wait for another request to give a connection back
+            try:
+                return self._idle.get(timeout=self.timeout)
+            except queue.Empty:
+                raise TimeoutError("Timed out waiting for a database connection")
+        try:
+            return _connect(self.path, read_only=self.read_only)
+        except Exception:
+            self._slots.put_nowait(None)
+            raise
+
+    def release(self, conn: sqlite3.Connection):
+        # Never hand out a connection with a half-finished transaction
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put_nowait(conn)
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self):
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            self._slots.put_nowait(None)
+
+
+# One writer connection in memory: a second one would fail on the first one's table locks, not wait
+pool = ConnectionPool(DB_PATH, size=1 if DB_PATH == MEMORY_DB else POOL_SIZE)
+read_pool = ConnectionPool(DB_PATH, read_only=True)
+
+# Every blocking SQLite call runs on this executor, never on the event loop.
+# One worker per pooled connection, so a request holding a connection always has a thread to run on.
+executor = ThreadPoolExecutor(max_workers=pool.size + read_pool.size, thread_name_prefix="taskflow-db")
+
+
+async def run_blocking(fn, *args, **kwargs):
+    """Run a blocking function on the database executor and await its result."""
+    loop = asyncio.get_running_loop()
+    # Copy the context so request-scoped context variables are visible in the worker thread
+    call = functools.partial(contextvars.copy_context().run, fn, *args, **kwargs)
+    return await loop.run_in_executor(executor, call)
+
+
+class GroupCommitWriter:
+    """
+    Single writer thread that commits the transactions of many requests together.
+
+    Transactions arriving within `max_delay` of each other, up to `max_batch`, run
+    in one SQLite transaction and share its commit (and its fsync). Each one runs
+    inside its own savepoint, so a transaction that raises is rolled back alone and
+    only its caller sees the error.
+    """
+
+    def __init__(self, path: str, max_batch: int = GROUP_COMMIT_MAX_BATCH, max_delay: float = GROUP_COMMIT_MAX_DELAY):
+        self.path = path
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue = queue.Queue()
+        self._thread = None
+        # Commits made and transactions they carried, to see how well writes are grouped
+        self.batches = 0
+        self.transactions = 0
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args) -> Future:
+        """Queue `fn(conn, *args)`; the future resolves once the batch holding it is committed."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="taskflow-writer", daemon=True)
+                self._thread.start()
+        future = Future()
+        # Run in the caller's context, like run_blocking does
+        self._queue.put((contextvars.copy_context(), fn, args, future))
+        return future
+
+    async def run(self, fn, *args):
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def _next_batch(self) -> list:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_delay
+        while batch[-1] is not None and len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        conn = _connect(self.path)
+        try:
+            while True:
+                batch = self._next_batch()
+                stop = batch[-1] is None
+                self._commit([item for item in batch if item is not None], conn)
+                if stop:
+                    return
+        finally:
+            conn.close()
+
+    def _commit(self, batch: list, conn: sqlite3.Connection):
+        if not batch:
+            return
+        outcomes = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for context, fn, args, future in batch:
+                conn.execute("SAVEPOINT group_write")
+                try:
+                    outcomes.append((future, context.run(fn, conn, *args), None))
+                    conn.execute("RELEASE group_write")
+                except Exception as e:
+                    conn.execute("ROLLBACK TO group_write")
+                    conn.execute("RELEASE group_write")
+                    outcomes.append((future, None, e))
+            conn.commit()
+            self.batches += 1
+            self.transactions += len(batch)
+        except BaseException as e:
+            # Nothing of the batch was committed: every caller gets the error
+            if conn.in_transaction:
+                conn.rollback()
+            for _, _, _, future in batch:
+                future.set_exception(e)
+            return
+        for future, result, error in outcomes:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+    def close(self):
+        """Commit what is queued, then stop the writer thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+
+
+class AsyncConnection:
+    """
+    Async facade over a pooled sqlite3 connection.
+
+    Each method hops to the database executor, so a slow query only occupies
+    a worker thread while the event loop keeps serving other requests and sockets.
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    async def run(self, fn, *args):
+        """Run `fn(conn, *args)` on the executor; use it to batch several statements in one hop."""
+        return await run_blocking(fn, self.conn, *args)
+
+    async def fetchall(self, sql: str, params=()) -> list:
+        return await run_blocking(lambda: self.conn.execute(sql, params).fetchall())
+
+    async def fetchone(self, sql: str, params=()):
+        return await run_blocking(lambda: self.conn.execute(sql, params).fetchone())
+
+    async def transaction(self, fn, *args):
+        """
+        Run `fn(conn, *args)` and commit, or roll back if it raises.
+
+        The transaction opens with BEGIN IMMEDIATE, before `fn` runs: what `fn`
+        reads cannot change under it, as no other write can start until the commit.
+        With group commit on, `fn` runs on the writer's connection instead, batched
+        with other transactions; it must not commit or roll back by itself.
+        """
+        if group_writer is not None:
+            return await group_writer.run(fn, *args)
+
+        def call():
+            # sqlite3 would only begin at the first write, leaving the reads before it outside the transaction
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(self.conn, *args)
+                self.conn.commit()
+                return result
+            except BaseException:
+                self.conn.rollback()
+                raise
+        return await run_blocking(call)
+
+
+group_writer = GroupCommitWriter(DB_PATH) if GROUP_COMMIT else None
+
+
+# Per event loop gates keeping the number of waiting requests off the executor threads
+_gates = weakref.WeakKeyDictionary()
+
+
+def _gate(db_pool: ConnectionPool) -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    gates = _gates.setdefault(loop, {})
+    if db_pool not in gates:
+        gates[db_pool] = asyncio.Semaphore(db_pool.size)
+    return gates[db_pool]
+
+
+_init_lock = threading.Lock()
+_initialized = False
+# Open connection keeping the shared in-memory database alive between requests
+_memory_keeper = None
+
+
+def init_db():
+    """
+    Create the data directory and the schema of the database behind `pool`.
+
+    Called when the application starts, and by connect() if it never did (a
+    TestClient used without a with block); only the first call does the work.
+    """
+    global _initialized, _memory_keeper
+    if _initialized:
+        return
+    with _init_lock:
+        if _initialized:
+            return
+        if pool.path == MEMORY_DB:
+            # An in-memory database is dropped with its last connection, the pools may close theirs
+            _memory_keeper = _connect(pool.path)
+        elif os.path.dirname(pool.path):
+            os.makedirs(os.path.dirname(pool.path), exist_ok=True)
+        create_tables()
+        _initialized = True
+
+
+def close_db():
+    """Commit what the group writer holds and close the pooled connections; they reopen on demand."""
+    if group_writer is not None:
+        group_writer.close()
+    pool.close()
+    read_pool.close()
+
+
+@asynccontextmanager
+async def connect(read_only: bool = False):
+    """Borrow a pooled connection wrapped in an AsyncConnection."""
+    if not _initialized:
+        await run_blocking(init_db)
+    db_pool = read_pool if read_only else pool
+    # Wait for a free slot on the loop so executor threads never block inside acquire()
+    async with _gate(db_pool):
+        conn = await run_blocking(db_pool.acquire)
+        try:
+            yield AsyncConnection(conn)
+        finally:
+            await run_blocking(db_pool.release, conn)
+
+
+async def get_db():
+    """FastAPI dependency yielding a read-write connection for the duration of a request."""
+    async with connect() as db:
+        yield db
+
+
+async def get_read_db():
+    """FastAPI dependency yielding a read-only connection for the duration of a request."""
+    async with connect(read_only=True) as db:
+        yield db
+
+
+def create_tables(conn: sqlite3.Connection = None):
+    if conn is None:
+        with pool.connection() as conn:
+            return create_tables(conn)
+
+    cursor = conn.cursor()
     cursor.execute("""
     CREATE TABLE IF NOT EXISTS users (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -17,7 +367,7 @@ def create_tables():
         password TEXT NOT NULL
     )
     """)
-    
+
     cursor.execute("""
     CREATE TABLE IF NOT EXISTS projects (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -25,7 +375,7 @@ def create_tables():
         description TEXT
     )
     """)
-    
+
     cursor.execute("""
     CREATE TABLE IF NOT EXISTS tasks (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -53,3 +403,6 @@ def create_tables():
     )
     """)
     conn.commit()
+
+    # Indexes and later schema changes are versioned migrations
+    migrate(conn)
@@ -0,0 +1,83 @@
+import asyncio
+from collections import OrderedDict
+from typing import Dict, Optional
+from app.utils.logger import logger
+from app.websocket_manager import manager
+
+# Seconds during which events of one project are batched into a single frame
+COALESCE_WINDOW = 0.05
+
+# Frame type sent to board viewers
+TASK_EVENTS = "task_events"
+
+CREATED = "created"
+UPDATED = "updated"
+DELETED = "deleted"
+
+
+def _merge(previous: Optional[dict], event: dict) -> Optional[dict]:
+    """Fold a new event for a task into the pending one. None means nothing is left to send."""
+    if previous is None:
+        return event
+    if event["op"] == DELETED:
+        # A task created and deleted inside one window was never seen by anyone
+        return None if previous["op"] == CREATED else event
+    if event["op"] == UPDATED and previous["op"] in (CREATED, UPDATED):
+        return {**previous, "fields": {**previous["fields"], **event["fields"]}}
+    return event
+
+
+class EventBus:
+    """
+    Batches task change events per project and publishes one frame per window.
+
+    Events for the same task inside a window are merged, so a burst of drags on a
+    card reaches viewers as a single update carrying only the fields that changed.
+    """
+
+    def __init__(self, publish, window: float = COALESCE_WINDOW):
+        """
+        Args:
+            publish (callable): Coroutine function called as publish(frame, project_id).
+            window (float): Seconds to wait for more events before flushing a project.
+        """
+        self.publish = publish
+        self.window = window
+        self.pending: Dict[int, OrderedDict] = {}
+        self._flushers: Dict[int, asyncio.Task] = {}
+
+    def emit(self, project_id: int, op: str, task_id: int, fields: dict = None):
+        """Queue a change event; must be called from the event loop after the write committed."""
+        event = {"op": op, "id": task_id}
+        if op != DELETED:
+            event["fields"] = fields or {}
+        events = self.pending.setdefault(project_id, OrderedDict())
+        merged = _merge(events.pop(task_id, None), event)
+        if merged is not None:
+            events[task_id] = merged
+        if project_id not in self._flushers:
+            self._flushers[project_id] = asyncio.create_task(self._flush_later(project_id))
+
+    async def _flush_later(self, project_id: int):
+        await asyncio.sleep(self.window)
+        await self.flush(project_id)
+
+    async def flush(self, project_id: int):
+        """Publish the pending events of a project now."""
+        self._flushers.pop(project_id, None)
+        events = self.pending.pop(project_id, None)
+        if not events:
+            return
+        frame = {"type": TASK_EVENTS, "project_id": project_id, "events": list(events.values())}
+        try:
+            await self.publish(frame, project_id)
+        except Exception as e:
+            logger.error(f"Error publishing events for project {project_id}: {e}")
+
+
+def changed_fields(old, new: dict) -> dict:
+    """Return the entries of `new` whose value differs from the `old` row."""
+    return {name: value for name, value in new.items() if old is None or old[name] != value}
+
+
+event_bus = EventBus(manager.broadcast)
@@ -0,0 +1,287 @@
+import contextvars
+import os
+import re
+import sqlite3
+import threading
+import time
+from bisect import bisect_left
+from app.utils.logger import logger
+
+# Set TASKFLOW_METRICS=off to serve without the middleware and the metered connections
+METRICS = os.getenv("TASKFLOW_METRICS", "on") == "on"
+# Statements slower than this are logged with the shape of their parameters
+SLOW_QUERY_MS = float(os.getenv("TASKFLOW_SLOW_QUERY_MS", 100))
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+RECIPIENT_BUCKETS = (0, 1, 10, 100, 1000, 10000)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        # A metric without labels is exposed from the start, as 0
+        self._series = {} if labels else {(): self._zero()}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _zero(self):
+        return 0
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            series = sorted(self._series.items(), key=lambda item: tuple(map(str, item[0])))
+        for values, value in series:
+            lines.extend(self._samples(values, value))
+        return lines
+
+    def _samples(self, values: tuple, value) -> list:
+        return [f"{self.name}{_labels(self.labels, values)} {value}"]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, *values, amount: float = 1):
+        with self._lock:
+            self._series[values] = self._series.get(values, 0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value: float, *values):
+        with self._lock:
+            self._series[values] = value
+
+    def inc(self, *values, amount: float = 1):
+        with self._lock:
+            self._series[values] = self._series.get(values, 0) + amount
+
+    def dec(self, *values, amount: float = 1):
+        self.inc(*values, amount=-amount)
+
+
+class Histogram(Metric):
+    """Counts per bucket (not cumulative until rendered), then the sum and the count."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.buckets = buckets
+        super().__init__(name, help, labels)
+
+    def _zero(self):
+        return [0] * (len(self.buckets) + 3)
+
+    def observe(self, value: float, *values):
+        # A value equal to a bound belongs to that bucket (le), bisect_left finds it
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(values)
+            if series is None:
+                series = self._series[values] = self._zero()
+            series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def _samples(self, values: tuple, series: list) -> list:
+        lines = []
+        cumulative = 0
+        for bound, count in zip((*self.buckets, "+Inf"), series):
+            cumulative += count
+            le = f'le="{bound}"'
+            lines.append(f"{self.name}_bucket{_labels(self.labels, values, le)} {cumulative}")
+        lines.append(f"{self.name}_sum{_labels(self.labels, values)} {series[-2]}")
+        lines.append(f"{self.name}_count{_labels(self.labels, values)} {series[-1]}")
+        return lines
+
+
+REGISTRY = []
+# Functions returning (name, kind, help, [(labels dict, value)]) for values owned by other modules
+COLLECTORS = []
+
+
+def register_collector(collect):
+    COLLECTORS.append(collect)
+    return collect
+
+
+def render() -> str:
+    """Every metric in the Prometheus text exposition format (version 0.0.4)."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    for collect in COLLECTORS:
+        for name, kind, help, samples in collect():
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{name}{_labels(tuple(labels), tuple(labels.values()))} {value}")
+    return "\n".join(lines) + "\n"
+
+
+HTTP_REQUESTS = Counter("taskflow_http_requests_total", "HTTP requests by route and status.", ("method", "route", "status"))
+HTTP_DURATION = Histogram("taskflow_http_request_duration_seconds", "HTTP request latency by route.", ("method", "route"))
+HTTP_STATEMENTS = Histogram(
+    "taskflow_http_request_sql_statements", "SQL statements run by one HTTP request.", ("method", "route"), STATEMENT_BUCKETS
+)
+HTTP_SQL_SECONDS = Histogram("taskflow_http_request_sql_seconds", "Time one HTTP request spent executing SQL.", ("method", "route"))
+SQL_DURATION = Histogram("taskflow_sql_statement_duration_seconds", "SQL statement execution time by statement kind.", ("kind",))
+SLOW_QUERIES = Counter("taskflow_sql_slow_statements_total", "SQL statements slower than TASKFLOW_SLOW_QUERY_MS.", ("kind",))
+WEBSOCKET_CONNECTIONS = Gauge("taskflow_websocket_connections", "Open WebSocket connections.")
+WEBSOCKET_FANOUT = Histogram("taskflow_websocket_fanout_seconds", "Time to queue one broadcast for every local socket of its room.")
+WEBSOCKET_RECIPIENTS = Histogram(
+    "taskflow_websocket_fanout_recipients", "Local sockets one broadcast was queued for.", (), RECIPIENT_BUCKETS
+)
+WEBSOCKET_DROPPED = Counter("taskflow_websocket_dropped_messages_total", "Messages dropped from the queue of a slow socket.")
+WEBSOCKET_SLOW_DISCONNECTS = Counter("taskflow_websocket_slow_disconnects_total", "Sockets disconnected for being too slow.")
+
+
+class RequestStats:
+    """SQL run on behalf of one request; the executor copies the context, so worker threads add to it."""
+
+    __slots__ = ("scope", "statements", "sql_seconds")
+
+    def __init__(self, scope: dict):
+        self.scope = scope
+        self.statements = 0
+        self.sql_seconds = 0.0
+
+    @property
+    def route(self) -> str:
+        # The router stores the matched route in the scope
+        route = self.scope.get("route")
+        return route.path if route is not None else "unmatched"
+
+
+_request_stats: contextvars.ContextVar = contextvars.ContextVar("request_stats", default=None)
+
+
+def _shape(value) -> str:
+    """Type (and size) of a parameter, never its value: parameters can be passwords."""
+    if value is None:
+        return "None"
+    if isinstance(value, (str, bytes)):
+        return f"{type(value).__name__}[{len(value)}]"
+    return type(value).__name__
+
+
+def parameters_shape(parameters) -> str:
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{name}: {_shape(value)}" for name, value in parameters.items()) + "}"
+    return "(" + ", ".join(_shape(value) for value in parameters) + ")"
+
+
+_SPACES = re.compile(r"\s+")
+
+
+def _kind(sql: str) -> str:
+    words = sql.split(None, 1)
+    return words[0].upper() if words else ""
+
+
+def _many_shape(seq_of_parameters) -> str:
+    return f"{len(seq_of_parameters)} x {parameters_shape(seq_of_parameters[0]) if seq_of_parameters else '()'}"
+
+
+def record_statement(sql: str, seconds: float, parameters, many: bool = False):
+    """Account one statement to its request and the histograms; parameters are only described when it is slow."""
+    kind = _kind(sql)
+    SQL_DURATION.observe(seconds, kind)
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.sql_seconds += seconds
+    if seconds * 1000 >= SLOW_QUERY_MS:
+        SLOW_QUERIES.inc(kind)
+        route = stats.route if stats is not None else "-"
+        logger.warning(f"Slow query {seconds * 1000:.1f} ms on {route}: {_SPACES.sub(' ', sql).strip()} parameters {_many_shape(parameters) if many else parameters_shape(parameters)}")
+
+
+class MeteredCursor(sqlite3.Cursor):
+    """Times execute() and executemany(); the time includes stepping to the first row, not fetching the rest."""
+
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            record_statement(sql, time.perf_counter() - started, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        if not isinstance(seq_of_parameters, (list, tuple)):
+            # Materialize generators so the slow query log can describe them
+            seq_of_parameters = list(seq_of_parameters)
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            record_statement(sql, time.perf_counter() - started, seq_of_parameters, many=True)
+
+
+class MeteredConnection(sqlite3.Connection):
+    """sqlite3.Connection whose statements are accounted by MeteredCursor; pass as sqlite3.connect(factory=...)."""
+
+    def cursor(self, factory=MeteredCursor):
+        return super().cursor(factory)
+
+    # sqlite3.Connection.execute does not go through cursor(), so route it there
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording the latency, status and SQL of every HTTP request.
+
+    Requests are labelled with their route template (/tasks/{task_id}), never
+    the raw path, so the number of series stays bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        stats = RequestStats(scope)
+        token = _request_stats.set(stats)
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            _request_stats.reset(token)
+            path, method = stats.route, scope["method"]
+            HTTP_REQUESTS.inc(method, path, status)
+            HTTP_DURATION.observe(elapsed, method, path)
+            HTTP_STATEMENTS.observe(stats.statements, method, path)
+            HTTP_SQL_SECONDS.observe(stats.sql_seconds, method, path)
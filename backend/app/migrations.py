@@ -0,0 +1,231 @@
+import sqlite3
+from app.utils.logger import logger
+
+# Ordered schema migrations: (version, description, statements).
+# The applied version is stored in the database with PRAGMA user_version.
+# Never edit a released migration, append a new one instead.
+MIGRATIONS = [
+    (1, "index tasks by project, assignee and creator", [
+        "CREATE INDEX IF NOT EXISTS idx_tasks_project_id ON tasks (project_id)",
+        "CREATE INDEX IF NOT EXISTS idx_tasks_assigned_user_id ON tasks (assigned_user_id)",
+        "CREATE INDEX IF NOT EXISTS idx_tasks_created_by ON tasks (created_by)",
+    ]),
+    (2, "covering index for project members", [
+        "CREATE INDEX IF NOT EXISTS idx_user_projects_project_id ON user_projects (project_id, user_id)",
+    ]),
+    (3, "indexes for task filters within a project", [
+        "CREATE INDEX IF NOT EXISTS idx_tasks_project_status ON tasks (project_id, status)",
+        "CREATE INDEX IF NOT EXISTS idx_tasks_project_assigned_user ON tasks (project_id, assigned_user_id)",
+        "CREATE INDEX IF NOT EXISTS idx_tasks_project_created_by ON tasks (project_id, created_by)",
+        "CREATE INDEX IF NOT EXISTS idx_tasks_project_modified_date ON tasks (project_id, modified_date)",
+    ]),
+    (4, "change log for delta sync", [
+        """
+        CREATE TABLE IF NOT EXISTS changes (
+            version INTEGER PRIMARY KEY AUTOINCREMENT,
+            project_id INTEGER NOT NULL,
+            entity TEXT NOT NULL,
+            entity_id INTEGER NOT NULL,
+            op TEXT NOT NULL,
+            data TEXT,
+            changed_at TEXT NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_changes_project_version ON changes (project_id, version)",
+    ]),
+    (5, "latest change log version of each project", [
+        """
+        CREATE TABLE IF NOT EXISTS project_versions (
+            project_id INTEGER PRIMARY KEY,
+            version INTEGER NOT NULL
+        )
+        """,
+        """
+        INSERT OR REPLACE INTO project_versions (project_id, version)
+        SELECT project_id, MAX(version) FROM changes GROUP BY project_id
+        """,
+        # Kept in the same transaction as the change, whoever writes it
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_changes_project_version AFTER INSERT ON changes
+        BEGIN
+            INSERT INTO project_versions (project_id, version) VALUES (NEW.project_id, NEW.version)
+            ON CONFLICT (project_id) DO UPDATE SET version = excluded.version;
+        END
+        """,
+    ]),
+    (6, "row version of tasks for optimistic concurrency", [
+        "ALTER TABLE tasks ADD COLUMN version INTEGER NOT NULL DEFAULT 1",
+    ]),
+    (7, "full-text index over task titles and descriptions", [
+        # External content: the index stores no copy of the text, it reads it back from tasks
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+            title, description,
+            content = 'tasks', content_rowid = 'id',
+            tokenize = 'unicode61 remove_diacritics 2'
+        )
+        """,
+        "INSERT INTO tasks_fts (tasks_fts) VALUES ('rebuild')",
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_tasks_fts_insert AFTER INSERT ON tasks
+        BEGIN
+            INSERT INTO tasks_fts (rowid, title, description) VALUES (NEW.id, NEW.title, NEW.description);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_tasks_fts_delete AFTER DELETE ON tasks
+        BEGIN
+            INSERT INTO tasks_fts (tasks_fts, rowid, title, description) VALUES ('delete', OLD.id, OLD.title, OLD.description);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_tasks_fts_update AFTER UPDATE OF title, description ON tasks
+        BEGIN
+            INSERT INTO tasks_fts (tasks_fts, rowid, title, description) VALUES ('delete', OLD.id, OLD.title, OLD.description);
+            INSERT INTO tasks_fts (rowid, title, description) VALUES (NEW.id, NEW.title, NEW.description);
+        END
+        """,
+    ]),
+    (8, "task counters per project and status, and per assignee and status", [
+        # A NULL status is counted under ''
+        """
+        CREATE TABLE IF NOT EXISTS project_task_counts (
+            project_id INTEGER NOT NULL,
+            status TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (project_id, status)
+        ) WITHOUT ROWID
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS user_task_counts (
+            user_id INTEGER NOT NULL,
+            status TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (user_id, status)
+        ) WITHOUT ROWID
+        """,
+        """
+        INSERT INTO project_task_counts (project_id, status, count)
+        SELECT project_id, COALESCE(status, ''), COUNT(*) FROM tasks GROUP BY 1, 2
+        """,
+        """
+        INSERT INTO user_task_counts (user_id, status, count)
+        SELECT assigned_user_id, COALESCE(status, ''), COUNT(*) FROM tasks WHERE assigned_user_id IS NOT NULL GROUP BY 1, 2
+        """,
+        # Maintained in the transaction of every task write, whichever code path makes it
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_task_counts_insert AFTER INSERT ON tasks
+        BEGIN
+            INSERT INTO project_task_counts (project_id, status, count) VALUES (NEW.project_id, COALESCE(NEW.status, ''), 1)
+            ON CONFLICT (project_id, status) DO UPDATE SET count = count + 1;
+            INSERT INTO user_task_counts (user_id, status, count)
+            SELECT NEW.assigned_user_id, COALESCE(NEW.status, ''), 1 WHERE NEW.assigned_user_id IS NOT NULL
+            ON CONFLICT (user_id, status) DO UPDATE SET count = count + 1;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_task_counts_delete AFTER DELETE ON tasks
+        BEGIN
+            UPDATE project_task_counts SET count = count - 1 WHERE project_id = OLD.project_id AND status = COALESCE(OLD.status, '');
+            UPDATE user_task_counts SET count = count - 1 WHERE user_id = OLD.assigned_user_id AND status = COALESCE(OLD.status, '');
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_task_counts_update AFTER UPDATE OF project_id, status, assigned_user_id ON tasks
+        WHEN OLD.project_id IS NOT NEW.project_id OR OLD.status IS NOT NEW.status OR OLD.assigned_user_id IS NOT NEW.assigned_user_id
+        BEGIN
+            UPDATE project_task_counts SET count = count - 1 WHERE project_id = OLD.project_id AND status = COALESCE(OLD.status, '');
+            UPDATE user_task_counts SET count = count - 1 WHERE user_id = OLD.assigned_user_id AND status = COALESCE(OLD.status, '');
+            INSERT INTO project_task_counts (project_id, status, count) VALUES (NEW.project_id, COALESCE(NEW.status, ''), 1)
+            ON CONFLICT (project_id, status) DO UPDATE SET count = count + 1;
+            INSERT INTO user_task_counts (user_id, status, count)
+            SELECT NEW.assigned_user_id, COALESCE(NEW.status, ''), 1 WHERE NEW.assigned_user_id IS NOT NULL
+            ON CONFLICT (user_id, status) DO UPDATE SET count = count + 1;
+        END
+        """,
+    ]),
+    (9, "archive of long finished tasks", [
+        # Same columns as tasks, ids kept: a task moves between the two tables, never exists in both
+        """
+        CREATE TABLE IF NOT EXISTS archived_tasks (
+            id INTEGER PRIMARY KEY,
+            project_id INTEGER NOT NULL,
+            title TEXT NOT NULL,
+            description TEXT NOT NULL,
+            status TEXT,
+            assigned_user_id INTEGER,
+            created_by INTEGER NOT NULL,
+            created_date TEXT NOT NULL,
+            modified_date TEXT NOT NULL,
+            version INTEGER NOT NULL,
+            archived_at TEXT NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_archived_tasks_project_id ON archived_tasks (project_id, id)",
+        # Finds the tasks to archive without scanning the open ones
+        "CREATE INDEX IF NOT EXISTS idx_tasks_status_modified_date ON tasks (status, modified_date)",
+        # The counters cover archived tasks too, so moving a task either way leaves them unchanged
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_archived_task_counts_insert AFTER INSERT ON archived_tasks
+        BEGIN
+            INSERT INTO project_task_counts (project_id, status, count) VALUES (NEW.project_id, COALESCE(NEW.status, ''), 1)
+            ON CONFLICT (project_id, status) DO UPDATE SET count = count + 1;
+            INSERT INTO user_task_counts (user_id, status, count)
+            SELECT NEW.assigned_user_id, COALESCE(NEW.status, ''), 1 WHERE NEW.assigned_user_id IS NOT NULL
+            ON CONFLICT (user_id, status) DO UPDATE SET count = count + 1;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_archived_task_counts_delete AFTER DELETE ON archived_tasks
+        BEGIN
+            UPDATE project_task_counts SET count = count - 1 WHERE project_id = OLD.project_id AND status = COALESCE(OLD.status, '');
+            UPDATE user_task_counts SET count = count - 1 WHERE user_id = OLD.assigned_user_id AND status = COALESCE(OLD.status, '');
+        END
+        """,
+    ]),
+]
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection, migrations=MIGRATIONS) -> int:
+    """
+    Apply every migration newer than the database's schema version.
+
+    Each migration runs in its own transaction together with the version bump,
+    so a failure leaves the database at the last fully applied version. The
+    transaction takes the write lock before reading the version: workers
+    starting together apply each migration once, the others skip it.
+
+    Args:
+        conn (sqlite3.Connection): A read-write connection.
+        migrations (list): Ordered (version, description, statements) tuples.
+
+    Returns:
+        int: The schema version after migrating.
+    """
+    current = get_schema_version(conn)
+    for version, description, statements in migrations:
+        if version <= current:
+            continue
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            current = get_schema_version(conn)
+            if version <= current:
+                # Applied by another worker since the version was first read
+                conn.rollback()
+                continue
+            for statement in statements:
+                conn.execute(statement)
+            # PRAGMA does not accept bound parameters; version is an int from the list above
+            conn.execute(f"PRAGMA user_version = {int(version)}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            logger.error(f"Migration {version} ({description}) failed")
+            raise
+        logger.info(f"Applied migration {version}: {description}")
+        current = version
+    return current
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 
 class User(BaseModel):
     username: str
@@ -20,10 +20,114 @@ class Task(BaseModel):
     created_date: str
     modified_date: str
 
+# Rows of the bulk imports. An id is kept when given, so a dump restores with its references.
+
+class ImportedProject(Project):
+    id: Optional[int] = None
+    description: Optional[str] = None
+
+class ImportedTask(Task):
+    id: Optional[int] = None
+    assigned_user_id: Optional[int] = None
+    # Set for a task of the archive, which is imported back into it
+    archived_at: Optional[str] = None
+
+class Membership(BaseModel):
+    user_id: int
+    project_id: int
+
+class TaskPatch(BaseModel):
+    # Only the fields sent are changed; modified_date is always set by the server
+    project_id: Optional[int] = None
+    title: Optional[str] = None
+    description: Optional[str] = None
+    status: Optional[str] = None
+    assigned_user_id: Optional[int] = None
+    created_by: Optional[int] = None
+    # Version the client last saw; the update is refused with 409 if the task changed since
+    version: Optional[int] = None
+
+class BulkTaskPatch(TaskPatch):
+    id: int
+
+class TaskFilters(BaseModel):
+    status: Optional[str] = None
+    assigned_user_id: Optional[int] = None
+    created_by: Optional[int] = None
+    modified_after: Optional[str] = None  # Inclusive lower bound on modified_date (ISO 8601)
+    modified_before: Optional[str] = None  # Exclusive upper bound on modified_date (ISO 8601)
+
 class RegisterRequest(BaseModel):
     username: str
     password: str
 
 class LoginRequest(BaseModel):
     username: str
-    password: str
\ No newline at end of file
+    password: str
+
+# Response payloads of the task and board reads. The routes render them straight
+# to JSON bytes; the models declare the shape for OpenAPI and the tests.
+
+class UserRef(BaseModel):
+    id: Optional[int]
+    username: Optional[str]
+
+class ProjectTask(BaseModel):
+    # Item of GET /tasks
+    id: int
+    projectId: int
+    title: str
+    description: str
+    status: Optional[str]
+    createdDate: str
+    modifiedDate: str
+    version: int
+    assignedUser: Optional[UserRef]
+    createdBy: UserRef
+
+class ArchivedTask(ProjectTask):
+    # Item of GET /projects/{project_id}/archived-tasks
+    archivedDate: str
+
+class BoardTask(BaseModel):
+    # Task of GET /projects/: the ids and the users they point at
+    id: int
+    project_id: int
+    title: str
+    description: str
+    status: Optional[str]
+    assigned_user_id: Optional[int]
+    assignedUser: Optional[UserRef]
+    created_by: int
+    createdBy: UserRef
+    created_date: str
+    modified_date: str
+    version: int
+
+class BoardTaskDetails(BaseModel):
+    # Task of GET /projects-with-details/: users nested in place of the ids
+    id: int
+    title: str
+    description: str
+    status: Optional[str]
+    assigned_user_id: Optional[UserRef]
+    created_by: UserRef
+    created_date: str
+    modified_date: str
+    version: int
+
+class Board(BaseModel):
+    id: int
+    name: str
+    description: Optional[str]
+    users: List[UserRef]
+    tasks: List[BoardTask]
+
+class BoardDetails(Board):
+    tasks: List[BoardTaskDetails]
+
+class BoardList(BaseModel):
+    projects: List[Board]
+
+class BoardDetailsList(BaseModel):
+    projects: List[BoardDetails]
@@ -0,0 +1,66 @@
+import base64
+from fastapi import HTTPException
+from app.models import TaskFilters
+
+# Largest page a client may ask for
+MAX_PAGE_SIZE = 1000
+
+# Response header carrying the cursor of the next page, absent on the last page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(last_id: int) -> str:
+    """Encode the id of the last row of a page as an opaque cursor token."""
+    return base64.urlsafe_b64encode(str(last_id).encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> int:
+    """Decode a cursor token back to the id to resume after."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        return int(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+
+def task_filter_clause(filters: TaskFilters, alias: str = "t") -> tuple:
+    """
+    Build the SQL conditions for the task filters that are set.
+
+    Args:
+        filters (TaskFilters): Filters taken from the query string.
+        alias (str): Alias of the tasks table in the query.
+
+    Returns:
+        tuple: A list of conditions to AND together and their parameters.
+    """
+    conditions, params = [], []
+    if filters.status is not None:
+        conditions.append(f"{alias}.status = ?")
+        params.append(filters.status)
+    if filters.assigned_user_id is not None:
+        conditions.append(f"{alias}.assigned_user_id = ?")
+        params.append(filters.assigned_user_id)
+    if filters.created_by is not None:
+        conditions.append(f"{alias}.created_by = ?")
+        params.append(filters.created_by)
+    if filters.modified_after is not None:
+        conditions.append(f"{alias}.modified_date >= ?")
+        params.append(filters.modified_after)
+    if filters.modified_before is not None:
+        conditions.append(f"{alias}.modified_date < ?")
+        params.append(filters.modified_before)
+    return conditions, params
+
+
+def next_cursor(rows: list, limit: int, key=lambda row: row["id"]):
+    """
+    Trim a page fetched with LIMIT limit + 1 and return it with the next cursor.
+
+    Returns:
+        tuple: The page rows and the next cursor, or None on the last page.
+    """
+    if limit is None or len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(key(rows[-1]))
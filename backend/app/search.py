@@ -0,0 +1,88 @@
+import json
+import re
+import sqlite3
+from typing import Optional
+
+# Matches are ranked with bm25, a hit in the title weighing this many times one in the description
+TITLE_WEIGHT = 10.0
+# Tokens of context around each highlighted match in a snippet
+SNIPPET_TOKENS = 12
+
+# Searching runs in two steps: rank the matching ids, then build the snippets of
+# the page alone. Snippets are the costly part and a common word matches most tasks.
+RANKED_IDS_QUERY = f"""
+    SELECT tasks_fts.rowid AS id, bm25(tasks_fts, {TITLE_WEIGHT}, 1.0) AS rank
+    FROM tasks_fts
+"""
+
+SNIPPETS_QUERY = f"""
+    SELECT t.id, t.project_id, t.title, t.status, t.assigned_user_id, t.modified_date,
+           snippet(tasks_fts, 0, '<mark>', '</mark>', '…', {SNIPPET_TOKENS}) AS title_snippet,
+           snippet(tasks_fts, 1, '<mark>', '</mark>', '…', {SNIPPET_TOKENS}) AS description_snippet
+    FROM tasks_fts
+    JOIN tasks t ON t.id = tasks_fts.rowid
+    WHERE tasks_fts MATCH ? AND tasks_fts.rowid IN (SELECT value FROM json_each(?))
+"""
+
+# A word, with a trailing * when the user asks for prefix matching
+_WORD = re.compile(r"(\w+)(\*?)", re.UNICODE)
+
+
+def fts_query(text: str) -> Optional[str]:
+    """
+    Turn what the user typed into an FTS5 query matching every word.
+
+    Each word is quoted, so FTS5 operators and stray quotes in the input are
+    plain text. A word typed with a trailing * matches as a prefix; it is never
+    added implicitly, since a short prefix can expand to most of the vocabulary.
+    Returns None when the input holds no word.
+    """
+    words = _WORD.findall(text)
+    if not words:
+        return None
+    return " ".join(f'"{word}"{star}' for word, star in words)
+
+
+def _ranked_ids_query(by_project: bool) -> str:
+    """RANKED_IDS_QUERY with its MATCH, taking the project id as well when `by_project`, then LIMIT and OFFSET."""
+    query = RANKED_IDS_QUERY
+    if by_project:
+        # Joined rather than IN (...): the full-text index drives the loop and tasks is probed by rowid
+        query += "    JOIN tasks t ON t.id = tasks_fts.rowid\n    WHERE tasks_fts MATCH ? AND t.project_id = ?\n"
+    else:
+        query += "    WHERE tasks_fts MATCH ?\n"
+    return query + "    ORDER BY rank, id\n    LIMIT ? OFFSET ?\n"
+
+
+def search_tasks(conn: sqlite3.Connection, match: str, project_id: Optional[int], limit: int, offset: int) -> list:
+    """
+    Return one page of the tasks matching an FTS5 query, best match first.
+
+    Args:
+        conn (sqlite3.Connection): Connection to read from.
+        match (str): Query built by fts_query().
+        project_id (int, optional): Only search the tasks of this project.
+        limit (int): Number of rows to return.
+        offset (int): Number of better ranked rows to skip.
+    """
+    params = [match] if project_id is None else [match, project_id]
+    ranks = dict(conn.execute(_ranked_ids_query(project_id is not None), (*params, limit, offset)).fetchall())
+    if not ranks:
+        return []
+    rows = {row["id"]: row for row in conn.execute(SNIPPETS_QUERY, (match, json.dumps(list(ranks))))}
+    return [
+        {
+            "id": task_id,
+            "projectId": rows[task_id]["project_id"],
+            "title": rows[task_id]["title"],
+            "status": rows[task_id]["status"],
+            "assignedUserId": rows[task_id]["assigned_user_id"],
+            "modifiedDate": rows[task_id]["modified_date"],
+            "titleSnippet": rows[task_id]["title_snippet"],
+            "descriptionSnippet": rows[task_id]["description_snippet"],
+            "rank": rank,
+        }
+        for task_id, rank in ranks.items()
+        # A task deleted between the two queries is left out
+        if task_id in rows
+    ]
@@ -0,0 +1,97 @@
+import argparse
+import sqlite3
+import sys
+from app.database import pool
+
+# Statuses counted as finished work; every other status is open
+DONE_STATUSES = ("done", "Done")
+
+PROJECT_STATS_QUERY = "SELECT status, count FROM project_task_counts WHERE project_id = ? AND count != 0 ORDER BY status"
+
+USER_WORKLOAD_QUERY = "SELECT status, count FROM user_task_counts WHERE user_id = ? AND count != 0 ORDER BY status"
+
+# Hot and archived tasks: archiving a task does not change what it counts for
+ALL_TASKS = """
+    (SELECT project_id, status, assigned_user_id FROM tasks
+     UNION ALL
+     SELECT project_id, status, assigned_user_id FROM archived_tasks)
+"""
+
+# The counters recomputed from the tasks, as the triggers should have kept them
+COUNTERS = {
+    "project_task_counts": (
+        "project_id",
+        f"SELECT project_id, COALESCE(status, ''), COUNT(*) FROM {ALL_TASKS} GROUP BY 1, 2",
+    ),
+    "user_task_counts": (
+        "user_id",
+        f"SELECT assigned_user_id, COALESCE(status, ''), COUNT(*) FROM {ALL_TASKS} WHERE assigned_user_id IS NOT NULL GROUP BY 1, 2",
+    ),
+}
+
+
+def _by_status(rows) -> dict:
+    return {status: count for status, count in rows}
+
+
+def project_stats(conn: sqlite3.Connection, project_id: int) -> dict:
+    by_status = _by_status(conn.execute(PROJECT_STATS_QUERY, (project_id,)))
+    return {"project_id": project_id, "total": sum(by_status.values()), "by_status": by_status}
+
+
+def user_workload(conn: sqlite3.Connection, user_id: int) -> dict:
+    by_status = _by_status(conn.execute(USER_WORKLOAD_QUERY, (user_id,)))
+    done = sum(count for status, count in by_status.items() if status in DONE_STATUSES)
+    return {"user_id": user_id, "open": sum(by_status.values()) - done, "done": done, "by_status": by_status}
+
+
+def check_counters(conn: sqlite3.Connection) -> list:
+    """
+    Recompute every counter from the tasks and compare with the stored ones.
+
+    Returns:
+        list: One dict per counter that differs, empty when all of them match.
+    """
+    mismatches = []
+    for table, (key, rebuild_query) in COUNTERS.items():
+        stored = {(row[0], row[1]): row[2] for row in conn.execute(f"SELECT {key}, status, count FROM {table} WHERE count != 0")}
+        actual = {(row[0], row[1]): row[2] for row in conn.execute(rebuild_query)}
+        for owner, status in sorted(stored.keys() | actual.keys()):
+            if stored.get((owner, status), 0) != actual.get((owner, status), 0):
+                mismatches.append({
+                    "table": table,
+                    key: owner,
+                    "status": status,
+                    "stored": stored.get((owner, status), 0),
+                    "actual": actual.get((owner, status), 0),
+                })
+    return mismatches
+
+
+def rebuild_counters(conn: sqlite3.Connection):
+    """Replace every counter with its value recomputed from the tasks; call it inside a transaction."""
+    for table, (key, rebuild_query) in COUNTERS.items():
+        conn.execute(f"DELETE FROM {table}")
+        conn.execute(f"INSERT INTO {table} ({key}, status, count) {rebuild_query}")
+
+
+def main(argv=None) -> int:
+    """Check the counters of the application database: python -m app.stats [--repair]"""
+    parser = argparse.ArgumentParser(description="Compare the task counters with a rebuild from the tasks.")
+    parser.add_argument("--repair", action="store_true", help="rebuild the counters when they differ")
+    args = parser.parse_args(argv)
+    with pool.connection() as conn:
+        mismatches = check_counters(conn)
+        for mismatch in mismatches:
+            print(mismatch)
+        if mismatches and args.repair:
+            rebuild_counters(conn)
+            conn.commit()
+            print(f"Rebuilt the counters, {len(mismatches)} were wrong")
+            return 0
+    print("Counters match the tasks" if not mismatches else f"{len(mismatches)} counters differ")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
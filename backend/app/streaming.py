@@ -0,0 +1,83 @@
+import asyncio
+import csv
+import io
+import weakref
+from itertools import islice
+from fastapi.responses import StreamingResponse
+from app.cache import dump_json
+from app.config import MAX_STREAMS
+from app.database import connect, run_blocking
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+CSV_MEDIA_TYPE = "text/csv"
+
+# Items serialized per hop to the database executor
+ITEMS_PER_CHUNK = 50
+
+
+def _next_chunk(items) -> bytes:
+    return b"".join(dump_json(item) + b"\n" for item in islice(items, ITEMS_PER_CHUNK))
+
+
+def _next_csv_chunk(items) -> bytes:
+    out = io.StringIO()
+    csv.writer(out).writerows(islice(items, ITEMS_PER_CHUNK))
+    return out.getvalue().encode()
+
+
+# Per event loop gates keeping MAX_STREAMS streams at most on the read pool
+_gates = weakref.WeakKeyDictionary()
+
+
+def _gate() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    if loop not in _gates:
+        _gates[loop] = asyncio.Semaphore(MAX_STREAMS)
+    return _gates[loop]
+
+
+async def _stream(producer, args, next_chunk, head: bytes = b""):
+    # Dependencies are closed before a streamed body is sent, so the stream borrows its own connection.
+    # It holds it as long as the client takes to read, so past MAX_STREAMS streams wait their turn
+    # and the rest of the read pool stays free for the other requests
+    async with _gate(), connect(read_only=True) as db:
+        items = producer(db.conn, *args)
+        try:
+            if head:
+                yield head
+            while True:
+                # Reading and serializing both happen off the event loop
+                chunk = await run_blocking(next_chunk, items)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            # Finalize the open cursors before the connection goes back to the pool
+            await run_blocking(items.close)
+
+
+def ndjson_response(producer, *args, headers: dict = None) -> StreamingResponse:
+    """
+    Stream the items of `producer(conn, *args)` as newline-delimited JSON.
+
+    Args:
+        producer (callable): A generator function taking a connection first.
+        *args: Extra arguments for the producer.
+        headers (dict, optional): Extra response headers.
+
+    Returns:
+        StreamingResponse: One JSON document per line, sent as rows come off the cursor.
+    """
+    return StreamingResponse(_stream(producer, args, _next_chunk), media_type=NDJSON_MEDIA_TYPE, headers=headers)
+
+
+def csv_response(producer, columns: tuple, *args, headers: dict = None) -> StreamingResponse:
+    """
+    Stream the rows of `producer(conn, *args)` as CSV under a header line of `columns`.
+
+    The producer yields sequences in the order of `columns`; None is written as an empty field.
+    """
+    out = io.StringIO()
+    csv.writer(out).writerow(columns)
+    head = out.getvalue().encode()
+    return StreamingResponse(_stream(producer, args, _next_csv_chunk, head), media_type=CSV_MEDIA_TYPE, headers=headers)
@@ -0,0 +1,395 @@
+"""
+Bulk import and export of projects, tasks and memberships, as NDJSON or CSV.
+
+An upload is parsed as its bytes arrive: Importer.feed() turns them into rows
+validated against the models and hands them out in chunks of
+IMPORT_CHUNK_SIZE, each inserted by insert_chunk() with one executemany in
+its own write transaction. Memory stays bounded by one chunk whatever the
+size of the upload, and a row that fails (bad JSON, a field that does not
+validate, a project or user that does not exist, a duplicate) is reported
+with its line number without stopping the others.
+
+Exports stream the same columns back. Given ids are kept, so an export
+restores as is into an empty database; into one that already has rows, the
+ids in use are refused like any duplicate. With new_ids the ids of the
+upload are dropped and every row is created anew, the project and user ids
+it points at being kept as they are. Archived tasks carry their archived_at and go back to archived_tasks; a task
+id is refused when the other table already has it, as a task never exists
+in both.
+"""
+import codecs
+import csv
+import json
+import os
+import sqlite3
+from pydantic import ValidationError
+from app.cache import board_cache
+from app.changelog import MEMBER, PROJECT, TASK, record_changes
+from app.events import CREATED, event_bus
+from app.models import ImportedProject, ImportedTask, Membership
+
+# Valid rows inserted per write transaction
+IMPORT_CHUNK_SIZE = int(os.getenv("TASKFLOW_IMPORT_CHUNK_SIZE", 1000))
+# Failed rows described in the response; the others are only counted
+MAX_IMPORT_ERRORS = 100
+
+NDJSON = "ndjson"
+CSV = "csv"
+
+PROJECTS = "projects"
+TASKS = "tasks"
+MEMBERSHIPS = "memberships"
+ENTITIES = (PROJECTS, TASKS, MEMBERSHIPS)
+
+MODELS = {PROJECTS: ImportedProject, TASKS: ImportedTask, MEMBERSHIPS: Membership}
+
+TASK_COLUMNS = ("id", "project_id", "title", "description", "status", "assigned_user_id", "created_by", "created_date", "modified_date")
+
+# Columns of each entity, in the order of its export and its CSV header;
+# archived_at is empty for the tasks on the boards
+COLUMNS = {
+    PROJECTS: ("id", "name", "description"),
+    TASKS: TASK_COLUMNS + ("archived_at",),
+    MEMBERSHIPS: ("user_id", "project_id"),
+}
+
+TABLES = {PROJECTS: "projects", TASKS: "tasks", MEMBERSHIPS: "user_projects"}
+
+INSERT_QUERIES = {
+    PROJECTS: "INSERT INTO projects (id, name, description) VALUES (?, ?, ?)",
+    TASKS: f"INSERT INTO tasks ({', '.join(TASK_COLUMNS)}) VALUES ({', '.join('?' * len(TASK_COLUMNS))})",
+    MEMBERSHIPS: "INSERT INTO user_projects (user_id, project_id) VALUES (?, ?)",
+}
+
+INSERT_ARCHIVED_QUERY = f"""
+    INSERT INTO archived_tasks ({', '.join(COLUMNS[TASKS])}, version)
+    VALUES ({', '.join('?' * len(COLUMNS[TASKS]))}, 1)
+"""
+
+# Tasks on the boards, then the archived ones: each table is read in id order without a sort
+EXPORT_QUERIES = {
+    PROJECTS: "SELECT id, name, description FROM projects ORDER BY id",
+    TASKS: f"SELECT {', '.join(TASK_COLUMNS)}, NULL FROM tasks UNION ALL SELECT {', '.join(COLUMNS[TASKS])} FROM archived_tasks",
+    MEMBERSHIPS: "SELECT user_id, project_id FROM user_projects ORDER BY user_id, project_id",
+}
+
+# Columns that must name an existing row, checked per chunk; foreign keys are not enforced by SQLite here
+REFERENCES = {
+    PROJECTS: (),
+    TASKS: (("project_id", "projects"), ("assigned_user_id", "users"), ("created_by", "users")),
+    MEMBERSHIPS: (("user_id", "users"), ("project_id", "projects")),
+}
+
+
+class InvalidUpload(ValueError):
+    """The upload cannot be read at all: no row after this point can be imported."""
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(map(str, detail['loc']))}: {detail['msg']}" for detail in error.errors())
+
+
+class Importer:
+    """
+    Incremental parser of one upload.
+
+    feed() takes the bytes as they arrive and returns the chunks of valid rows
+    completed so far, as lists of (line, model) pairs; finish() returns the
+    rest. Rows that do not validate are counted in `failed`, and the first
+    MAX_IMPORT_ERRORS of them described in `errors`.
+    """
+
+    def __init__(self, entity: str, fmt: str, chunk_size: int = IMPORT_CHUNK_SIZE, new_ids: bool = False):
+        self.entity = entity
+        self.model = MODELS[entity]
+        self.fmt = fmt
+        self.chunk_size = chunk_size
+        self.new_ids = new_ids
+        self.required = {name for name, field in self.model.model_fields.items() if field.is_required()}
+        self.imported = 0
+        self.failed = 0
+        self.errors = []
+        self._decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        # Text after the last newline received
+        self._partial = ""
+        self._line = 0
+        # CSV: the column names, and the lines of a record whose quoted field spans several of them
+        self._header = None
+        self._record = []
+        self._record_line = 0
+        self._rows = []
+
+    def fail(self, line: int, error: str):
+        self.failed += 1
+        if len(self.errors) < MAX_IMPORT_ERRORS:
+            self.errors.append({"line": line, "error": error})
+
+    def feed(self, data: bytes) -> list:
+        lines = (self._partial + self._decode(data)).split("\n")
+        self._partial = lines.pop()
+        for line in lines:
+            self._parse(line)
+        return self._take_chunks()
+
+    def finish(self) -> list:
+        text = self._partial + self._decode(b"", final=True)
+        self._partial = ""
+        if text:
+            self._parse(text)
+        if self._record:
+            self.fail(self._record_line, "Quoted field is not closed")
+            self._record = []
+        if self.fmt == CSV and self._header is None:
+            raise InvalidUpload("The CSV upload has no header line")
+        chunks = self._take_chunks()
+        if self._rows:
+            chunks.append(self._rows)
+            self._rows = []
+        return chunks
+
+    def done(self, inserted: list, errors: list):
+        """Account for a chunk once its transaction committed."""
+        self.imported += len(inserted)
+        for line, error in errors:
+            self.fail(line, error)
+
+    def _decode(self, data: bytes, final: bool = False) -> str:
+        try:
+            return self._decoder.decode(data, final)
+        except UnicodeDecodeError as e:
+            raise InvalidUpload(f"The upload is not UTF-8 after line {self._line}: {e.reason}")
+
+    def _take_chunks(self) -> list:
+        chunks = []
+        while len(self._rows) >= self.chunk_size:
+            chunks.append(self._rows[:self.chunk_size])
+            del self._rows[:self.chunk_size]
+        return chunks
+
+    def _parse(self, line: str):
+        self._line += 1
+        if self.fmt == NDJSON:
+            self._parse_json(line)
+        else:
+            self._parse_csv(line)
+
+    def _parse_json(self, line: str):
+        if not line.strip():
+            return
+        try:
+            values = json.loads(line)
+        except ValueError as e:
+            self.fail(self._line, f"Invalid JSON: {e}")
+            return
+        if not isinstance(values, dict):
+            self.fail(self._line, "Expected a JSON object")
+            return
+        self._validate(self._line, values)
+
+    def _parse_csv(self, line: str):
+        if not self._record:
+            self._record_line = self._line
+        self._record.append(line)
+        text = "\n".join(self._record)
+        # Quotes inside a quoted field are doubled: an odd count means the field goes on
+        if text.count('"') % 2:
+            return
+        self._record = []
+        if not text.strip():
+            return
+        try:
+            fields = next(csv.reader([text]))
+        except csv.Error as e:
+            self.fail(self._record_line, f"Invalid CSV: {e}")
+            return
+        if self._header is None:
+            self._set_header(fields)
+            return
+        if len(fields) != len(self._header):
+            self.fail(self._record_line, f"Expected {len(self._header)} fields, got {len(fields)}")
+            return
+        # An empty cell is a missing value: None for the optional fields, an empty string for the others
+        values = {name: value for name, value in zip(self._header, fields) if value != "" or name in self.required}
+        self._validate(self._record_line, values)
+
+    def _set_header(self, fields: list):
+        self._header = [field.strip() for field in fields]
+        missing = sorted(self.required - set(self._header))
+        if missing:
+            raise InvalidUpload(f"The CSV header lacks the columns {', '.join(missing)}")
+
+    def _validate(self, line: int, values: dict):
+        if self.new_ids:
+            values.pop("id", None)
+        try:
+            self._rows.append((line, self.model.model_validate(values)))
+        except ValidationError as e:
+            self.fail(line, _validation_message(e))
+
+
+def _missing_references(conn: sqlite3.Connection, entity: str, rows: list) -> list:
+    """(line, error) of the rows naming a project or user that does not exist."""
+    errors = []
+    found = {}
+    for column, table in REFERENCES[entity]:
+        ids = sorted({getattr(record, column) for _, record in rows} - {None})
+        found[column] = {row[0] for row in conn.execute(f"SELECT id FROM {table} WHERE id IN (SELECT value FROM json_each(?))", (json.dumps(ids),))}
+    for line, record in rows:
+        for column, table in REFERENCES[entity]:
+            value = getattr(record, column)
+            if value is not None and value not in found[column]:
+                errors.append((line, f"{column}: {value} is not in {table}"))
+                break
+    return errors
+
+
+def _archive_conflicts(conn: sqlite3.Connection, rows: list) -> list:
+    """(line, error) of the task rows whose id the other table, or another row of the chunk, already has."""
+    ids = sorted({record.id for _, record in rows} - {None})
+    hot = {row[0] for row in conn.execute("SELECT id FROM tasks WHERE id IN (SELECT value FROM json_each(?))", (json.dumps(ids),))}
+    archived = {row[0] for row in conn.execute("SELECT id FROM archived_tasks WHERE id IN (SELECT value FROM json_each(?))", (json.dumps(ids),))}
+    errors, seen = [], set()
+    for line, record in rows:
+        if record.id is None:
+            continue
+        if record.archived_at is None and record.id in archived:
+            errors.append((line, f"id: {record.id} is an archived task"))
+        elif record.archived_at is not None and record.id in hot:
+            errors.append((line, f"id: {record.id} is a task on a board"))
+        elif record.id in seen:
+            errors.append((line, f"id: {record.id} is listed more than once"))
+        seen.add(record.id)
+    return errors
+
+
+def _last_task_id(conn: sqlite3.Connection) -> int:
+    # Archived ids imported past the sequence of tasks are in no sequence: count them too
+    return conn.execute("""
+        SELECT MAX(COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'tasks'), 0),
+                   COALESCE((SELECT MAX(id) FROM archived_tasks), 0))
+    """).fetchone()[0]
+
+
+def _advance_task_sequence(conn: sqlite3.Connection):
+    # A task created later must not take the id of an archived one, or restoring it would fail
+    last = _last_task_id(conn)
+    if conn.execute("UPDATE sqlite_sequence SET seq = ? WHERE name = 'tasks'", (last,)).rowcount == 0:
+        conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('tasks', ?)", (last,))
+
+
+def _assign_ids(conn: sqlite3.Connection, table: str, records: list):
+    # Ids are given here rather than by SQLite so the change log can name every row:
+    # one past the largest ever used, as AUTOINCREMENT would, and past the ones given in the chunk
+    if table == "tasks":
+        used = _last_task_id(conn)
+    else:
+        used = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM sqlite_sequence WHERE name = ?", (table,)).fetchone()[0]
+    next_id = max([used, *(record["id"] for record in records if record["id"] is not None)]) + 1
+    for record in records:
+        if record["id"] is None:
+            record["id"] = next_id
+            next_id += 1
+
+
+def _is_archived(entity: str, record: dict) -> bool:
+    return entity == TASKS and record["archived_at"] is not None
+
+
+def _statement(entity: str, record: dict) -> tuple:
+    """The insert of a record and its parameters."""
+    if _is_archived(entity, record):
+        return INSERT_ARCHIVED_QUERY, tuple(record[column] for column in COLUMNS[TASKS])
+    columns = TASK_COLUMNS if entity == TASKS else COLUMNS[entity]
+    return INSERT_QUERIES[entity], tuple(record[column] for column in columns)
+
+
+def _change(entity: str, record: dict) -> tuple:
+    if entity == PROJECTS:
+        return record["id"], PROJECT, record["id"], CREATED, record
+    if entity == TASKS:
+        return record["project_id"], TASK, record["id"], CREATED, {column: record[column] for column in TASK_COLUMNS}
+    return record["project_id"], MEMBER, record["user_id"], CREATED, None
+
+
+def insert_chunk(conn: sqlite3.Connection, entity: str, rows: list) -> tuple:
+    """
+    Insert a chunk of validated rows with one executemany; call it inside a transaction.
+
+    If the chunk breaks a constraint, it is rolled back to its savepoint and
+    inserted row by row, so only the rows at fault are left out. Archived
+    tasks go to archived_tasks, and are left out of the change log as they
+    are on no board.
+
+    Args:
+        conn (sqlite3.Connection): The connection running the write.
+        entity (str): PROJECTS, TASKS or MEMBERSHIPS.
+        rows (list): (line, model) pairs from Importer.
+
+    Returns:
+        tuple: The fields of the rows inserted, and (line, error) of the others.
+    """
+    if not conn.in_transaction:
+        # A savepoint outside a transaction would open and commit one of its own
+        conn.execute("BEGIN IMMEDIATE")
+    errors = _missing_references(conn, entity, rows)
+    if entity == TASKS:
+        errors += _archive_conflicts(conn, rows)
+    if errors:
+        failed = {line for line, _ in errors}
+        rows = [(line, record) for line, record in rows if line not in failed]
+    records = [record.model_dump() for _, record in rows]
+    if "id" in COLUMNS[entity]:
+        _assign_ids(conn, TABLES[entity], records)
+    statements = [_statement(entity, record) for record in records]
+
+    conn.execute("SAVEPOINT import_chunk")
+    try:
+        # One executemany per table
+        for query in dict.fromkeys(query for query, _ in statements):
+            conn.executemany(query, [values for other, values in statements if other == query])
+        inserted = records
+    except sqlite3.IntegrityError:
+        conn.execute("ROLLBACK TO import_chunk")
+        # A failed INSERT only undoes its own row
+        inserted = []
+        for (line, _), record, (query, values) in zip(rows, records, statements):
+            try:
+                conn.execute(query, values)
+                inserted.append(record)
+            except sqlite3.IntegrityError as e:
+                errors.append((line, str(e)))
+    conn.execute("RELEASE import_chunk")
+    if any(_is_archived(entity, record) for record in inserted):
+        _advance_task_sequence(conn)
+    record_changes(conn, [_change(entity, record) for record in inserted if not _is_archived(entity, record)])
+    return inserted, sorted(errors)
+
+
+def notify(entity: str, inserted: list):
+    """Invalidate the boards a committed chunk changed and tell their viewers about the new tasks."""
+    if entity == PROJECTS:
+        return
+    inserted = [record for record in inserted if not _is_archived(entity, record)]
+    for project_id in {record["project_id"] for record in inserted}:
+        board_cache.invalidate(project_id)
+    if entity == TASKS:
+        # Emitted in one loop turn, the event bus folds them into a single frame per project
+        for record in inserted:
+            event_bus.emit(record["project_id"], CREATED, record["id"], _change(entity, record)[4])
+
+
+def iter_rows(conn: sqlite3.Connection, entity: str):
+    """Yield every row of an entity as a tuple in the order of COLUMNS, for CSV."""
+    cursor = conn.execute(EXPORT_QUERIES[entity])
+    try:
+        for row in cursor:
+            yield tuple(row)
+    finally:
+        cursor.close()
+
+
+def iter_records(conn: sqlite3.Connection, entity: str):
+    """Yield every row of an entity as a dict of COLUMNS, for NDJSON."""
+    columns = COLUMNS[entity]
+    for row in iter_rows(conn, entity):
+        yield dict(zip(columns, row))
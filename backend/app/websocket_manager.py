@@ -1,28 +1,188 @@
+import asyncio
+import itertools
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
 from fastapi import WebSocket, WebSocketDisconnect
-from typing import List
+from app.broker import Broker, InProcessBroker, create_broker
+from app.metrics import WEBSOCKET_CONNECTIONS, WEBSOCKET_DROPPED, WEBSOCKET_FANOUT, WEBSOCKET_RECIPIENTS, WEBSOCKET_SLOW_DISCONNECTS
+from app.utils.logger import logger
+
+# Messages waiting to be sent to one socket before older ones are dropped
+OUTBOUND_QUEUE_SIZE = 64
+# A socket that has dropped more messages than this is disconnected
+MAX_DROPPED_MESSAGES = 256
+# Seconds to wait for the close handshake of a disconnected slow client
+CLOSE_TIMEOUT = 10
+
+# Frame a client may send to check the connection, answered with PONG on that socket only
+PING = "ping"
+PONG = "pong"
+
+_unique_keys = itertools.count()
+
+
+class Subscriber:
+    """
+    One connected socket with its bounded outbound queue.
+
+    Messages published with the same coalesce key replace each other while
+    they wait, so a burst of updates to one card sends only the latest.
+    When the queue is full the oldest message is dropped.
+    """
+
+    def __init__(self, websocket: WebSocket, project_id: Optional[int], queue_size: int = OUTBOUND_QUEUE_SIZE,
+                 max_dropped: int = MAX_DROPPED_MESSAGES):
+        self.websocket = websocket
+        self.project_id = project_id
+        self.queue_size = queue_size
+        self.max_dropped = max_dropped
+        self.pending = OrderedDict()
+        self.dropped = 0
+        self.wakeup = asyncio.Event()
+        self.sender: Optional[asyncio.Task] = None
+
+    def offer(self, message: dict, key=None) -> bool:
+        """Queue a message without waiting. Returns False once the socket is too slow to keep."""
+        if key is None:
+            key = next(_unique_keys)
+        if key in self.pending:
+            # Coalesce: the newer message replaces the pending one
+            del self.pending[key]
+        elif len(self.pending) >= self.queue_size:
+            self.pending.popitem(last=False)
+            self.dropped += 1
+            WEBSOCKET_DROPPED.inc()
+        self.pending[key] = message
+        self.wakeup.set()
+        return self.dropped <= self.max_dropped
+
 
 class ConnectionManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
+    def __init__(self, queue_size: int = OUTBOUND_QUEUE_SIZE, max_dropped: int = MAX_DROPPED_MESSAGES,
+                 broker: Optional[Broker] = None):
+        self.queue_size = queue_size
+        self.max_dropped = max_dropped
+        # The broker carries broadcasts to the managers of the other workers
+        self.broker = broker or InProcessBroker()
+        self.broker.bind(self.deliver)
+        # Sockets keyed by project id; None holds sockets watching every project
+        self.rooms: Dict[Optional[int], Dict[WebSocket, Subscriber]] = {}
+        self.subscribers: Dict[WebSocket, Subscriber] = {}
+        # Strong references to fire-and-forget close tasks
+        self._closing = set()
+
+    @property
+    def active_connections(self) -> list:
+        return list(self.subscribers)
 
-    async def connect(self, websocket: WebSocket):
+    async def connect(self, websocket: WebSocket, project_id: Optional[int] = None):
         await websocket.accept()
-        self.active_connections.append(websocket)
+        await self.broker.start()
+        self.subscribe(websocket, project_id)
+
+    def subscribe(self, websocket: WebSocket, project_id: Optional[int] = None) -> Subscriber:
+        """Register an accepted socket in a project room and start its sender."""
+        subscriber = Subscriber(websocket, project_id, self.queue_size, self.max_dropped)
+        self.subscribers[websocket] = subscriber
+        self.rooms.setdefault(project_id, {})[websocket] = subscriber
+        subscriber.sender = asyncio.create_task(self._send_loop(subscriber))
+        WEBSOCKET_CONNECTIONS.inc()
+        return subscriber
 
     def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
+        subscriber = self.subscribers.pop(websocket, None)
+        if subscriber is None:
+            return
+        WEBSOCKET_CONNECTIONS.dec()
+        room = self.rooms.get(subscriber.project_id)
+        if room is not None:
+            room.pop(websocket, None)
+            if not room:
+                del self.rooms[subscriber.project_id]
+        if subscriber.sender is not None and subscriber.sender is not asyncio.current_task():
+            subscriber.sender.cancel()
+
+    async def broadcast(self, message: dict, project_id: Optional[int] = None, key=None):
+        """
+        Publish a message to a project room in every worker.
+
+        Sockets subscribed without a project also receive it. Without a project_id
+        the message goes to every socket.
+
+        Args:
+            message (dict): JSON-serializable message.
+            project_id (int, optional): Room to publish to.
+            key (optional): Coalesce key, pending messages with the same key are replaced.
+        """
+        await self.broker.publish(message, project_id, key)
+
+    def deliver(self, message: dict, project_id: Optional[int] = None, key=None):
+        """
+        Queue a message for the local sockets of a project room.
+
+        Sending happens concurrently in each socket's sender task,
+        so a slow client never holds up the others.
+        """
+        started = time.perf_counter()
+        if project_id is None:
+            targets = list(self.subscribers.values())
+        else:
+            targets = list(self.rooms.get(project_id, {}).values())
+            targets.extend(self.rooms.get(None, {}).values())
+        for subscriber in targets:
+            if not subscriber.offer(message, key):
+                logger.warning(f"Disconnecting slow WebSocket client after {subscriber.dropped} dropped messages")
+                WEBSOCKET_SLOW_DISCONNECTS.inc()
+                self.disconnect(subscriber.websocket)
+                task = asyncio.create_task(self._close(subscriber.websocket))
+                self._closing.add(task)
+                task.add_done_callback(self._closing.discard)
+        WEBSOCKET_FANOUT.observe(time.perf_counter() - started)
+        WEBSOCKET_RECIPIENTS.observe(len(targets))
+
+    async def _send_loop(self, subscriber: Subscriber):
+        try:
+            while True:
+                if not subscriber.pending:
+                    subscriber.wakeup.clear()
+                    await subscriber.wakeup.wait()
+                    continue
+                _, message = subscriber.pending.popitem(last=False)
+                # A stuck send only blocks this socket; its queue then overflows and it is disconnected
+                await subscriber.websocket.send_json(message)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Dead or stuck socket: drop it without affecting the other clients
+            logger.info(f"Dropping WebSocket client: {e!r}")
+            self.disconnect(subscriber.websocket)
+
+    async def _close(self, websocket: WebSocket):
+        try:
+            await asyncio.wait_for(websocket.close(code=1008), CLOSE_TIMEOUT)
+        except Exception:
+            pass
+
 
-    async def broadcast(self, message: dict):
-        for connection in self.active_connections:
-            await connection.send_json(message)
+manager = ConnectionManager(broker=create_broker())
 
-manager = ConnectionManager()
+async def websocket_endpoint(websocket: WebSocket, project_id: Optional[int] = None):
+    """
+    Push the server's events of a project, or of every project, to a board viewer.
 
-async def websocket_endpoint(websocket: WebSocket):
-    await manager.connect(websocket)
+    Clients only receive: board changes come from the write endpoints, never
+    from another socket. A {"type": "ping"} frame is answered with a pong
+    through the socket's queue, anything else is ignored.
+    """
+    await manager.connect(websocket, project_id)
     try:
         while True:
             data = await websocket.receive_json()
-            await manager.broadcast(data)
+            subscriber = manager.subscribers.get(websocket)
+            if subscriber is not None and isinstance(data, dict) and data.get("type") == PING:
+                subscriber.offer({"type": PONG, "sent": data.get("sent")})
     except WebSocketDisconnect:
+        pass
+    finally:
         manager.disconnect(websocket)
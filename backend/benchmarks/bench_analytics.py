@@ -0,0 +1,132 @@
+"""
+Report aggregates in DuckDB vs the same aggregates in SQLite.
+
+Seeds a synthetic dataset (one million tasks by default) spread over a year,
+then times the cycle time, weekly throughput and assignee history reports of
+app.analytics on the SQLite file attached to DuckDB, against equivalent
+queries on a SQLite connection. SQLite has no percentile aggregate, so the
+medians and 90th percentiles are computed in Python from its sorted rows,
+which is what serving that report from SQLite would take. Also times the
+Parquet export.
+
+Needs the DuckDB sqlite extension, installed on first run (network access).
+
+    cd backend && python -m benchmarks.bench_analytics [tasks]
+"""
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+import duckdb
+
+from app.analytics import assignee_history, attach_sqlite, cycle_time, export_parquet, throughput
+from benchmarks.common import best_of, temp_database
+
+TASKS = 1_000_000
+PROJECTS = 200
+USERS = 500
+UNTIL = date(2025, 12, 31)
+WEEKS = 52
+
+SQLITE_CYCLE_QUERY = """
+    SELECT project_id, (julianday(modified_date) - julianday(created_date)) AS days
+    FROM tasks WHERE status IN ('done', 'Done') AND days IS NOT NULL
+    ORDER BY project_id, days
+"""
+
+SQLITE_THROUGHPUT_QUERY = """
+    SELECT week, SUM(created), SUM(done) FROM (
+        SELECT date(created_date, 'weekday 1', '-7 days') AS week, 1 AS created, 0 AS done FROM tasks WHERE created_date >= ?
+        UNION ALL
+        SELECT date(modified_date, 'weekday 1', '-7 days'), 0, 1 FROM tasks WHERE status IN ('done', 'Done') AND modified_date >= ?
+    )
+    GROUP BY week ORDER BY week
+"""
+
+SQLITE_ASSIGNEE_QUERY = """
+    SELECT assigned_user_id, date(modified_date, 'weekday 1', '-7 days') AS week, COUNT(*),
+           AVG(julianday(modified_date) - julianday(created_date))
+    FROM tasks WHERE status IN ('done', 'Done') AND modified_date >= ?
+    GROUP BY assigned_user_id, week ORDER BY assigned_user_id, week
+"""
+
+
+def quantile(values: list, q: float) -> float:
+    position = (len(values) - 1) * q
+    low = int(position)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (position - low)
+
+
+def sqlite_cycle_time(conn) -> list:
+    by_project = {}
+    for project_id, days in conn.execute(SQLITE_CYCLE_QUERY):
+        by_project.setdefault(project_id, []).append(days)
+    return [
+        (project_id, len(days), statistics.fmean(days), quantile(days, 0.5), quantile(days, 0.9))
+        for project_id, days in by_project.items()
+    ]
+
+
+def seed(conn, tasks: int):
+    rng = random.Random(42)
+    start = datetime(2025, 1, 1)
+    conn.executemany("INSERT INTO users (username, password) VALUES (?, 'x')", [(f"user{i}",) for i in range(USERS)])
+    conn.executemany("INSERT INTO projects (name, description) VALUES (?, 'benchmark')", [(f"project{i}",) for i in range(PROJECTS)])
+    batch = 50_000
+    for offset in range(0, tasks, batch):
+        rows = []
+        for _ in range(min(batch, tasks - offset)):
+            created = start + timedelta(seconds=rng.randrange(365 * 86400))
+            modified = created + timedelta(seconds=int(rng.expovariate(1 / (5 * 86400))))
+            rows.append((
+                rng.randint(1, PROJECTS),
+                rng.choice(("todo", "inProgress", "done", "done")),
+                rng.randint(1, USERS),
+                created.isoformat() + "Z",
+                modified.isoformat() + "Z",
+            ))
+        conn.executemany(
+            """
+            INSERT INTO tasks (project_id, title, description, status, assigned_user_id, created_by, created_date, modified_date)
+            VALUES (?, 'task', 'benchmark', ?, ?, 1, ?, ?)
+            """,
+            rows,
+        )
+        conn.commit()
+
+
+def run() -> int:
+    tasks = int(sys.argv[1]) if len(sys.argv) > 1 else TASKS
+    with temp_database() as db_pool, db_pool.connection() as conn:
+        started = time.perf_counter()
+        seed(conn, tasks)
+        print(f"seeded {tasks} tasks in {time.perf_counter() - started:.1f} s")
+        try:
+            duck = attach_sqlite(db_pool.path)
+        except duckdb.Error as e:
+            print(f"cannot attach the database in DuckDB: {e}")
+            return 1
+        since = (UNTIL - timedelta(weeks=WEEKS)).isoformat()
+        reports = (
+            ("cycle time", lambda: cycle_time(duck), lambda: sqlite_cycle_time(conn)),
+            ("throughput", lambda: throughput(duck, WEEKS, UNTIL), lambda: conn.execute(SQLITE_THROUGHPUT_QUERY, (since, since)).fetchall()),
+            ("assignees", lambda: assignee_history(duck, WEEKS, UNTIL), lambda: conn.execute(SQLITE_ASSIGNEE_QUERY, (since,)).fetchall()),
+        )
+        for label, in_duckdb, in_sqlite in reports:
+            duck_time, sqlite_time = best_of(in_duckdb), best_of(in_sqlite)
+            print(f"{label:12s} duckdb {duck_time * 1000:8.1f} ms   sqlite {sqlite_time * 1000:8.1f} ms   x{sqlite_time / duck_time:5.1f}")
+        with tempfile.TemporaryDirectory() as directory:
+            started = time.perf_counter()
+            exported = export_parquet(duck, directory)
+            rows = sum(entry["rows"] for entry in exported.values())
+            print(f"parquet export of {rows} rows in {time.perf_counter() - started:.2f} s")
+        duck.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
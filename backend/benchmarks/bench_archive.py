@@ -0,0 +1,72 @@
+"""
+Board latency against the length of the done history.
+
+Loads a board of 1000 open tasks with 0, 50k and 200k old done tasks behind
+it, first with every task in the hot table and then after archiving, and
+checks the archived board costs about the same whatever the history. Also
+reports the archive throughput and the longest batch transaction, which is
+how long a request may wait for the write lock while the job runs.
+
+    cd backend && python -m benchmarks.bench_archive
+"""
+import sys
+import time
+
+from app.archive import ARCHIVE_BATCH_SIZE, archive_batch
+from app.board_loader import load_boards
+from benchmarks.common import best_of, seed_boards, temp_database
+
+MEMBERS = 20
+HOT_TASKS = 1000
+HISTORY = (0, 50_000, 200_000)
+CUTOFF = "2025-01-01T00:00:00Z"
+# The archived board with the longest history may cost at most this many times the one without history
+MAX_SCALING = 2
+
+
+def seed_history(conn, done_tasks: int):
+    conn.executemany(
+        """
+        INSERT INTO tasks (project_id, title, description, status, assigned_user_id, created_by, created_date, modified_date)
+        VALUES (1, ?, 'finished', 'done', ?, 1, '2024-01-01T00:00:00Z', '2024-06-01T00:00:00Z')
+        """,
+        ((f"old{i}", i % MEMBERS + 1) for i in range(done_tasks)),
+    )
+    conn.commit()
+
+
+def archive_all(conn) -> tuple:
+    """Archive like the background job, one transaction per batch; the total and longest batch times."""
+    started, longest = time.perf_counter(), 0.0
+    while True:
+        batch_started = time.perf_counter()
+        with conn:
+            moved = archive_batch(conn, CUTOFF, ARCHIVE_BATCH_SIZE)
+        longest = max(longest, time.perf_counter() - batch_started)
+        if len(moved) < ARCHIVE_BATCH_SIZE:
+            return time.perf_counter() - started, longest
+
+
+def run() -> int:
+    archived = {}
+    for done_tasks in HISTORY:
+        with temp_database() as db_pool, db_pool.connection() as conn:
+            # seed_boards dates its tasks on the cutoff, so none of the hot set is archived
+            seed_boards(conn, projects=1, members=MEMBERS, tasks=HOT_TASKS)
+            conn.execute("UPDATE tasks SET status = 'todo' WHERE status = 'done'")
+            seed_history(conn, done_tasks)
+            hot = best_of(lambda: load_boards(conn))
+            elapsed, longest = archive_all(conn)
+            archived[done_tasks] = best_of(lambda: load_boards(conn))
+        line = f"{done_tasks:>7} done: {hot * 1000:7.1f} ms unarchived, {archived[done_tasks] * 1000:6.1f} ms archived"
+        if done_tasks:
+            line += f"  (archived at {done_tasks / elapsed:,.0f} tasks/s, longest batch {longest * 1000:.1f} ms)"
+        print(line)
+
+    scaling = archived[HISTORY[-1]] / archived[HISTORY[0]]
+    print(f"{HISTORY[-1]} done tasks -> {scaling:.2f}x archived board time")
+    return 0 if scaling <= MAX_SCALING else 1
+
+
+if __name__ == "__main__":
+    sys.exit(run())
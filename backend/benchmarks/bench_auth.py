@@ -0,0 +1,58 @@
+"""
+Login throughput of the bcrypt process pool.
+
+Verifies a burst of passwords through a pool of 1..N processes, the way
+POST /login/ does, and reports logins per second at the configured work factor
+(TASKFLOW_BCRYPT_ROUNDS). Also measures how late a 10 ms timer fires on the
+event loop during the burst, which stays near zero since no hashing runs there.
+
+    cd backend && python -m benchmarks.bench_auth [max_workers]
+"""
+import asyncio
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from app.auth.security import BCRYPT_ROUNDS, hash_password, verify_and_update
+
+LOGINS_PER_WORKER = 8
+
+
+async def loop_lag(stop: asyncio.Event) -> float:
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.01)
+        worst = max(worst, time.perf_counter() - start - 0.01)
+    return worst
+
+
+async def burst(workers: int, hashed: str) -> tuple:
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        loop = asyncio.get_running_loop()
+        # Start every process before timing
+        await asyncio.gather(*(loop.run_in_executor(pool, verify_and_update, "password", hashed) for _ in range(workers)))
+        stop = asyncio.Event()
+        lag = asyncio.create_task(loop_lag(stop))
+        logins = workers * LOGINS_PER_WORKER
+        start = time.perf_counter()
+        await asyncio.gather(*(loop.run_in_executor(pool, verify_and_update, "password", hashed) for _ in range(logins)))
+        elapsed = time.perf_counter() - start
+        stop.set()
+        return logins / elapsed, await lag
+
+
+def run() -> int:
+    max_workers = int(sys.argv[1]) if len(sys.argv) > 1 else os.cpu_count() or 1
+    hashed = hash_password("password")
+    print(f"bcrypt rounds {BCRYPT_ROUNDS}, {os.cpu_count()} cores")
+    for workers in range(1, max_workers + 1):
+        rate, lag = asyncio.run(burst(workers, hashed))
+        print(f"{workers:3d} processes: {rate:8.1f} logins/s, worst event loop lag {lag * 1000:6.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
@@ -0,0 +1,39 @@
+"""
+Board loader scaling benchmark.
+
+Loads one project with 20 members and 10k then 100k tasks through the
+loader behind /projects-with-details/ and checks the time per row (member or
+task) stays flat, which is what scaling with members + tasks means.
+
+    cd backend && python -m benchmarks.bench_board_loader
+"""
+import sys
+
+from app.board_loader import format_task_details, load_boards
+from benchmarks.common import best_of, seed_boards, temp_database
+
+MEMBERS = 20
+SIZES = (10_000, 100_000)
+# The larger board may cost at most this many times the time per row of the smaller one
+MAX_ROW_COST_GROWTH = 1.2
+# Loads timed per size, the fastest counts; more than best_of's default, the gate is tight
+REPEAT = 7
+
+
+def run() -> int:
+    row_cost = {}
+    for tasks in SIZES:
+        with temp_database() as db_pool, db_pool.connection() as conn:
+            seed_boards(conn, projects=1, members=MEMBERS, tasks=tasks)
+            elapsed = best_of(lambda: load_boards(conn, format_task_details), repeat=REPEAT)
+        row_cost[tasks] = elapsed / (MEMBERS + tasks)
+        print(f"{tasks:>7} tasks: {elapsed * 1000:8.1f} ms  ({row_cost[tasks] * 1e6:.2f} us per member or task)")
+
+    small, large = SIZES
+    growth = row_cost[large] / row_cost[small]
+    print(f"{large // small}x tasks -> {growth:.2f}x time per row")
+    return 0 if growth <= MAX_ROW_COST_GROWTH else 1
+
+
+if __name__ == "__main__":
+    sys.exit(run())
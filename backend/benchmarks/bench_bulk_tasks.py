@@ -0,0 +1,67 @@
+"""
+Bulk task endpoints vs one request per task.
+
+Creates, updates and deletes the same tasks through the HTTP API, once with
+POST/PUT/DELETE /tasks/{id} per task and once with the /tasks/bulk endpoints,
+on a throwaway database, and reports tasks per second for each path.
+
+    cd backend && python -m benchmarks.bench_bulk_tasks
+"""
+import sys
+import time
+
+from fastapi.testclient import TestClient
+
+from benchmarks.common import seed_boards, serve_database, temp_database
+from main import app
+
+TASKS = 1000
+
+
+def task(i: int) -> dict:
+    return {
+        "id": None,
+        "title": f"Bench {i}",
+        "description": "benchmark task",
+        "status": "todo",
+        "assigned_user_id": 1,
+        "project_id": 1,
+        "created_by": 1,
+        "created_date": "2025-01-01T00:00:00Z",
+        "modified_date": "2025-01-01T00:00:00Z",
+    }
+
+
+def timed(label: str, fn):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:28s} {elapsed * 1000:8.1f} ms  {TASKS / elapsed:9.0f} tasks/s")
+
+
+def run() -> int:
+    with temp_database() as db_pool, serve_database(db_pool), TestClient(app) as client:
+        with db_pool.connection() as conn:
+            seed_boards(conn, projects=1, members=2, tasks=0)
+
+        def single_create():
+            for i in range(TASKS):
+                client.post("/tasks/", json=task(i))
+
+        def ids():
+            return [row["id"] for row in client.get("/tasks", params={"project_id": 1}).json()]
+
+        timed("create, one per request", single_create)
+        single_ids = ids()
+        timed("update, one per request", lambda: [client.put(f"/tasks/{task_id}", json={**task(0), "status": "done"}) for task_id in single_ids])
+        timed("delete, one per request", lambda: [client.delete(f"/tasks/{task_id}") for task_id in single_ids])
+
+        timed("create, bulk", lambda: client.post("/tasks/bulk", json=[task(i) for i in range(TASKS)]))
+        bulk_ids = ids()
+        timed("update, bulk", lambda: client.patch("/tasks/bulk", json=[{"id": task_id, "status": "done"} for task_id in bulk_ids]))
+        timed("delete, bulk", lambda: client.request("DELETE", "/tasks/bulk", json=bulk_ids))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
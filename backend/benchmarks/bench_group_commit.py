@@ -0,0 +1,86 @@
+"""
+Write throughput with and without group commit.
+
+Many concurrent clients each create tasks through AsyncConnection.transaction,
+as POST /tasks/ does, first with one commit per transaction on the pooled
+connections, then through the GroupCommitWriter. Runs with synchronous=NORMAL
+(the default, no fsync per commit in WAL) and synchronous=FULL (one fsync per
+commit), and reports writes/s and p50/p99 latency.
+
+Batches can only hold the transactions in flight, which the write pool bounds:
+it is run with the default POOL_SIZE and with one connection per client.
+
+    cd backend && python -m benchmarks.bench_group_commit
+"""
+import asyncio
+import statistics
+import sys
+import time
+
+from app import database
+from app.changelog import TASK, record_change
+from app.database import POOL_SIZE, GroupCommitWriter, connect
+from benchmarks.common import seed_boards, serve_database, temp_database
+
+CLIENTS = 32
+WRITES_PER_CLIENT = 50
+
+
+def create_task(conn, i: int):
+    cursor = conn.execute(
+        """
+        INSERT INTO tasks (title, description, status, assigned_user_id, project_id, created_by, created_date, modified_date)
+        VALUES (?, 'benchmark', 'todo', 1, 1, 1, '2025-01-01T00:00:00Z', '2025-01-01T00:00:00Z')
+        """,
+        (f"task{i}",),
+    )
+    record_change(conn, 1, TASK, cursor.lastrowid, "created", {"title": f"task{i}"})
+
+
+async def client(latencies: list, offset: int):
+    for i in range(WRITES_PER_CLIENT):
+        start = time.perf_counter()
+        async with connect() as db:
+            await db.transaction(create_task, offset + i)
+        latencies.append(time.perf_counter() - start)
+
+
+async def burst() -> tuple:
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(client(latencies, n * WRITES_PER_CLIENT) for n in range(CLIENTS)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return len(latencies) / elapsed, statistics.median(latencies), latencies[int(len(latencies) * 0.99) - 1]
+
+
+def measure(group_commit: bool, pool_size: int) -> tuple:
+    with temp_database(size=pool_size) as db_pool, serve_database(db_pool):
+        with db_pool.connection() as conn:
+            seed_boards(conn, projects=1, members=1, tasks=0)
+        database.group_writer = GroupCommitWriter(db_pool.path) if group_commit else None
+        try:
+            result = asyncio.run(burst())
+        finally:
+            if database.group_writer is not None:
+                writer = database.group_writer
+                writer.close()
+                print(f"    {writer.transactions} transactions in {writer.batches} commits")
+            database.group_writer = None
+        return result
+
+
+def run() -> int:
+    print(f"{CLIENTS} clients x {WRITES_PER_CLIENT} writes")
+    for synchronous in ("NORMAL", "FULL"):
+        database.PRAGMAS["synchronous"] = synchronous
+        for pool_size in (POOL_SIZE, CLIENTS):
+            for group_commit in (False, True):
+                rate, p50, p99 = measure(group_commit, pool_size)
+                label = f"synchronous={synchronous}, pool {pool_size}, group commit {'on' if group_commit else 'off'}"
+                print(f"{label:48s} {rate:8.0f} writes/s  p50 {p50 * 1000:6.1f} ms  p99 {p99 * 1000:6.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
@@ -0,0 +1,108 @@
+"""
+Bulk import and export of tasks through the HTTP API.
+
+Uploads 200k tasks as NDJSON and then as CSV, generated on the fly so the
+body is never held in memory, exports them back in both formats, and
+compares with creating tasks one POST /tasks/ at a time. The peak resident
+size tells whether memory stays bounded by a chunk rather than the upload.
+
+Requests go through httpx's ASGI transport, which streams the upload to the
+app; TestClient would read it whole first. The transport does buffer
+responses, so the exports raise the peak and it is only checked after the
+imports.
+
+    cd backend && python -m benchmarks.bench_import_export
+"""
+import asyncio
+import json
+import resource
+import sys
+import time
+
+import httpx
+
+from benchmarks.common import seed_boards, serve_database, temp_database
+from main import app, lifespan
+
+TASKS = 200_000
+SINGLE_TASKS = 2000
+MEMBERS = 20
+# Lines per piece of the generated upload
+LINES_PER_PIECE = 1000
+# Resident size the process may reach by the end of the imports
+MAX_IMPORT_PEAK_MB = 200
+
+
+def task(i: int) -> dict:
+    return {
+        "project_id": i % 10 + 1,
+        "title": f"Imported {i}",
+        "description": "benchmark task",
+        "status": ("todo", "inProgress", "done")[i % 3],
+        "assigned_user_id": i % MEMBERS + 1,
+        "created_by": 1,
+        "created_date": "2025-01-01T00:00:00Z",
+        "modified_date": "2025-01-01T00:00:00Z",
+    }
+
+
+async def ndjson_body():
+    for start in range(0, TASKS, LINES_PER_PIECE):
+        yield "".join(json.dumps(task(i)) + "\n" for i in range(start, start + LINES_PER_PIECE)).encode()
+
+
+async def csv_body():
+    columns = list(task(0))
+    yield (",".join(columns) + "\n").encode()
+    for start in range(0, TASKS, LINES_PER_PIECE):
+        yield "".join(",".join(str(task(i)[column]) for column in columns) + "\n" for i in range(start, start + LINES_PER_PIECE)).encode()
+
+
+def peak_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def timed(label: str, count: int, request):
+    start = time.perf_counter()
+    result = await request
+    elapsed = time.perf_counter() - start
+    print(f"{label:28s} {elapsed:7.2f} s  {count / elapsed:9.0f} tasks/s  peak {peak_mb():6.0f} MB")
+    return result
+
+
+async def main() -> int:
+    with temp_database() as db_pool, serve_database(db_pool):
+        with db_pool.connection() as conn:
+            seed_boards(conn, projects=10, members=MEMBERS, tasks=0)
+        transport = httpx.ASGITransport(app=app)
+        async with lifespan(app), httpx.AsyncClient(transport=transport, base_url="http://testserver", timeout=None) as client:
+
+            async def single_create():
+                for i in range(SINGLE_TASKS):
+                    await client.post("/tasks/", json={"id": None, **task(i)})
+
+            async def upload(query: str, body) -> dict:
+                return (await client.post(f"/import/tasks{query}", content=body)).json()
+
+            async def export(fmt: str) -> int:
+                return (await client.get("/export/tasks", params={"format": fmt})).content.count(b"\n")
+
+            await timed("create, one per request", SINGLE_TASKS, single_create())
+            ndjson = await timed("import, NDJSON", TASKS, upload("", ndjson_body()))
+            csv = await timed("import, CSV", TASKS, upload("?format=csv", csv_body()))
+            import_peak = peak_mb()
+            total = SINGLE_TASKS + 2 * TASKS
+            lines = await timed("export, NDJSON", total, export("ndjson"))
+            # The CSV export has a header line
+            await timed("export, CSV", total + 1, export("csv"))
+    failed = ndjson["failed"] + csv["failed"]
+    print(f"{ndjson['imported'] + csv['imported']} imported, {failed} failed, {lines} exported, {import_peak:.0f} MB peak after the imports")
+    return 0 if failed == 0 and lines == total and import_peak <= MAX_IMPORT_PEAK_MB else 1
+
+
+def run() -> int:
+    return asyncio.run(main())
+
+
+if __name__ == "__main__":
+    sys.exit(run())
@@ -0,0 +1,73 @@
+"""
+Overhead of the metrics on the hot path.
+
+Times a primary-key lookup on a plain sqlite3 connection and on a
+MeteredConnection, then a cheap route (GET /projects/{id}/stats, one
+statement) served in-process by the bare router and by the router behind
+MetricsMiddleware with metered connections, and reports the cost per
+statement and per request.
+
+    cd backend && python -m benchmarks.bench_metrics
+"""
+import asyncio
+import sqlite3
+import sys
+import time
+
+import httpx
+
+from app import database
+from app.metrics import MeteredConnection, MetricsMiddleware
+from benchmarks.common import best_of, seed_boards, serve_database, temp_database
+from main import app
+
+STATEMENTS = 100_000
+REQUESTS = 2000
+ROUNDS = 5
+
+
+def lookups(conn: sqlite3.Connection):
+    for i in range(STATEMENTS):
+        conn.execute("SELECT id, title FROM tasks WHERE id = ?", (i % 1000 + 1,)).fetchone()
+
+
+async def requests(asgi_app) -> float:
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=asgi_app), base_url="http://benchmark") as client:
+        await client.get("/projects/1/stats")
+        started = time.perf_counter()
+        for i in range(REQUESTS):
+            await client.get(f"/projects/{i % 10 + 1}/stats")
+        return time.perf_counter() - started
+
+
+def run() -> int:
+    with temp_database() as db_pool:
+        with db_pool.connection() as conn:
+            seed_boards(conn, projects=10, members=5, tasks=1000)
+        timings = {}
+        for factory in (sqlite3.Connection, MeteredConnection):
+            conn = sqlite3.connect(db_pool.path, factory=factory)
+            timings[factory] = best_of(lambda: lookups(conn))
+            conn.close()
+        plain, metered = timings[sqlite3.Connection], timings[MeteredConnection]
+        print(f"statement: plain {plain / STATEMENTS * 1e6:6.2f} us, metered {metered / STATEMENTS * 1e6:6.2f} us, "
+              f"overhead {(metered - plain) / STATEMENTS * 1e6:5.2f} us")
+
+        # Alternate the two setups and keep the best round of each, the machine drifts between runs
+        results = {False: float("inf"), True: float("inf")}
+        for _ in range(ROUNDS):
+            for metered in (False, True):
+                database.METRICS = metered
+                with serve_database(database.ConnectionPool(db_pool.path)):
+                    elapsed = asyncio.run(requests(MetricsMiddleware(app.router) if metered else app.router))
+                    results[metered] = min(results[metered], elapsed)
+                    database.pool.close()
+        database.METRICS = True
+        off, on = results[False] / REQUESTS, results[True] / REQUESTS
+        print(f"request:   without {off * 1e6:7.1f} us, with metrics {on * 1e6:7.1f} us, "
+              f"overhead {(on - off) * 1e6:6.1f} us ({(on - off) / off:.1%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
@@ -0,0 +1,75 @@
+"""
+Full-text search vs a LIKE '%q%' scan.
+
+Seeds a synthetic dataset (one million tasks by default) whose words follow a
+Zipf-like distribution, then times the first page of GET /tasks/search
+(search_tasks) against LIKE for rare, common, multi-word and prefix queries.
+LIKE is timed twice: the first 20 rows in id order, which stops early but
+cannot rank, and every match, which is what ranking the results would take.
+
+    cd backend && python -m benchmarks.bench_search [tasks]
+"""
+import random
+import sys
+import time
+
+from app.search import fts_query, search_tasks
+from benchmarks.common import best_of, temp_database
+
+TASKS = 1_000_000
+VOCABULARY = 5000
+PAGE = 20
+
+LIKE_QUERY = """
+    SELECT id, project_id, title, status FROM tasks
+    WHERE title LIKE ? OR description LIKE ?
+    ORDER BY id LIMIT ?
+"""
+
+LIKE_ALL_QUERY = "SELECT id FROM tasks WHERE title LIKE ? OR description LIKE ?"
+
+
+def words(rng: random.Random, count: int) -> str:
+    # Low word numbers are far more frequent than high ones
+    return " ".join(f"w{int(VOCABULARY ** rng.random())}" for _ in range(count))
+
+
+def seed(conn, tasks: int):
+    rng = random.Random(42)
+    conn.execute("INSERT INTO users (username, password) VALUES ('bench', 'x')")
+    conn.executemany("INSERT INTO projects (name, description) VALUES (?, 'benchmark')", [(f"project{i}",) for i in range(100)])
+    batch = 50_000
+    for start in range(0, tasks, batch):
+        conn.executemany(
+            """
+            INSERT INTO tasks (project_id, title, description, status, assigned_user_id, created_by, created_date, modified_date)
+            VALUES (?, ?, ?, 'todo', 1, 1, '2025-01-01T00:00:00Z', '2025-01-01T00:00:00Z')
+            """,
+            [(rng.randint(1, 100), words(rng, 5), words(rng, 30)) for _ in range(min(batch, tasks - start))],
+        )
+        conn.commit()
+
+
+def run() -> int:
+    tasks = int(sys.argv[1]) if len(sys.argv) > 1 else TASKS
+    with temp_database() as db_pool, db_pool.connection() as conn:
+        start = time.perf_counter()
+        seed(conn, tasks)
+        print(f"seeded {tasks} tasks with the full-text index in {time.perf_counter() - start:.1f} s")
+        for label, text in (("rare word", f"w{VOCABULARY - 7}"), ("common word", "w3"), ("two words", "w12 w40"), ("prefix", "w49*")):
+            match = fts_query(text)
+            fts = best_of(lambda: search_tasks(conn, match, None, PAGE, 0))
+            # LIKE can only test the first word and cannot rank
+            pattern = f"%{text.split()[0].rstrip('*')}%"
+            like = best_of(lambda: conn.execute(LIKE_QUERY, (pattern, pattern, PAGE)).fetchall())
+            like_all = best_of(lambda: conn.execute(LIKE_ALL_QUERY, (pattern, pattern)).fetchall())
+            project = best_of(lambda: search_tasks(conn, match, 7, PAGE, 0))
+            print(
+                f"{label:12s} fts5 {fts * 1000:8.1f} ms (one project {project * 1000:7.1f} ms)   "
+                f"like first page {like * 1000:8.1f} ms   like all matches {like_all * 1000:8.1f} ms"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
@@ -0,0 +1,115 @@
+"""
+Board and task list serialization, before and after the fast path.
+
+Renders one project of 20k tasks the way the routes did before (rows read by
+column name into fresh nested dicts, walked by FastAPI's jsonable_encoder, then
+json.dumps) and the way they do now (positional rows, users interned per
+response, dump_json straight to bytes). Reports throughput in MB of JSON per
+second, the peak traced memory and the memory blocks the payload holds before
+it is serialized.
+
+    cd backend && python -m benchmarks.bench_serialization
+"""
+import json
+import sys
+import tracemalloc
+
+from fastapi.encoders import jsonable_encoder
+
+from app.board_loader import load_boards
+from app.cache import dump_json
+from app.crud.tasks import TASKS_BY_PROJECT_QUERY, _render_tasks
+from benchmarks.common import best_of, seed_boards, temp_database
+
+MEMBERS = 20
+TASKS = 20_000
+
+
+def legacy_board_task(task, users=None) -> dict:
+    # users is ignored: every task builds its own user dicts, as before
+    return {
+        "id": task["id"],
+        "project_id": task["project_id"],
+        "title": task["title"],
+        "description": task["description"],
+        "status": task["status"],
+        "assigned_user_id": task["assigned_user_id"],
+        "assignedUser": {"id": task["assigned_user_id"], "username": task["assigned_user_name"]} if task["assigned_user_id"] else None,
+        "created_by": task["created_by"],
+        "createdBy": {"id": task["created_by"], "username": task["created_by_name"]},
+        "created_date": task["created_date"],
+        "modified_date": task["modified_date"],
+        "version": task["version"],
+    }
+
+
+def legacy_project_task(task) -> dict:
+    return {
+        "id": task["id"],
+        "projectId": task["project_id"],
+        "title": task["title"],
+        "description": task["description"],
+        "status": task["status"],
+        "createdDate": task["created_date"],
+        "modifiedDate": task["modified_date"],
+        "version": task["version"],
+        "assignedUser": {"id": task["assigned_user_id"], "username": task["assigned_user_username"]} if task["assigned_user_id"] else None,
+        "createdBy": {"id": task["created_user_id"], "username": task["created_user_username"]},
+    }
+
+
+def render_legacy(content) -> bytes:
+    # What returning a dict from a route costs: the encoder walk, then JSONResponse.render
+    return json.dumps(jsonable_encoder(content), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def payload_blocks(build) -> tuple:
+    """Peak traced bytes of build() and the blocks still held by its result."""
+    tracemalloc.start()
+    before = sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+    result = build()
+    held = sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename")) - before
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del result
+    return peak, held
+
+
+def run() -> int:
+    with temp_database() as db_pool, db_pool.connection() as conn:
+        seed_boards(conn, projects=1, members=MEMBERS, tasks=TASKS)
+        tasks_query = TASKS_BY_PROJECT_QUERY + "    ORDER BY t.id\n"
+        cases = {
+            "GET /projects/": (
+                lambda: load_boards(conn, legacy_board_task),
+                lambda content: render_legacy({"projects": content}),
+                lambda: load_boards(conn),
+                lambda content: dump_json({"projects": content}),
+            ),
+            "GET /tasks": (
+                lambda: [legacy_project_task(task) for task in conn.execute(tasks_query, (1,)).fetchall()],
+                render_legacy,
+                lambda: _render_tasks(conn, tasks_query, (1,), None)[0],
+                lambda body: body,
+            ),
+        }
+        faster = True
+        for name, (old_build, old_render, new_build, new_render) in cases.items():
+            timings = {}
+            for label, build, render in (("before", old_build, old_render), ("after", new_build, new_render)):
+                body = render(build())
+                seconds = best_of(lambda: render(build()))
+                peak, held = payload_blocks(build)
+                timings[label] = seconds
+                print(
+                    f"{name:>15} {label:>6}: {seconds * 1000:7.1f} ms, {len(body) / seconds / 1e6:6.1f} MB/s, "
+                    f"peak {peak / 2**20:5.1f} MiB, {held:>7} blocks held"
+                )
+            assert json.loads(old_render(old_build())) == json.loads(new_render(new_build()))
+            print(f"{name:>15} speedup: {timings['before'] / timings['after']:.1f}x")
+            faster = faster and timings["after"] < timings["before"]
+    return 0 if faster else 1
+
+
+if __name__ == "__main__":
+    sys.exit(run())
@@ -0,0 +1,45 @@
+"""
+Cold start of a worker.
+
+Times, in fresh interpreters, importing the application and then serving the
+first request through its lifespan, against a new database file each run.
+
+    cd backend && python -m benchmarks.bench_startup
+"""
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+RUNS = 7
+
+SCRIPT = """
+import time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(main.app) as client:
+    client.get("/projects/")
+served = time.perf_counter()
+print(imported - started, served - started)
+"""
+
+
+def run() -> int:
+    imports, firsts = [], []
+    for n in range(RUNS):
+        with tempfile.TemporaryDirectory() as directory:
+            env = dict(os.environ, TASKFLOW_DB_PATH=os.path.join(directory, "startup.db"))
+            output = subprocess.run([sys.executable, "-c", SCRIPT], env=env, capture_output=True, text=True, check=True).stdout
+        imported, served = map(float, output.split())
+        imports.append(imported)
+        firsts.append(served)
+    print(f"import main:    median {statistics.median(imports) * 1000:6.1f} ms, best {min(imports) * 1000:6.1f} ms")
+    print(f"first response: median {statistics.median(firsts) * 1000:6.1f} ms, best {min(firsts) * 1000:6.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
@@ -0,0 +1,45 @@
+"""
+Streamed vs buffered board export.
+
+Compares peak Python memory and time to the first project between
+load_boards (what /projects/ returns) and iter_boards (what ?stream=true sends).
+
+    cd backend && python -m benchmarks.bench_streaming
+"""
+import json
+import sys
+import time
+import tracemalloc
+
+from app.board_loader import iter_boards, load_boards
+from benchmarks.common import seed_boards, temp_database
+
+PROJECTS = 200
+TASKS = 100_000
+
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    first = None
+    for project in fn():
+        if first is None:
+            first = time.perf_counter() - start
+        json.dumps(project)
+    total = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return first, total, peak
+
+
+def run() -> int:
+    with temp_database() as db_pool, db_pool.connection() as conn:
+        seed_boards(conn, projects=PROJECTS, members=20, tasks=TASKS)
+        for name, fn in (("buffered", lambda: load_boards(conn)), ("streamed", lambda: iter_boards(conn))):
+            first, total, peak = measure(fn)
+            print(f"{name}: first project {first * 1000:7.1f} ms, total {total * 1000:7.1f} ms, peak {peak / 2**20:6.1f} MiB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
@@ -0,0 +1,69 @@
+"""
+WebSocket fan-out load test.
+
+Connects thousands of simulated sockets (a few of them slow) to the
+ConnectionManager and measures how long each broadcast takes to reach
+every healthy socket.
+
+    cd backend && python -m benchmarks.bench_websocket_fanout
+"""
+import asyncio
+import statistics
+import sys
+import time
+
+from app.websocket_manager import ConnectionManager
+
+SOCKETS = 5000
+SLOW_SOCKETS = 50
+PROJECTS = 10
+MESSAGES = 50
+
+
+class SimulatedSocket:
+    def __init__(self, delay: float = 0):
+        self.delay = delay
+        self.received = 0
+
+    async def accept(self):
+        pass
+
+    async def send_json(self, message):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.received += 1
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+async def scenario():
+    manager = ConnectionManager()
+    healthy = [SimulatedSocket() for _ in range(SOCKETS)]
+    slow = [SimulatedSocket(delay=5) for _ in range(SLOW_SOCKETS)]
+    for i, ws in enumerate(healthy + slow):
+        await manager.connect(ws, i % PROJECTS)
+
+    fan_out = []
+    for n in range(1, MESSAGES + 1):
+        started = time.perf_counter()
+        for project_id in range(PROJECTS):
+            await manager.broadcast({"n": n}, project_id=project_id)
+        while any(ws.received < n for ws in healthy):
+            await asyncio.sleep(0)
+        fan_out.append(time.perf_counter() - started)
+
+    for ws in healthy + slow:
+        manager.disconnect(ws)
+    return fan_out
+
+
+def run() -> int:
+    fan_out = asyncio.run(scenario())
+    print(f"{SOCKETS} sockets ({SLOW_SOCKETS} slow), {MESSAGES} messages per project")
+    print(f"fan-out to all healthy sockets: median {statistics.median(fan_out) * 1000:.1f} ms, max {max(fan_out) * 1000:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
@@ -0,0 +1,70 @@
+import os
+import sqlite3
+import tempfile
+import time
+from contextlib import contextmanager
+
+from app import database
+from app.database import ConnectionPool, create_tables
+
+
+@contextmanager
+def temp_database(size: int = 4):
+    """Yield a ConnectionPool on a throwaway database file with the application schema."""
+    with tempfile.TemporaryDirectory() as directory:
+        db_pool = ConnectionPool(os.path.join(directory, "bench.db"), size=size)
+        with db_pool.connection() as conn:
+            create_tables(conn)
+        try:
+            yield db_pool
+        finally:
+            db_pool.close()
+
+
+@contextmanager
+def serve_database(db_pool: ConnectionPool):
+    """Point the application's connection pools at the database of `db_pool` while the block runs."""
+    pools = database.pool, database.read_pool
+    database.pool, database.read_pool = db_pool, ConnectionPool(db_pool.path, size=db_pool.size, read_only=True)
+    try:
+        yield
+    finally:
+        database.read_pool.close()
+        database.pool, database.read_pool = pools
+
+
+def seed_boards(conn: sqlite3.Connection, projects: int, members: int, tasks: int):
+    """Insert `projects` projects sharing `members` users, with `tasks` tasks spread evenly."""
+    conn.executemany(
+        "INSERT INTO users (username, password) VALUES (?, 'x')",
+        ((f"user{i}",) for i in range(members)),
+    )
+    conn.executemany(
+        "INSERT INTO projects (name, description) VALUES (?, 'benchmark')",
+        ((f"project{i}",) for i in range(projects)),
+    )
+    conn.executemany(
+        "INSERT INTO user_projects (user_id, project_id) VALUES (?, ?)",
+        ((user_id, project_id) for project_id in range(1, projects + 1) for user_id in range(1, members + 1)),
+    )
+    conn.executemany(
+        """
+        INSERT INTO tasks (project_id, title, description, status, assigned_user_id, created_by, created_date, modified_date)
+        VALUES (?, ?, 'benchmark task', ?, ?, ?, '2025-01-01T00:00:00Z', '2025-01-01T00:00:00Z')
+        """,
+        (
+            (i % projects + 1, f"task{i}", ("todo", "inProgress", "done")[i % 3], i % members + 1, (i * 7) % members + 1)
+            for i in range(tasks)
+        ),
+    )
+    conn.commit()
+
+
+def best_of(fn, repeat: int = 3) -> float:
+    """Return the fastest wall-clock time of `repeat` calls to fn, in seconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
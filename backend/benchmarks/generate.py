@@ -0,0 +1,161 @@
+"""
+Seeded synthetic data: users, projects, memberships and tasks with realistic skew.
+
+- Project sizes follow a Zipf law: project 1 is the largest, a few projects
+  hold most of the tasks and most of the members.
+- Every user belongs to a few projects, each project has at least one member.
+- Tasks are assigned to members of their project, a few members doing most of
+  the work; about one task in ten is unassigned.
+- Most tasks are done; dates span a year, each task modified a few days after
+  it was created.
+
+Every user's password is PASSWORD. The same seed always gives the same data.
+
+    cd backend && python -m benchmarks.generate data/synthetic.db --scale large
+"""
+import argparse
+import itertools
+import os
+import random
+import sqlite3
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from app.auth.security import hash_password
+from app.database import create_tables
+
+PASSWORD = "password"
+SEED = 42
+# Exponent of the Zipf law of project sizes; 0 spreads tasks evenly
+SKEW = 1.1
+BATCH = 50_000
+
+STATUSES = ("todo", "inProgress", "done")
+STATUS_WEIGHTS = (25, 15, 60)
+VERBS = ("Fix", "Add", "Review", "Update", "Remove", "Test", "Document", "Refactor", "Deploy", "Design")
+NOUNS = ("login", "cable", "report", "sensor", "dashboard", "export", "pump", "schema", "invoice", "firmware", "search", "board")
+START = datetime(2025, 1, 1)
+# Mean days between a task's creation and its last modification
+MEAN_CYCLE_DAYS = 4
+
+
+@dataclass(frozen=True)
+class Scale:
+    users: int
+    projects: int
+    tasks: int
+    # Projects each user joins on average
+    memberships: int
+    # Sockets watching the largest board in the WebSocket benchmark
+    sockets: int
+
+
+SCALES = {
+    "small": Scale(users=200, projects=50, tasks=20_000, memberships=3, sockets=200),
+    "medium": Scale(users=2000, projects=300, tasks=200_000, memberships=4, sockets=1000),
+    "large": Scale(users=5000, projects=1000, tasks=1_000_000, memberships=5, sockets=5000),
+}
+
+
+def zipf_weights(count: int, skew: float = SKEW) -> list:
+    """Cumulative weights of ranks 1..count under a Zipf law, for random.choices(cum_weights=...)."""
+    return list(itertools.accumulate(1 / rank ** skew for rank in range(1, count + 1)))
+
+
+def _task_rows(rng: random.Random, count: int, first: int, project_weights: list, members: dict) -> list:
+    projects = rng.choices(range(1, len(project_weights) + 1), cum_weights=project_weights, k=count)
+    statuses = rng.choices(STATUSES, weights=STATUS_WEIGHTS, k=count)
+    rows = []
+    for n, (project_id, status) in enumerate(zip(projects, statuses), start=first):
+        team = members[project_id]
+        # Squaring the draw favours the first members of the team
+        assignee = None if rng.random() < 0.1 else team[int(len(team) * rng.random() ** 2)]
+        created = START + timedelta(seconds=rng.randrange(365 * 86400))
+        modified = created + timedelta(seconds=int(rng.expovariate(1 / (MEAN_CYCLE_DAYS * 86400))))
+        rows.append((
+            project_id,
+            f"{rng.choice(VERBS)} {rng.choice(NOUNS)} {n}",
+            f"{rng.choice(VERBS)} the {rng.choice(NOUNS)} and the {rng.choice(NOUNS)}",
+            status,
+            assignee,
+            rng.choice(team),
+            created.isoformat(timespec="seconds") + "Z",
+            modified.isoformat(timespec="seconds") + "Z",
+        ))
+    return rows
+
+
+def generate(conn: sqlite3.Connection, scale: Scale, seed: int = SEED, skew: float = SKEW, batch: int = BATCH) -> dict:
+    """
+    Fill an empty database with the application schema.
+
+    Tasks are inserted `batch` at a time, one transaction each.
+
+    Returns:
+        dict: Row counts per table.
+    """
+    rng = random.Random(seed)
+    hashed = hash_password(PASSWORD)
+    conn.executemany(
+        "INSERT INTO users (username, password) VALUES (?, ?)",
+        ((f"user{i}", hashed) for i in range(1, scale.users + 1)),
+    )
+    conn.executemany(
+        "INSERT INTO projects (name, description) VALUES (?, ?)",
+        ((f"project{i}", f"Synthetic project {i}") for i in range(1, scale.projects + 1)),
+    )
+
+    project_weights = zipf_weights(scale.projects, skew)
+    # One member per project to begin with, then each user joins popular projects more often
+    members = {project_id: [(project_id - 1) % scale.users + 1] for project_id in range(1, scale.projects + 1)}
+    for user_id in range(1, scale.users + 1):
+        joined = rng.choices(range(1, scale.projects + 1), cum_weights=project_weights, k=1 + int(rng.expovariate(1 / scale.memberships)))
+        for project_id in set(joined):
+            if user_id not in members[project_id]:
+                members[project_id].append(user_id)
+    conn.executemany(
+        "INSERT INTO user_projects (user_id, project_id) VALUES (?, ?)",
+        ((user_id, project_id) for project_id, team in members.items() for user_id in team),
+    )
+    conn.commit()
+
+    for offset in range(0, scale.tasks, batch):
+        conn.executemany(
+            """
+            INSERT INTO tasks (project_id, title, description, status, assigned_user_id, created_by, created_date, modified_date)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            _task_rows(rng, min(batch, scale.tasks - offset), offset + 1, project_weights, members),
+        )
+        conn.commit()
+    return {
+        "users": scale.users,
+        "projects": scale.projects,
+        "user_projects": sum(len(team) for team in members.values()),
+        "tasks": scale.tasks,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Write a synthetic TaskFlow database.")
+    parser.add_argument("path", help="database file to create")
+    parser.add_argument("--scale", choices=SCALES, default="small")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--skew", type=float, default=SKEW)
+    args = parser.parse_args(argv)
+    if os.path.exists(args.path):
+        parser.error(f"{args.path} already exists")
+    conn = sqlite3.connect(args.path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    create_tables(conn)
+    started = time.perf_counter()
+    counts = generate(conn, SCALES[args.scale], args.seed, args.skew)
+    conn.close()
+    print(f"{counts} in {time.perf_counter() - started:.1f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,329 @@
+"""
+Endpoint benchmark suite with a regression gate.
+
+Generates a synthetic database at the chosen scale (benchmarks.generate),
+serves it in-process through the ASGI app (no network, no server) and drives
+every route with CONCURRENCY clients. For each scenario it reports
+throughput, p50/p95/p99 latency, SQL statements per request and peak RSS.
+Peak RSS includes the memory-mapped database pages of every pooled
+connection (PRAGMA mmap_size), so it grows with the database file.
+The WebSocket scenario times a task write until it reached every socket
+watching the board, coalescing window included.
+
+Results are compared with the baseline stored for the scale in BASELINE;
+the run exits with 1 when a scenario regressed beyond the tolerance, fails
+requests, or runs more SQL per request than before. Timings depend on the
+machine: record the baseline where the gate runs, with --update-baseline.
+
+    cd backend && python -m benchmarks.suite [--scale small] [--tolerance 0.5] [--update-baseline]
+"""
+import argparse
+import asyncio
+import contextvars
+import json
+import os
+import random
+import resource
+import sqlite3
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+import httpx
+
+from app import database
+from app.cache import board_cache
+from app.database import ConnectionPool, create_tables
+from app.events import TASK_EVENTS
+from app.websocket_manager import manager
+from benchmarks.generate import NOUNS, PASSWORD, SCALES, Scale, generate
+from main import app
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+CONCURRENCY = 8
+REQUESTS = 400
+# Scenarios returning whole boards send every task; fewer requests keep the run short
+HEAVY_REQUESTS = 20
+# Login verifies bcrypt in the auth process pool
+LOGIN_REQUESTS = 16
+BROADCASTS = 20
+TOLERANCE = 0.5
+# Latencies this close to the baseline are noise whatever the ratio
+LATENCY_SLACK_MS = 2.0
+
+# Statements run by the request of the current task
+_statements: contextvars.ContextVar = contextvars.ContextVar("statements", default=None)
+
+
+class CountingPool(ConnectionPool):
+    """A ConnectionPool whose connections count the statements each request runs."""
+
+    def acquire(self) -> sqlite3.Connection:
+        conn = super().acquire()
+        # The executor copies the request's context, so the trace callback sees its counter
+        conn.set_trace_callback(_count_statement)
+        return conn
+
+
+def _count_statement(statement: str):
+    # Statements SQLite runs on the application's behalf (triggers, the full-text index) are traced as "-- ..."
+    if statement.startswith("--"):
+        return
+    counter = _statements.get()
+    if counter is not None:
+        counter[0] += 1
+
+
+@dataclass
+class Scenario:
+    name: str
+    # Called as request(rng) -> (method, url, json body or None)
+    request: Callable
+    requests: int = REQUESTS
+
+
+def scenarios(scale: Scale) -> list:
+    def project(rng):
+        # The largest boards are the most viewed
+        return min(int(scale.projects * rng.random() ** 3) + 1, scale.projects)
+
+    def user(rng):
+        return rng.randint(1, scale.users)
+
+    def task(rng):
+        return rng.randint(1, scale.tasks)
+
+    def new_task(rng):
+        project_id = project(rng)
+        return {
+            "id": None, "project_id": project_id, "title": "Benchmark task", "description": "Created by the suite",
+            "status": "todo", "assigned_user_id": None, "created_by": 1,
+            "created_date": "2025-06-01T00:00:00Z", "modified_date": "2025-06-01T00:00:00Z",
+        }
+
+    return [
+        Scenario("GET /projects/", lambda rng: ("GET", "/projects/", None), HEAVY_REQUESTS),
+        Scenario("GET /projects/ page", lambda rng: ("GET", "/projects/?limit=20", None)),
+        Scenario("GET /projects-with-details/", lambda rng: ("GET", "/projects-with-details/", None), HEAVY_REQUESTS),
+        Scenario("GET /tasks", lambda rng: ("GET", f"/tasks?project_id={project(rng)}", None)),
+        Scenario("GET /tasks filtered page", lambda rng: ("GET", f"/tasks?project_id={project(rng)}&status=todo&limit=50", None)),
+        Scenario("GET /tasks/search", lambda rng: ("GET", f"/tasks/search?q={rng.choice(NOUNS)}", None)),
+        Scenario("GET /user-data/", lambda rng: ("GET", f"/user-data/?user_id={user(rng)}", None)),
+        Scenario("GET /users/", lambda rng: ("GET", "/users/", None)),
+        Scenario("GET /changes", lambda rng: ("GET", f"/changes?project_id={project(rng)}", None)),
+        Scenario("GET /projects/{id}/stats", lambda rng: ("GET", f"/projects/{project(rng)}/stats", None)),
+        Scenario("GET /users/{id}/workload", lambda rng: ("GET", f"/users/{user(rng)}/workload", None)),
+        Scenario("POST /tasks/", lambda rng: ("POST", "/tasks/", new_task(rng))),
+        Scenario("PATCH /tasks/{id}", lambda rng: ("PATCH", f"/tasks/{task(rng)}", {"status": rng.choice(["todo", "done"])})),
+        Scenario("POST /login/", lambda rng: ("POST", "/login/", {"username": f"user{user(rng)}", "password": PASSWORD}), LOGIN_REQUESTS),
+    ]
+
+
+def percentile(values: list, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * q), len(ordered) - 1)]
+
+
+def peak_rss_mib() -> float:
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def summarize(latencies: list, statements: list, errors: int, elapsed: float) -> dict:
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "statements": round(sum(statements) / len(statements), 2),
+        "peak_rss_mib": round(peak_rss_mib(), 1),
+    }
+
+
+async def drive(client: httpx.AsyncClient, scenario: Scenario, seed: int) -> dict:
+    rng = random.Random(seed)
+    requests = [scenario.request(rng) for _ in range(scenario.requests)]
+    latencies, statements = [], []
+    errors = 0
+
+    async def worker(mine: list):
+        nonlocal errors
+        for method, url, body in mine:
+            counter = [0]
+            token = _statements.set(counter)
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, url, json=body)
+            finally:
+                _statements.reset(token)
+            latencies.append(time.perf_counter() - started)
+            statements.append(counter[0])
+            if response.status_code >= 400:
+                errors += 1
+
+    # One request first, so caches and lazily started pools are warm
+    await worker(requests[:1])
+    latencies.clear(), statements.clear()
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(requests[i::CONCURRENCY]) for i in range(CONCURRENCY)))
+    return summarize(latencies, statements, errors, time.perf_counter() - started)
+
+
+class WatchingSocket:
+    """Stands in for a browser watching a board; records when each task event frame arrived."""
+
+    def __init__(self):
+        self.arrived = asyncio.Event()
+
+    async def accept(self):
+        pass
+
+    async def send_json(self, message):
+        if message.get("type") == TASK_EVENTS:
+            self.arrived.set()
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+async def broadcast(client: httpx.AsyncClient, scale: Scale) -> dict:
+    """POST /tasks/ on the largest board and wait until every socket watching it got the event."""
+    sockets = [WatchingSocket() for _ in range(scale.sockets)]
+    for ws in sockets:
+        await manager.connect(ws, 1)
+    latencies, statements = [], []
+    errors = 0
+    body = {
+        "id": None, "project_id": 1, "title": "Broadcast", "description": "d", "status": "todo",
+        "assigned_user_id": None, "created_by": 1, "created_date": "2025-06-01T00:00:00Z", "modified_date": "2025-06-01T00:00:00Z",
+    }
+    started_all = time.perf_counter()
+    try:
+        for _ in range(BROADCASTS):
+            for ws in sockets:
+                ws.arrived.clear()
+            counter = [0]
+            token = _statements.set(counter)
+            started = time.perf_counter()
+            try:
+                response = await client.post("/tasks/", json=body)
+            finally:
+                _statements.reset(token)
+            await asyncio.gather(*(ws.arrived.wait() for ws in sockets))
+            latencies.append(time.perf_counter() - started)
+            statements.append(counter[0])
+            errors += response.status_code >= 400
+    finally:
+        for ws in sockets:
+            manager.disconnect(ws)
+    return summarize(latencies, statements, errors, time.perf_counter() - started_all)
+
+
+async def run_suite(scale: Scale, seed: int) -> dict:
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        for scenario in scenarios(scale):
+            results[scenario.name] = await drive(client, scenario, seed)
+            print(format_result(scenario.name, results[scenario.name]), flush=True)
+        name = f"WS /ws/kanban x{scale.sockets}"
+        results[name] = await broadcast(client, scale)
+        print(format_result(name, results[name]), flush=True)
+    return results
+
+
+def format_result(name: str, result: dict) -> str:
+    return (
+        f"{name:30s} {result['rps']:8.1f} req/s  p50 {result['p50_ms']:8.2f}  p95 {result['p95_ms']:8.2f}  "
+        f"p99 {result['p99_ms']:8.2f} ms  {result['statements']:5.1f} sql/req  rss {result['peak_rss_mib']:7.1f} MiB"
+        + (f"  {result['errors']} errors" if result["errors"] else "")
+    )
+
+
+def compare(results: dict, baseline: dict, tolerance: float = TOLERANCE) -> list:
+    """
+    Check results against a baseline of the same scale.
+
+    Returns:
+        list: One message per regression, empty when the run passes.
+    """
+    regressions = []
+    for name, result in results.items():
+        if result["errors"]:
+            regressions.append(f"{name}: {result['errors']} failed requests")
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result["rps"] < base["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {result['rps']} req/s, baseline {base['rps']}")
+        # Tails are noisier than medians; p99 is reported, not gated
+        for metric, allowed in (("p50_ms", tolerance), ("p95_ms", 2 * tolerance)):
+            if result[metric] > base[metric] * (1 + allowed) + LATENCY_SLACK_MS:
+                regressions.append(f"{name}: {metric} {result[metric]}, baseline {base[metric]}")
+        # Statement counts do not depend on the machine: any increase is a regression
+        if result["statements"] > base["statements"] + 0.05:
+            regressions.append(f"{name}: {result['statements']} SQL statements per request, baseline {base['statements']}")
+        if result["peak_rss_mib"] > base["peak_rss_mib"] * (1 + tolerance):
+            regressions.append(f"{name}: peak RSS {result['peak_rss_mib']} MiB, baseline {base['peak_rss_mib']}")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark every route on synthetic data and compare with the baseline.")
+    parser.add_argument("--scale", choices=SCALES, default="small")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--database", help="reuse a database written by benchmarks.generate at this scale")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="allowed relative slowdown of throughput and p50, twice that for p95")
+    parser.add_argument("--update-baseline", action="store_true", help="store this run as the baseline of the scale")
+    args = parser.parse_args(argv)
+    scale = SCALES[args.scale]
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = args.database or os.path.join(directory, "suite.db")
+        db_pool = CountingPool(path)
+        read_pool = CountingPool(path, read_only=True)
+        if not args.database:
+            started = time.perf_counter()
+            with db_pool.connection() as conn:
+                create_tables(conn)
+                generate(conn, scale, args.seed)
+            print(f"generated the {args.scale} dataset in {time.perf_counter() - started:.1f} s")
+        pools = database.pool, database.read_pool
+        database.pool, database.read_pool = db_pool, read_pool
+        board_cache.clear()
+        try:
+            results = asyncio.run(run_suite(scale, args.seed))
+        finally:
+            database.pool, database.read_pool = pools
+            db_pool.close()
+            read_pool.close()
+            board_cache.clear()
+
+    baselines = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baselines = json.load(f)
+    if args.update_baseline:
+        baselines[args.scale] = results
+        with open(args.baseline, "w") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"stored the baseline of the {args.scale} scale in {args.baseline}")
+        return 0
+    if args.scale not in baselines:
+        print(f"no {args.scale} baseline in {args.baseline}, run with --update-baseline to record one")
+        return 0
+    regressions = compare(results, baselines[args.scale], args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    print(f"{len(regressions)} regressions against the baseline" if regressions else "no regression against the baseline")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
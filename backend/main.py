@@ -1,14 +1,36 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import cursor, conn
 from app.websocket_manager import manager, websocket_endpoint
-from app.database import create_tables
+from app.database import close_db, init_db, run_blocking
 from app.utils.logger import logger
 from fastapi import WebSocket
-from app.crud import users, projects, tasks, user_projects
-from app.auth import jwt_handler, security
+from app.crud import users, projects, tasks, user_projects, changes, cache, stats, analytics, metrics, transfer
+from app.auth.security import shutdown_auth_pool
+from app.analytics import analytics as reports
+from app.archive import ARCHIVE, archiver
+from app.pagination import NEXT_CURSOR_HEADER
+from app.changelog import VERSION_HEADER
+from app.metrics import METRICS, MetricsMiddleware
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Nothing touches the database at import: workers boot fast and the path can still be configured
+    await run_blocking(init_db)
+    if ARCHIVE:
+        archiver.start()
+    logger.info("Application started.")
+    yield
+    await archiver.stop()
+    await manager.broker.stop()
+    shutdown_auth_pool()
+    await run_blocking(reports.close)
+    await run_blocking(close_db)
+    logger.info("Application stopped.")
+
+
+app = FastAPI(lifespan=lifespan)
 
 # CORS
 app.add_middleware(
@@ -17,20 +39,26 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag", VERSION_HEADER],
 )
 
+# Latency, status and SQL of every request, served on /metrics
+if METRICS:
+    app.add_middleware(MetricsMiddleware)
+
 # Include routers here if you modularize even more
 
 # WebSocket route
 app.websocket("/ws/kanban")(websocket_endpoint)
 
-# Create tables on startup
-create_tables()
-
-logger.info("Application started.")
-
 # Routes from CRUD
 app.include_router(users.router)
 app.include_router(projects.router)
 app.include_router(tasks.router)
 app.include_router(user_projects.router)
+app.include_router(changes.router)
+app.include_router(cache.router)
+app.include_router(stats.router)
+app.include_router(analytics.router)
+app.include_router(metrics.router)
+app.include_router(transfer.router)
@@ -0,0 +1,22 @@
+import itertools
+import os
+import pytest
+
+# Every test process gets its own database in memory, created on first use by the app;
+# nothing is read from or left in data/. Set TASKFLOW_DB_PATH to run against a file instead.
+os.environ.setdefault("TASKFLOW_DB_PATH", ":memory:")
+
+# Imported once the environment is set
+from app import database  # noqa: E402
+
+_usernames = itertools.count(1)
+
+
+@pytest.fixture
+def user_id() -> int:
+    """Id of a new user, for tests that need the joins on users to find someone."""
+    database.init_db()
+    with database.pool.connection() as conn:
+        cursor = conn.execute("INSERT INTO users (username, password) VALUES (?, 'x')", (f"fixture-user-{next(_usernames)}",))
+        conn.commit()
+    return cursor.lastrowid
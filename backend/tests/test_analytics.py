@@ -0,0 +1,148 @@
+import os
+import sqlite3
+import tempfile
+from datetime import date
+import duckdb
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from app import analytics as reports
+from app.analytics import Analytics, assignee_history, attach_sqlite, cycle_time, export_parquet, throughput
+from app.archive import archive_batch
+from app.database import create_tables
+from tests.test_projects import make_board_db
+
+client = TestClient(app)
+
+def make_report_db() -> sqlite3.Connection:
+    conn = make_board_db(2, tasks_per_project=0)
+    conn.executemany("""
+        INSERT INTO tasks (project_id, title, description, status, assigned_user_id, created_by, created_date, modified_date)
+        VALUES (?, 't', 'd', ?, ?, 1, ?, ?)
+    """, [
+        # Finished after 1, 3 and 5 days, in the weeks of 2025-01-06 and 2025-01-13
+        (1, "done", 2, "2025-01-06T09:00:00Z", "2025-01-07T09:00:00Z"),
+        (1, "Done", 2, "2025-01-06T09:00:00.000Z", "2025-01-09T09:00:00.000Z"),
+        (1, "done", 3, "2025-01-08T12:00:00+00:00", "2025-01-13T12:00:00+00:00"),
+        (1, "todo", 3, "2025-01-14T00:00:00Z", "2025-01-15T00:00:00Z"),
+        (2, "done", 3, "2025-01-13", "2025-01-14"),
+    ])
+    # The reports read the archive too: the two tasks finished before 2025-01-10 are counted from there
+    assert len(archive_batch(conn, "2025-01-10")) == 2
+    conn.commit()
+    return conn
+
+# The columns the reports read, typed as the sqlite extension reports them
+DUCKDB_TABLES = {
+    "users": "id INTEGER, username VARCHAR",
+    "projects": "id INTEGER, name VARCHAR, description VARCHAR",
+    "tasks": "id INTEGER, project_id INTEGER, title VARCHAR, status VARCHAR, assigned_user_id INTEGER, created_date VARCHAR, modified_date VARCHAR",
+    "archived_tasks": "id INTEGER, project_id INTEGER, title VARCHAR, status VARCHAR, assigned_user_id INTEGER, created_date VARCHAR, modified_date VARCHAR",
+}
+
+def copy_to_duckdb(source: sqlite3.Connection):
+    """An open_database for Analytics copying the rows of `source`, so reports are tested without the sqlite extension."""
+    # Read here: the database is opened on an analytics thread, where `source` cannot be used
+    tables = {}
+    for table, columns in DUCKDB_TABLES.items():
+        names = ", ".join(column.split()[0] for column in columns.split(", "))
+        tables[table] = (columns, [tuple(row) for row in source.execute(f"SELECT {names} FROM {table}")])
+
+    def open_database(path):
+        conn = duckdb.connect()
+        conn.execute(f"ATTACH ':memory:' AS {reports.CATALOG}")
+        for table, (columns, rows) in tables.items():
+            conn.execute(f"CREATE TABLE {reports.CATALOG}.{table} ({columns})")
+            if rows:
+                conn.executemany(f"INSERT INTO {reports.CATALOG}.{table} VALUES ({', '.join('?' * len(rows[0]))})", rows)
+        return conn
+    return open_database
+
+@pytest.fixture
+def report_analytics():
+    engine = Analytics(":memory:", open_database=copy_to_duckdb(make_report_db()))
+    yield engine
+    engine.close()
+
+def test_cycle_time_per_project(report_analytics):
+    rows = report_analytics.call(cycle_time)
+    assert rows == [
+        {"project_id": 1, "name": "project1", "done": 3, "avg_days": 3.0, "p50_days": 3.0, "p90_days": 4.6},
+        {"project_id": 2, "name": "project2", "done": 1, "avg_days": 1.0, "p50_days": 1.0, "p90_days": 1.0},
+    ]
+    assert [row["project_id"] for row in report_analytics.call(cycle_time, 2)] == [2]
+
+def test_throughput_counts_every_week_of_the_window(report_analytics):
+    rows = report_analytics.call(throughput, 3, date(2025, 1, 15))
+    assert rows == [
+        {"week": "2024-12-30", "created": 0, "done": 0},
+        {"week": "2025-01-06", "created": 3, "done": 2},
+        {"week": "2025-01-13", "created": 2, "done": 2},
+    ]
+    assert report_analytics.call(throughput, 1, date(2025, 1, 15), 1) == [{"week": "2025-01-13", "created": 1, "done": 1}]
+
+def test_assignee_history(report_analytics):
+    rows = report_analytics.call(assignee_history, 2, date(2025, 1, 15))
+    assert rows == [
+        {"user_id": 2, "username": "user1", "week": "2025-01-06", "done": 2, "avg_days": 2.0},
+        {"user_id": 3, "username": "user2", "week": "2025-01-13", "done": 2, "avg_days": 3.0},
+    ]
+    assert report_analytics.call(assignee_history, 2, date(2025, 1, 15), 2, 3) == [
+        {"user_id": 3, "username": "user2", "week": "2025-01-13", "done": 1, "avg_days": 1.0},
+    ]
+
+def test_parquet_export_round_trips(report_analytics, tmp_path):
+    exported = report_analytics.call(export_parquet, str(tmp_path))
+    assert {table: entry["rows"] for table, entry in exported.items()} == {"projects": 2, "tasks": 3, "archived_tasks": 2}
+    conn = duckdb.connect()
+    tasks = conn.execute("SELECT id, status FROM read_parquet(?) ORDER BY id", [exported["archived_tasks"]["path"]]).fetchall()
+    assert tasks == [(1, "done"), (2, "Done")]
+    assert "password" not in str(conn.execute("DESCRIBE SELECT * FROM read_parquet(?)", [exported["projects"]["path"]]).fetchall())
+
+def test_report_endpoints(report_analytics, monkeypatch):
+    monkeypatch.setattr(reports, "analytics", report_analytics)
+    assert client.get("/analytics/cycle-time", params={"project_id": 2}).json()[0]["done"] == 1
+    weeks = client.get("/analytics/throughput", params={"weeks": 2, "until": "2025-01-15"}).json()
+    assert [week["done"] for week in weeks] == [2, 2]
+    history = client.get("/analytics/assignees", params={"weeks": 2, "until": "2025-01-15", "user_id": 2}).json()
+    assert [row["done"] for row in history] == [2]
+    assert client.get("/analytics/throughput", params={"weeks": 0}).status_code == 422
+
+def test_unavailable_engine_answers_503(monkeypatch):
+    def fail(path):
+        raise duckdb.IOException("extension not found")
+    engine = Analytics(":memory:", open_database=fail)
+    monkeypatch.setattr(reports, "analytics", engine)
+    try:
+        response = client.get("/analytics/cycle-time")
+        assert response.status_code == 503 and response.json()["detail"] == "Analytics are unavailable"
+    finally:
+        engine.close()
+
+def test_in_memory_database_answers_503(monkeypatch):
+    engine = Analytics(":memory:")
+    monkeypatch.setattr(reports, "analytics", engine)
+    try:
+        response = client.get("/analytics/throughput")
+        assert response.status_code == 503 and ":memory:" in response.json()["detail"]
+    finally:
+        engine.close()
+
+def test_sqlite_file_is_attached_read_only():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "analytics.db")
+        source = sqlite3.connect(path)
+        create_tables(source)
+        source.execute("INSERT INTO projects (name, description) VALUES ('p', 'd')")
+        source.commit()
+        try:
+            conn = attach_sqlite(path)
+        except duckdb.Error as e:
+            pytest.skip(f"DuckDB sqlite extension unavailable: {e}")
+        try:
+            assert conn.execute("SELECT name FROM taskflow.projects").fetchall() == [("p",)]
+            with pytest.raises(duckdb.Error):
+                conn.execute("DELETE FROM taskflow.projects")
+        finally:
+            conn.close()
+            source.close()
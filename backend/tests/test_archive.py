@@ -0,0 +1,76 @@
+import asyncio
+import random
+from datetime import datetime, timezone
+from fastapi.testclient import TestClient
+from main import app
+from app import database
+from app.archive import archive_batch, archive_cutoff, archive_done_tasks
+from app.search import fts_query, search_tasks
+from app.stats import check_counters, project_stats
+from tests.test_projects import make_board_db
+
+client = TestClient(app)
+
+def test_only_tasks_done_before_the_cutoff_move_and_counters_hold():
+    conn = make_board_db(2, tasks_per_project=4)
+    conn.execute("UPDATE tasks SET status = 'done' WHERE id IN (1, 2, 5)")
+    conn.execute("UPDATE tasks SET status = 'Done', modified_date = '2025-03-01' WHERE id = 6")
+    # Task 3 is old but open, task 6 was finished after the cutoff
+    before = project_stats(conn, 1), project_stats(conn, 2)
+    moved = archive_batch(conn, "2025-02-01", batch_size=2)
+    assert moved == [(1, 1), (1, 2)]
+    assert archive_batch(conn, "2025-02-01", batch_size=2) == [(2, 5)]
+    assert archive_batch(conn, "2025-02-01") == []
+    assert [row[0] for row in conn.execute("SELECT id FROM archived_tasks ORDER BY id")] == [1, 2, 5]
+    assert conn.execute("SELECT COUNT(*) FROM tasks WHERE id IN (1, 2, 5)").fetchone()[0] == 0
+    # Archiving does not change what the tasks count for, and the checker sees both tables
+    assert (project_stats(conn, 1), project_stats(conn, 2)) == before
+    assert check_counters(conn) == []
+    ops = conn.execute("SELECT entity_id, op, data FROM changes ORDER BY version").fetchall()
+    assert [tuple(op) for op in ops] == [(1, "deleted", '{"archived": true}'), (2, "deleted", '{"archived": true}'), (5, "deleted", '{"archived": true}')]
+    # Search covers the boards only: task1 is the title of tasks 2 and 6
+    assert [result["id"] for result in search_tasks(conn, fts_query("task1"), None, 10, 0)] == [6]
+
+def test_cutoff_is_comparable_with_stored_dates():
+    now = datetime(2025, 3, 31, 12, tzinfo=timezone.utc)
+    cutoff = archive_cutoff(30, now)
+    assert "2025-02-28T23:00:00Z" < cutoff < "2025-03-01T13:00:00Z"
+
+def done_task(project_id: int, title: str, modified_date: str) -> dict:
+    return {
+        "id": None,
+        "title": title,
+        "description": "Finished",
+        "status": "done",
+        "assigned_user_id": None,
+        "project_id": project_id,
+        "created_by": 1,
+        "created_date": "2024-01-01T00:00:00Z",
+        "modified_date": modified_date,
+    }
+
+def test_archived_tasks_leave_the_board_and_can_be_restored():
+    project_id = random.randint(10**6, 10**9)
+    recent = datetime.now(timezone.utc).isoformat()
+    tasks = [done_task(project_id, f"Old {i}", "2024-01-02T00:00:00Z") for i in range(3)] + [done_task(project_id, "Recent", recent)]
+    old = [result["id"] for result in client.post("/tasks/bulk", json=tasks).json()["results"]][:3]
+    assert len(client.get("/tasks", params={"project_id": project_id}).json()) == 4
+
+    assert asyncio.run(archive_done_tasks(days=30, batch_size=2, pause=0)) >= 3
+    board = client.get("/tasks", params={"project_id": project_id}).json()
+    assert [task["title"] for task in board] == ["Recent"]
+    first = client.get(f"/projects/{project_id}/archived-tasks", params={"limit": 2})
+    assert [task["id"] for task in first.json()] == old[:2]
+    assert first.json()[0]["archivedDate"] and first.json()[0]["createdBy"]["id"] in (1, None)
+    rest = client.get(f"/projects/{project_id}/archived-tasks", params={"after": first.headers["x-next-cursor"]}).json()
+    assert [task["id"] for task in rest] == old[2:]
+
+    response = client.post(f"/tasks/{old[0]}/restore")
+    assert response.status_code == 200
+    restored = response.json()["task"]
+    assert restored["version"] == 2 and restored["modified_date"] > "2025"
+    assert {task["id"] for task in client.get("/tasks", params={"project_id": project_id}).json()} == {old[0], board[0]["id"]}
+    assert old[0] not in [task["id"] for task in client.get(f"/projects/{project_id}/archived-tasks").json()]
+    assert client.post(f"/tasks/{old[0]}/restore").status_code == 404
+    with database.pool.connection() as conn:
+        assert check_counters(conn) == []
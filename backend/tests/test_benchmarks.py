@@ -0,0 +1,39 @@
+import sqlite3
+from app.database import create_tables
+from benchmarks.generate import Scale, generate
+from benchmarks.suite import compare
+
+SCALE = Scale(users=40, projects=10, tasks=2000, memberships=2, sockets=0)
+
+def generated_db(seed: int = 1) -> sqlite3.Connection:
+    conn = sqlite3.connect(":memory:")
+    create_tables(conn)
+    generate(conn, SCALE, seed=seed, batch=500)
+    return conn
+
+def test_generator_is_seeded_and_skewed():
+    conn = generated_db()
+    dump = conn.execute("SELECT project_id, title, status, assigned_user_id, created_date FROM tasks ORDER BY id").fetchall()
+    assert dump == generated_db().execute("SELECT project_id, title, status, assigned_user_id, created_date FROM tasks ORDER BY id").fetchall()
+    assert dump != generated_db(seed=2).execute("SELECT project_id, title, status, assigned_user_id, created_date FROM tasks ORDER BY id").fetchall()
+
+    sizes = [count for _, count in conn.execute("SELECT project_id, COUNT(*) FROM tasks GROUP BY project_id ORDER BY 2 DESC")]
+    # Zipf: the largest project holds several times the share of an even split
+    assert sizes[0] > 3 * SCALE.tasks / SCALE.projects
+    assert conn.execute("SELECT COUNT(DISTINCT project_id) FROM user_projects").fetchone()[0] == SCALE.projects
+    # Tasks are only assigned to members of their project, and finish after they start
+    assert conn.execute("""
+        SELECT COUNT(*) FROM tasks t
+        WHERE t.assigned_user_id IS NOT NULL
+          AND NOT EXISTS (SELECT 1 FROM user_projects up WHERE up.project_id = t.project_id AND up.user_id = t.assigned_user_id)
+    """).fetchone()[0] == 0
+    assert conn.execute("SELECT COUNT(*) FROM tasks WHERE modified_date < created_date").fetchone()[0] == 0
+
+def test_regression_gate():
+    base = {"GET /tasks": {"errors": 0, "rps": 100.0, "p50_ms": 10.0, "p95_ms": 20.0, "statements": 2.0, "peak_rss_mib": 100.0}}
+    assert compare({"GET /tasks": dict(base["GET /tasks"], p50_ms=12.0, rps=80.0)}, base, tolerance=0.5) == []
+    regressions = compare({"GET /tasks": dict(base["GET /tasks"], p50_ms=40.0, rps=20.0, statements=3.0, errors=1)}, base, tolerance=0.5)
+    assert len(regressions) == 4
+    assert any("SQL statements" in regression for regression in regressions)
+    # A new scenario has nothing to compare with
+    assert compare({"GET /new": dict(base["GET /tasks"])}, base) == []
@@ -0,0 +1,98 @@
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from app.broker import InProcessBroker, SQLiteBroker, create_broker
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class Recorder:
+    def __init__(self):
+        self.messages = []
+        self.keys = []
+
+    def __call__(self, message, project_id, key):
+        self.messages.append((message, project_id))
+        self.keys.append(key)
+
+async def wait_for(condition, timeout: float = 5):
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        assert time.perf_counter() < deadline, "message was not relayed"
+        await asyncio.sleep(0.01)
+
+def test_create_broker_selects_backend():
+    assert isinstance(create_broker("memory"), InProcessBroker)
+    assert isinstance(create_broker("sqlite"), SQLiteBroker)
+
+def test_in_process_broker_delivers_locally():
+    async def scenario():
+        broker, recorder = InProcessBroker(), Recorder()
+        broker.bind(recorder)
+        await broker.publish({"n": 1}, 3)
+        return recorder.messages
+    assert asyncio.run(scenario()) == [({"n": 1}, 3)]
+
+def test_sqlite_broker_relays_between_workers_once(tmp_path):
+    async def scenario():
+        path = str(tmp_path / "broker.db")
+        worker_1, worker_2 = SQLiteBroker(path, poll_interval=0.01), SQLiteBroker(path, poll_interval=0.01)
+        received_1, received_2 = Recorder(), Recorder()
+        worker_1.bind(received_1)
+        worker_2.bind(received_2)
+        await worker_1.start()
+        await worker_2.start()
+        await asyncio.sleep(0.05)
+
+        await worker_2.publish({"task": 7}, 1)
+        await wait_for(lambda: received_1.messages)
+        await asyncio.sleep(0.05)
+        await worker_1.stop()
+        await worker_2.stop()
+        return received_1.messages, received_2.messages
+    remote, local = asyncio.run(scenario())
+    assert remote == [({"task": 7}, 1)]
+    # The publishing worker delivers to its own sockets directly, not again through the table
+    assert local == [({"task": 7}, 1)]
+
+def test_sqlite_broker_delivers_what_is_published_right_after_start_with_the_same_key(tmp_path):
+    async def scenario():
+        path = str(tmp_path / "broker.db")
+        worker_1, worker_2 = SQLiteBroker(path, poll_interval=0.01), SQLiteBroker(path, poll_interval=0.01)
+        received_1, received_2 = Recorder(), Recorder()
+        worker_1.bind(received_1)
+        worker_2.bind(received_2)
+        await worker_2.publish({"before": True}, 1)
+        # No poll has run yet when the message is published
+        await worker_1.start()
+        await worker_2.publish({"task": 7}, 1, key=("task", 7))
+        await wait_for(lambda: received_1.messages)
+        await asyncio.sleep(0.05)
+        await worker_1.stop()
+        await worker_2.stop()
+        return received_1, received_2
+    remote, local = asyncio.run(scenario())
+    assert remote.messages == [({"task": 7}, 1)]
+    assert remote.keys == local.keys[1:] == ['["task", 7]']
+
+def test_sqlite_broker_receives_from_another_process(tmp_path):
+    path = str(tmp_path / "broker.db")
+    publisher = (
+        "import asyncio\n"
+        "from app.broker import SQLiteBroker\n"
+        f"broker = SQLiteBroker({path!r})\n"
+        "broker.bind(lambda *args: None)\n"
+        "asyncio.run(broker.publish({'from': 'worker 2'}, 4))\n"
+    )
+
+    async def scenario():
+        broker, received = SQLiteBroker(path, poll_interval=0.01), Recorder()
+        broker.bind(received)
+        await broker.start()
+        await asyncio.sleep(0.05)
+        await asyncio.to_thread(subprocess.run, [sys.executable, "-c", publisher], cwd=BACKEND_DIR, check=True)
+        await wait_for(lambda: received.messages)
+        await broker.stop()
+        return received.messages
+    assert asyncio.run(scenario()) == [({"from": "worker 2"}, 4)]
@@ -0,0 +1,96 @@
+import json
+import random
+from fastapi.testclient import TestClient
+from main import app
+from app.board_loader import format_task, load_board_snapshots, load_boards
+from app.cache import BoardCache
+from app.changelog import TASK, record_change
+from tests.test_projects import count_queries, make_board_db
+
+client = TestClient(app)
+
+def test_least_recently_used_entries_are_evicted_past_the_cap():
+    cache = BoardCache(max_bytes=10)
+    cache.put("tasks", 1, 0, b"aaaa")
+    cache.put("tasks", 2, 0, b"bbbb")
+    assert cache.get("tasks", 1, 0) == b"aaaa"
+    cache.put("tasks", 3, 0, b"cccc")
+    # Project 2 was the least recently read
+    assert cache.get("tasks", 2, 0) is None
+    assert cache.get("tasks", 3, 0) == b"cccc"
+    stats = cache.stats()
+    assert (stats["entries"], stats["bytes"], stats["evictions"]) == (2, 8, 1)
+    assert (stats["hits"], stats["misses"]) == (2, 1)
+
+def test_entries_of_an_older_version_are_not_served():
+    cache = BoardCache()
+    cache.put("tasks", 1, 5, b"[]")
+    assert cache.get("tasks", 1, 6) is None
+    assert cache.get("tasks", 1, 5) == b"[]"
+
+def test_invalidate_drops_every_kind_of_one_project_only():
+    cache = BoardCache()
+    cache.put("tasks", 1, 0, b"[]")
+    cache.put("projects", 1, 0, b"{}")
+    cache.put("projects", 2, 0, b"{}")
+    cache.invalidate(1)
+    assert cache.get("tasks", 1, 0) is None and cache.get("projects", 1, 0) is None
+    assert cache.get("projects", 2, 0) == b"{}"
+    assert cache.stats()["invalidations"] == 2
+
+def test_snapshots_match_the_loader_and_only_stale_projects_are_reloaded():
+    conn, cache = make_board_db(3, tasks_per_project=2), BoardCache()
+    rows = conn.execute("SELECT id, name, description FROM projects ORDER BY id").fetchall()
+    body = load_board_snapshots(conn, rows, "projects", format_task, cache)
+    assert json.loads(body) == {"projects": load_boards(conn)}
+
+    record_change(conn, 2, TASK, 1, "updated", {"status": "done"})
+    conn.execute("UPDATE tasks SET status = 'done' WHERE project_id = 2")
+    statements = []
+    conn.set_trace_callback(statements.append)
+    body = load_board_snapshots(conn, rows, "projects", format_task, cache)
+    conn.set_trace_callback(None)
+    assert json.loads(body) == {"projects": load_boards(conn)}
+    # Versions, then members and tasks of project 2 alone
+    assert len(statements) == 3
+    assert all("IN (2)" in statement or "project_versions" in statement for statement in statements)
+    assert cache.stats()["hits"] == 2
+
+def test_snapshot_of_no_projects_runs_no_query():
+    conn = make_board_db(0)
+    body, count = count_queries(conn, load_board_snapshots, [], "projects")
+    assert json.loads(body) == {"projects": []} and count == 0
+
+def test_task_writes_invalidate_the_cached_task_list():
+    project_id = random.randint(10**6, 10**9)
+    task = {
+        "id": None,
+        "title": "Cached",
+        "description": "d",
+        "status": "todo",
+        "assigned_user_id": None,
+        "project_id": project_id,
+        "created_by": 1,
+        "created_date": "2025-01-01T00:00:00Z",
+        "modified_date": "2025-01-01T00:00:00Z",
+    }
+    assert client.get(f"/tasks?project_id={project_id}").json() == []
+    hits = client.get("/cache/stats").json()["hits"]
+    assert client.get(f"/tasks?project_id={project_id}").json() == []
+    assert client.get("/cache/stats").json()["hits"] == hits + 1
+
+    client.post("/tasks/", json=task)
+    (created,) = client.get(f"/tasks?project_id={project_id}").json()
+    assert created["title"] == "Cached"
+
+    client.put(f"/tasks/{created['id']}", json={**task, "status": "done"})
+    assert client.get(f"/tasks?project_id={project_id}").json()[0]["status"] == "done"
+
+    client.delete(f"/tasks/{created['id']}")
+    assert client.get(f"/tasks?project_id={project_id}").json() == []
+
+def test_filtered_requests_bypass_the_cache():
+    stats = client.get("/cache/stats").json()
+    client.get("/tasks?project_id=1&status=todo")
+    after = client.get("/cache/stats").json()
+    assert (after["hits"], after["misses"]) == (stats["hits"], stats["misses"])
@@ -0,0 +1,79 @@
+import random
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+
+client = TestClient(app)
+
+def new_task(project_id: int, title: str) -> dict:
+    return {
+        "id": None,
+        "title": title,
+        "description": "Delta sync",
+        "status": "todo",
+        "assigned_user_id": None,
+        "project_id": project_id,
+        "created_by": 1,
+        "created_date": "2025-01-01T00:00:00Z",
+        "modified_date": "2025-01-01T00:00:00Z",
+    }
+
+def test_changes_since_returns_only_newer_rows():
+    project_id = random.randint(10**6, 10**9)
+    client.post("/tasks/", json=new_task(project_id, "First"))
+    board = client.get("/tasks", params={"project_id": project_id})
+    since = int(board.headers["x-board-version"])
+    assert since > 0
+
+    client.post("/tasks/", json=new_task(project_id, "Second"))
+    task_id = board.json()[0]["id"]
+    client.put(f"/tasks/{task_id}", json={**new_task(project_id, "First"), "status": "done"})
+    client.delete(f"/tasks/{task_id}")
+
+    response = client.get("/changes", params={"project_id": project_id, "since": since})
+    assert response.status_code == 200
+    body = response.json()
+    assert [(change["entity"], change["op"]) for change in body["changes"]] == [("task", "created"), ("task", "updated"), ("task", "deleted")]
+    assert body["changes"][0]["data"]["title"] == "Second"
+    assert body["changes"][1]["data"]["status"] == "done" and "title" not in body["changes"][1]["data"]
+    assert body["version"] == body["changes"][-1]["version"] and not body["has_more"]
+
+    caught_up = client.get("/changes", params={"project_id": project_id, "since": body["version"]}).json()
+    assert caught_up["changes"] == [] and caught_up["version"] == body["version"]
+
+def test_changes_are_paged():
+    project_id = random.randint(10**6, 10**9)
+    for i in range(3):
+        client.post("/tasks/", json=new_task(project_id, f"Task {i}"))
+    first = client.get("/changes", params={"project_id": project_id, "limit": 2}).json()
+    assert len(first["changes"]) == 2 and first["has_more"]
+    rest = client.get("/changes", params={"project_id": project_id, "since": first["version"], "limit": 2}).json()
+    assert len(rest["changes"]) == 1 and not rest["has_more"]
+
+def test_membership_changes_are_logged():
+    project_id = random.randint(10**6, 10**9)
+    assert client.post(f"/projects/{project_id}/users/1").status_code == 200
+    assert client.delete(f"/projects/{project_id}/users/1").status_code == 200
+    changes = client.get("/changes", params={"project_id": project_id}).json()["changes"]
+    assert [(change["entity"], change["entity_id"], change["op"]) for change in changes] == [("member", 1, "created"), ("member", 1, "deleted")]
+
+@pytest.mark.parametrize("path,params", [
+    ("/tasks", {"project_id": 1}),
+    ("/projects/", {}),
+    ("/projects-with-details/", {}),
+])
+def test_unchanged_board_returns_304(path, params):
+    first = client.get(path, params=params)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    repeat = client.get(path, params=params, headers={"If-None-Match": etag})
+    assert repeat.status_code == 304
+    assert repeat.content == b""
+
+def test_etag_changes_after_a_write():
+    project_id = random.randint(10**6, 10**9)
+    etag = client.get("/tasks", params={"project_id": project_id}).headers["etag"]
+    client.post("/tasks/", json=new_task(project_id, "Invalidates"))
+    response = client.get("/tasks", params={"project_id": project_id}, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
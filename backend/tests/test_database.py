@@ -1,11 +1,217 @@
-from main import create_tables, conn
+import asyncio
+import os
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from app import database
+from app.config import DEFAULT_PRAGMAS, MEMORY_DB, parse_pragmas
+from app.database import ConnectionPool, GroupCommitWriter, create_tables, pool
 
 def test_create_tables():
     create_tables()
-    cursor = conn.cursor()
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-    tables = [row[0] for row in cursor.fetchall()]
+    with pool.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
+        tables = [row[0] for row in cursor.fetchall()]
     assert "users" in tables
     assert "projects" in tables
     assert "tasks" in tables
     assert "user_projects" in tables
+
+def test_pool_uses_wal_and_pragmas(tmp_path):
+    db_pool = ConnectionPool(str(tmp_path / "pool.db"), size=2)
+    with db_pool.connection() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+    db_pool.close()
+
+def test_pool_is_bounded_and_reuses_connections(tmp_path):
+    db_pool = ConnectionPool(str(tmp_path / "pool.db"), size=2, timeout=0.05)
+    first = db_pool.acquire()
+    second = db_pool.acquire()
+    assert first is not second
+    with pytest.raises(TimeoutError):
+        db_pool.acquire()
+    db_pool.release(first)
+    assert db_pool.acquire() is first
+    db_pool.release(first)
+    db_pool.release(second)
+    db_pool.close()
+
+def test_release_rolls_back_open_transaction(tmp_path):
+    db_pool = ConnectionPool(str(tmp_path / "pool.db"), size=1)
+    with db_pool.connection() as conn:
+        create_tables(conn)
+        conn.execute("INSERT INTO projects (name, description) VALUES ('p', 'd')")
+    with db_pool.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM projects").fetchone()[0] == 0
+    db_pool.close()
+
+def test_read_only_pool_rejects_writes(tmp_path):
+    path = str(tmp_path / "pool.db")
+    db_pool = ConnectionPool(path, size=1)
+    with db_pool.connection() as conn:
+        create_tables(conn)
+    read_only = ConnectionPool(path, size=1, read_only=True)
+    with read_only.connection() as conn:
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute("INSERT INTO projects (name, description) VALUES ('p', 'd')")
+    read_only.close()
+    db_pool.close()
+
+def test_transaction_reads_under_the_write_lock(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "group_writer", None)
+    path = str(tmp_path / "tx.db")
+    conn = database._connect(path)
+    conn.execute("CREATE TABLE items (name TEXT)")
+    conn.commit()
+    other = sqlite3.connect(path, timeout=0, check_same_thread=False)
+
+    def write(conn):
+        count = conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+        # The count cannot go stale before the insert: no other write gets in after the read
+        with pytest.raises(sqlite3.OperationalError, match="locked"):
+            other.execute("INSERT INTO items VALUES ('other')")
+        conn.execute("INSERT INTO items VALUES (?)", (f"item{count}",))
+    asyncio.run(database.AsyncConnection(conn).transaction(write))
+    assert [row[0] for row in other.execute("SELECT name FROM items")] == ["item0"]
+    other.close()
+    conn.close()
+
+def test_memory_database_serves_concurrent_reads_and_writes():
+    if pool.path != MEMORY_DB:
+        pytest.skip("shared-cache locking only applies to the in-memory database")
+    database.init_db()
+
+    def write(name):
+        with pool.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("INSERT INTO projects (name, description) VALUES (?, 'd')", (name,))
+            # Readers run while the write is open
+            with database.read_pool.connection() as reader:
+                reader.execute("SELECT COUNT(*) FROM projects").fetchone()
+            time.sleep(0.01)
+            conn.commit()
+
+    def read():
+        with database.read_pool.connection() as conn:
+            conn.execute("BEGIN")
+            conn.execute("SELECT COUNT(*) FROM projects").fetchone()
+            time.sleep(0.01)
+            conn.rollback()
+
+    errors = []
+
+    def run(fn, *args):
+        try:
+            fn(*args)
+        except Exception as e:
+            errors.append(e)
+    threads = [threading.Thread(target=run, args=(write, f"concurrent{i}")) for i in range(4)]
+    threads += [threading.Thread(target=run, args=(read,)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    with database.read_pool.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM projects WHERE name LIKE 'concurrent%'").fetchone()[0] == 4
+
+def make_writer(tmp_path, **kwargs) -> GroupCommitWriter:
+    path = str(tmp_path / "group.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE items (name TEXT UNIQUE)")
+    conn.close()
+    return GroupCommitWriter(path, **kwargs)
+
+def insert(conn, name):
+    conn.execute("INSERT INTO items (name) VALUES (?)", (name,))
+    return name
+
+def test_group_commit_batches_concurrent_transactions(tmp_path):
+    writer = make_writer(tmp_path, max_batch=100, max_delay=0.05)
+
+    async def scenario():
+        return await asyncio.gather(*(writer.run(insert, f"item{i}") for i in range(20)))
+    assert asyncio.run(scenario()) == [f"item{i}" for i in range(20)]
+    writer.close()
+    assert writer.transactions == 20 and writer.batches < 20
+    conn = sqlite3.connect(writer.path)
+    assert conn.execute("SELECT COUNT(*) FROM items").fetchone()[0] == 20
+    conn.close()
+
+def test_group_commit_rolls_back_a_failing_transaction_alone(tmp_path):
+    writer = make_writer(tmp_path, max_delay=0.05)
+
+    async def scenario():
+        return await asyncio.gather(
+            writer.run(insert, "first"),
+            writer.run(insert, "first"),
+            writer.run(insert, "second"),
+            return_exceptions=True,
+        )
+    first, duplicate, second = asyncio.run(scenario())
+    writer.close()
+    assert (first, second) == ("first", "second")
+    assert isinstance(duplicate, sqlite3.IntegrityError)
+    conn = sqlite3.connect(writer.path)
+    assert [row[0] for row in conn.execute("SELECT name FROM items ORDER BY name")] == ["first", "second"]
+    conn.close()
+
+def test_transactions_go_through_the_writer_when_enabled(monkeypatch):
+    writer = GroupCommitWriter(database.DB_PATH)
+    monkeypatch.setattr(database, "group_writer", writer)
+    client = TestClient(app)
+    response = client.post("/projects/", json={"name": "Grouped", "description": "Written by the group writer"})
+    assert response.status_code == 200
+    writer.close()
+    assert writer.transactions == 1
+
+def test_importing_the_app_opens_nothing(tmp_path):
+    path = tmp_path / "data" / "lazy.db"
+    script = "import sys, main; print('passlib' in sys.modules, 'jwt' in sys.modules, 'duckdb' in sys.modules)"
+    env = dict(os.environ, TASKFLOW_DB_PATH=str(path))
+    result = subprocess.run([sys.executable, "-c", script], env=env, capture_output=True, text=True, check=True)
+    assert result.stdout.split() == ["False", "False", "False"]
+    assert not path.parent.exists()
+
+def test_lifespan_creates_the_database_and_closes_the_pools(tmp_path):
+    path = str(tmp_path / "data" / "app.db")
+    script = f"""
+from fastapi.testclient import TestClient
+from app import database
+from main import app
+with TestClient(app) as client:
+    assert client.post("/projects/", json={{"name": "p", "description": "d"}}).status_code == 200
+assert database.pool._idle.empty() and database.read_pool._idle.empty()
+with TestClient(app) as client:
+    assert len(client.get("/projects/").json()["projects"]) == 1
+"""
+    subprocess.run([sys.executable, "-c", script], env=dict(os.environ, TASKFLOW_DB_PATH=path), check=True)
+    assert os.path.exists(path)
+
+def test_memory_database_is_shared_by_the_pools():
+    writes, reads = ConnectionPool(MEMORY_DB, size=1), ConnectionPool(MEMORY_DB, size=1, read_only=True)
+    with writes.connection() as conn:
+        conn.execute("CREATE TABLE IF NOT EXISTS shared_probe (n INTEGER)")
+        conn.execute("INSERT INTO shared_probe VALUES (1)")
+        conn.commit()
+    with reads.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM shared_probe").fetchone()[0] >= 1
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute("INSERT INTO shared_probe VALUES (2)")
+    writes.close()
+    reads.close()
+
+def test_pragmas_are_configurable():
+    pragmas = parse_pragmas("cache_size=-64000, mmap_size=0")
+    assert pragmas["cache_size"] == "-64000" and pragmas["mmap_size"] == "0"
+    assert pragmas["busy_timeout"] == DEFAULT_PRAGMAS["busy_timeout"]
+    with pytest.raises(ValueError):
+        parse_pragmas("cache_size=1; DROP TABLE users")
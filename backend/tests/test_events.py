@@ -0,0 +1,107 @@
+import asyncio
+import random
+from fastapi.testclient import TestClient
+from main import app
+from app.events import CREATED, DELETED, TASK_EVENTS, UPDATED, EventBus, changed_fields
+
+def collect_frames(window: float = 0.02):
+    frames = []
+
+    async def publish(frame, project_id):
+        frames.append((project_id, frame))
+
+    return EventBus(publish, window=window), frames
+
+def test_burst_is_coalesced_into_one_frame_per_project():
+    async def scenario():
+        bus, frames = collect_frames()
+        bus.emit(1, UPDATED, 10, {"status": "inProgress"})
+        bus.emit(1, UPDATED, 10, {"status": "done"})
+        bus.emit(1, UPDATED, 10, {"title": "Renamed"})
+        bus.emit(1, UPDATED, 11, {"status": "todo"})
+        bus.emit(2, DELETED, 20)
+        await asyncio.sleep(0.1)
+        return frames
+    frames = dict(asyncio.run(scenario()))
+    assert frames[1] == {"type": TASK_EVENTS, "project_id": 1, "events": [
+        {"op": UPDATED, "id": 10, "fields": {"status": "done", "title": "Renamed"}},
+        {"op": UPDATED, "id": 11, "fields": {"status": "todo"}},
+    ]}
+    assert frames[2]["events"] == [{"op": DELETED, "id": 20}]
+
+def test_created_then_deleted_in_one_window_sends_nothing():
+    async def scenario():
+        bus, frames = collect_frames()
+        bus.emit(1, CREATED, 5, {"title": "Draft"})
+        bus.emit(1, UPDATED, 5, {"status": "done"})
+        bus.emit(1, DELETED, 5)
+        await asyncio.sleep(0.1)
+        return frames
+    assert asyncio.run(scenario()) == []
+
+def test_created_then_updated_stays_a_creation():
+    async def scenario():
+        bus, frames = collect_frames()
+        bus.emit(1, CREATED, 5, {"title": "Draft", "status": "todo"})
+        bus.emit(1, UPDATED, 5, {"status": "done"})
+        await asyncio.sleep(0.1)
+        return frames
+    (_, frame), = asyncio.run(scenario())
+    assert frame["events"] == [{"op": CREATED, "id": 5, "fields": {"title": "Draft", "status": "done"}}]
+
+def test_changed_fields_keeps_only_differences():
+    old = {"title": "A", "status": "todo", "description": "same"}
+    assert changed_fields(old, {"title": "A", "status": "done", "description": "same"}) == {"status": "done"}
+
+def test_task_writes_are_pushed_to_project_viewers():
+    project_id = random.randint(10**6, 10**9)
+    task = {
+        "id": None,
+        "title": "Live",
+        "description": "Pushed to viewers",
+        "status": "todo",
+        "assigned_user_id": None,
+        "project_id": project_id,
+        "created_by": 1,
+        "created_date": "2025-01-01T00:00:00Z",
+        "modified_date": "2025-01-01T00:00:00Z",
+    }
+    with TestClient(app) as client, client.websocket_connect(f"/ws/kanban?project_id={project_id}") as ws:
+        assert client.post("/tasks/", json=task).status_code == 200
+        created = ws.receive_json()
+        assert created["type"] == TASK_EVENTS and created["project_id"] == project_id
+        (event,) = created["events"]
+        assert event["op"] == CREATED and event["fields"]["title"] == "Live"
+        task_id = event["id"]
+
+        assert client.put(f"/tasks/{task_id}", json={**task, "status": "done"}).status_code == 200
+        (event,) = ws.receive_json()["events"]
+        # Only the changed columns are sent
+        assert event["op"] == UPDATED and set(event["fields"]) == {"status", "modified_date", "version"}
+
+        assert client.delete(f"/tasks/{task_id}").status_code == 200
+        assert ws.receive_json()["events"] == [{"op": DELETED, "id": task_id}]
+
+def test_bulk_write_reaches_viewers_as_one_frame():
+    project_id = random.randint(10**6, 10**9)
+    tasks = [
+        {
+            "id": None,
+            "title": f"Bulk {i}",
+            "description": "d",
+            "status": "todo",
+            "assigned_user_id": None,
+            "project_id": project_id,
+            "created_by": 1,
+            "created_date": "2025-01-01T00:00:00Z",
+            "modified_date": "2025-01-01T00:00:00Z",
+        }
+        for i in range(3)
+    ]
+    with TestClient(app) as client, client.websocket_connect(f"/ws/kanban?project_id={project_id}") as ws:
+        ids = [result["id"] for result in client.post("/tasks/bulk", json=tasks).json()["results"]]
+        frame = ws.receive_json()
+        assert [(event["op"], event["id"]) for event in frame["events"]] == [(CREATED, task_id) for task_id in ids]
+
+        client.request("DELETE", "/tasks/bulk", json=ids)
+        assert ws.receive_json()["events"] == [{"op": DELETED, "id": task_id} for task_id in ids]
@@ -0,0 +1,104 @@
+import asyncio
+import logging
+import random
+import sqlite3
+from fastapi.testclient import TestClient
+from main import app
+from app import metrics
+from app.database import run_blocking
+from app.metrics import Histogram, MeteredConnection, RequestStats, render
+from app.websocket_manager import ConnectionManager
+
+client = TestClient(app)
+
+def sample(text: str, prefix: str) -> float:
+    """Value of the first exposition line starting with `prefix`."""
+    for line in text.splitlines():
+        if line.startswith(prefix):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"no sample {prefix}")
+
+def test_histogram_exposition_is_cumulative():
+    histogram = Histogram("test_latency_seconds", "Test.", ("route",), buckets=(0.1, 1.0))
+    metrics.REGISTRY.remove(histogram)
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, "/a")
+    assert histogram.render() == [
+        "# HELP test_latency_seconds Test.",
+        "# TYPE test_latency_seconds histogram",
+        'test_latency_seconds_bucket{route="/a",le="0.1"} 2',
+        'test_latency_seconds_bucket{route="/a",le="1.0"} 3',
+        'test_latency_seconds_bucket{route="/a",le="+Inf"} 4',
+        'test_latency_seconds_sum{route="/a"} 3.65',
+        'test_latency_seconds_count{route="/a"} 4',
+    ]
+
+def test_requests_are_labelled_by_route_template_with_their_sql():
+    project_id = random.randint(10**6, 10**9)
+    before = render()
+    prefix = 'taskflow_http_request_sql_statements_count{method="GET",route="/projects/{project_id}/stats"}'
+    count = sample(before, prefix) if prefix in before else 0
+    for _ in range(3):
+        assert client.get(f"/projects/{project_id}/stats").status_code == 200
+    text = client.get("/metrics").text
+    assert sample(text, prefix) == count + 3
+    assert 'taskflow_http_requests_total{method="GET",route="/projects/{project_id}/stats",status="200"}' in text
+    assert str(project_id) not in text
+    assert "taskflow_board_cache_bytes" in text
+
+def test_statements_run_on_the_executor_are_accounted_to_the_request():
+    conn = sqlite3.connect(":memory:", factory=MeteredConnection, check_same_thread=False)
+
+    async def request():
+        stats = RequestStats({})
+        token = metrics._request_stats.set(stats)
+        try:
+            await run_blocking(conn.execute, "SELECT 1")
+            await run_blocking(lambda: conn.cursor().execute("SELECT ?", (2,)).fetchall())
+        finally:
+            metrics._request_stats.reset(token)
+        return stats
+
+    stats = asyncio.run(request())
+    assert stats.statements == 2 and stats.sql_seconds > 0
+
+def test_slow_queries_are_logged_with_the_shape_of_their_parameters(monkeypatch, caplog):
+    monkeypatch.setattr(metrics, "SLOW_QUERY_MS", 0)
+    conn = sqlite3.connect(":memory:", factory=MeteredConnection)
+    conn.execute("CREATE TABLE users (id INTEGER, username TEXT, password TEXT)")
+    with caplog.at_level(logging.WARNING, logger="taskflow"):
+        conn.execute("SELECT id FROM users WHERE username = ? AND password = ?", ("alice", "hunter2"))
+        conn.executemany("INSERT INTO users VALUES (?, ?, ?)", ((i, "u", None) for i in range(3)))
+    messages = [record.getMessage() for record in caplog.records]
+    assert any("WHERE username = ? AND password = ? parameters (str[5], str[7])" in message for message in messages)
+    assert any("3 x (int, str[1], None)" in message for message in messages)
+    assert not any("hunter2" in message for message in messages)
+
+class QuietSocket:
+    async def accept(self):
+        pass
+
+    async def send_json(self, message):
+        pass
+
+    async def close(self, code: int = 1000):
+        pass
+
+def test_websocket_connections_and_fan_out_are_tracked():
+    async def scenario():
+        manager = ConnectionManager()
+        open_before = sample(render(), "taskflow_websocket_connections")
+        fanouts_before = sample(render(), "taskflow_websocket_fanout_seconds_count")
+        sockets = [QuietSocket() for _ in range(3)]
+        for ws in sockets:
+            await manager.connect(ws, 1)
+        assert sample(render(), "taskflow_websocket_connections") == open_before + 3
+        await manager.broadcast({"n": 1}, project_id=1)
+        for ws in sockets:
+            manager.disconnect(ws)
+            manager.disconnect(ws)
+        text = render()
+        assert sample(text, "taskflow_websocket_connections") == open_before
+        assert sample(text, "taskflow_websocket_fanout_seconds_count") == fanouts_before + 1
+
+    asyncio.run(scenario())
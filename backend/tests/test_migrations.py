@@ -0,0 +1,159 @@
+import sqlite3
+import threading
+import pytest
+from app.database import create_tables
+from app.migrations import MIGRATIONS, get_schema_version, migrate
+from app.models import TaskFilters
+from app.archive import ARCHIVE_BATCH_QUERY, ARCHIVED_TASKS_QUERY
+from app.board_loader import (
+    MEMBERS_IN_QUERY, MEMBERS_QUERY, MEMBERS_WINDOW_QUERY, PROJECT_VERSIONS_WINDOW_QUERY, PROJECTS_PAGE_QUERY, PROJECTS_QUERY,
+    TASKS_IN_QUERY, TASKS_QUERY, _tasks_query,
+)
+from app.crud.tasks import TASKS_BY_IDS_QUERY, TASKS_BY_PROJECT_QUERY, _tasks_page_query
+from app.crud.users import TEAM_MEMBERS_QUERY, USER_PROJECTS_QUERY
+from app.search import SNIPPETS_QUERY, _ranked_ids_query
+from app.stats import PROJECT_STATS_QUERY, USER_WORKLOAD_QUERY
+from app.changelog import CHANGES_SINCE_QUERY, LATEST_VERSION_QUERY, PROJECT_VERSION_QUERY
+
+# Every query an endpoint runs on a hot path, with the tables it may read in full.
+# The board loader reads whole tables by design; everything else must go through an index.
+HOT_QUERIES = [
+    (PROJECTS_QUERY, {"projects"}),
+    (MEMBERS_QUERY, set()),
+    (TASKS_QUERY, {"t"}),
+    # iter_boards: every task in board order, walked along the project index
+    (_tasks_query(None, None, by_project=True)[0], set()),
+    (PROJECTS_PAGE_QUERY, set()),
+    (MEMBERS_WINDOW_QUERY, set()),
+    (TASKS_BY_PROJECT_QUERY, set()),
+    (TASKS_BY_IDS_QUERY, {"json_each"}),
+    (SNIPPETS_QUERY, {"json_each"}),
+    (PROJECT_STATS_QUERY, set()),
+    (USER_WORKLOAD_QUERY, set()),
+    (USER_PROJECTS_QUERY, set()),
+    (TEAM_MEMBERS_QUERY, set()),
+    (CHANGES_SINCE_QUERY, set()),
+    (PROJECT_VERSION_QUERY, set()),
+    (LATEST_VERSION_QUERY, set()),
+    (PROJECT_VERSIONS_WINDOW_QUERY, set()),
+    (MEMBERS_IN_QUERY.format("?, ?"), set()),
+    (TASKS_IN_QUERY.format("?, ?"), set()),
+    (ARCHIVED_TASKS_QUERY, set()),
+    (ARCHIVE_BATCH_QUERY, set()),
+]
+
+FILTERS = [
+    TaskFilters(),
+    TaskFilters(status="done"),
+    TaskFilters(assigned_user_id=1),
+    TaskFilters(created_by=1),
+    TaskFilters(modified_after="2025-01-01", modified_before="2025-02-01"),
+]
+
+# The board task queries under filters: load_boards, iter_boards and load_board_page, with the tables each may read in full
+BOARD_TASK_QUERIES = [
+    ((None, False), {"t"}),
+    ((None, True), set()),
+    (((1, 2), False), set()),
+]
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    create_tables(conn)
+    yield conn
+    conn.close()
+
+def test_create_tables_applies_all_migrations(conn):
+    assert get_schema_version(conn) == MIGRATIONS[-1][0]
+    indexes = {row["name"] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {"idx_tasks_project_id", "idx_tasks_assigned_user_id", "idx_tasks_created_by", "idx_user_projects_project_id"} <= indexes
+
+def test_migrate_is_idempotent(conn):
+    version = get_schema_version(conn)
+    assert migrate(conn) == version
+
+def test_failed_migration_is_rolled_back(conn):
+    version = get_schema_version(conn)
+    broken = MIGRATIONS + [(version + 1, "broken", [
+        "CREATE INDEX idx_broken ON tasks (title)",
+        "CREATE INDEX idx_broken ON tasks (title)",
+    ])]
+    with pytest.raises(sqlite3.OperationalError):
+        migrate(conn, broken)
+    assert get_schema_version(conn) == version
+    assert conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE name = 'idx_broken'").fetchone()[0] == 0
+
+def test_workers_migrating_at_once_apply_each_migration_once(tmp_path):
+    # Adding a column or backfilling the counters twice fails, so every worker must see the others' work
+    for run in range(3):
+        path = str(tmp_path / f"workers{run}.db")
+        barrier = threading.Barrier(4)
+        errors = []
+
+        def worker():
+            conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+            try:
+                barrier.wait()
+                create_tables(conn)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                conn.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert errors == []
+        conn = sqlite3.connect(path)
+        assert get_schema_version(conn) == MIGRATIONS[-1][0]
+        conn.close()
+
+def query_plan(conn, query, params=None) -> list:
+    params = (1,) * query.count("?") if params is None else params
+    return [row["detail"] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", params)]
+
+def assert_indexed(plan, full_scans):
+    for step in plan:
+        # A scalar subquery shows up as SCAN CONSTANT ROW, which reads no table
+        if step.startswith("SCAN ") and "INDEX" not in step and step != "SCAN CONSTANT ROW":
+            assert step.split()[1] in full_scans, plan
+
+@pytest.mark.parametrize("query,full_scans", HOT_QUERIES)
+def test_hot_queries_use_indexes(conn, query, full_scans):
+    plan = query_plan(conn, query)
+    assert not any("TEMP B-TREE" in step for step in plan), plan
+    assert_indexed(plan, full_scans)
+
+@pytest.mark.parametrize("filters", FILTERS)
+@pytest.mark.parametrize("shape,full_scans", BOARD_TASK_QUERIES)
+def test_filtered_board_tasks_use_indexes(conn, filters, shape, full_scans):
+    window, by_project = shape
+    plan = query_plan(conn, *_tasks_query(window, filters, by_project))
+    assert_indexed(plan, full_scans)
+    if any("TEMP B-TREE" in step for step in plan):
+        # Sorting what a filter's index found is fine, sorting a whole table is not
+        assert all(step.startswith("SEARCH ") for step in plan if "TEMP B-TREE" not in step), plan
+
+def test_archived_task_pages_seek_through_the_project_index(conn):
+    # t.id > ? alone is a rowid range, which from the first page on walks the whole archive
+    plan = query_plan(conn, ARCHIVED_TASKS_QUERY)
+    assert plan[0].startswith("SEARCH t USING INDEX") and "project_id=? AND id>?" in plan[0], plan
+
+@pytest.mark.parametrize("by_project", [False, True])
+def test_search_ranks_only_the_matches(conn, by_project):
+    plan = query_plan(conn, _ranked_ids_query(by_project))
+    # The MATCH goes through the full-text index (M), tasks is probed by rowid, and only the matches are sorted by rank
+    assert plan[0].startswith("SCAN tasks_fts VIRTUAL TABLE INDEX") and ":M" in plan[0], plan
+    assert all(step.startswith("SEARCH t USING INTEGER PRIMARY KEY") for step in plan[1:-1]), plan
+    assert plan[-1] == "USE TEMP B-TREE FOR ORDER BY", plan
+
+@pytest.mark.parametrize("filters", FILTERS)
+def test_task_pages_seek_through_an_index(conn, filters):
+    query, params = _tasks_page_query(filters, after=100, limit=50)
+    plan = [row["detail"] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", (1, *params))]
+    assert plan[0].startswith("SEARCH t USING INDEX") and "rowid>?" in plan[0], plan
+    assert not any("TEMP B-TREE" in step for step in plan), plan
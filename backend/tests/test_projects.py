@@ -1,6 +1,14 @@
+import asyncio
+import json
+import sqlite3
 import pytest
 from fastapi.testclient import TestClient
 from main import app
+from app import streaming
+from app.board_loader import format_task_details, iter_boards, load_board_page, load_boards
+from app.database import connect, create_tables
+from app.models import BoardDetailsList, BoardList, TaskFilters
+from app.pagination import decode_cursor
 
 client = TestClient(app)
 
@@ -18,3 +26,157 @@ def test_get_projects_with_details():
     response = client.get("/projects-with-details/")
     assert response.status_code == 200
     assert "projects" in response.json()
+
+def make_board_db(project_count: int, tasks_per_project: int = 3) -> sqlite3.Connection:
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    create_tables(conn)
+    conn.executemany("INSERT INTO users (username, password) VALUES (?, 'x')", [(f"user{i}",) for i in range(5)])
+    for project_id in range(1, project_count + 1):
+        conn.execute("INSERT INTO projects (name, description) VALUES (?, 'd')", (f"project{project_id}",))
+        conn.executemany("INSERT INTO user_projects (user_id, project_id) VALUES (?, ?)", [(1, project_id), (2, project_id)])
+        conn.executemany("""
+            INSERT INTO tasks (project_id, title, description, status, assigned_user_id, created_by, created_date, modified_date)
+            VALUES (?, ?, 'd', 'todo', 2, 1, '2025-01-01', '2025-01-01')
+        """, [(project_id, f"task{i}") for i in range(tasks_per_project)])
+    conn.commit()
+    return conn
+
+def count_queries(conn: sqlite3.Connection, fn, *args):
+    statements = []
+    conn.set_trace_callback(statements.append)
+    try:
+        result = fn(conn, *args)
+    finally:
+        conn.set_trace_callback(None)
+    return result, len(statements)
+
+def test_board_loader_query_count_is_constant():
+    small, small_count = count_queries(make_board_db(2), load_boards)
+    large, large_count = count_queries(make_board_db(200), load_boards)
+    assert len(small) == 2 and len(large) == 200
+    assert small_count == large_count == 3
+
+def test_board_loader_groups_users_and_tasks():
+    projects, _ = count_queries(make_board_db(3, tasks_per_project=4), load_boards, format_task_details)
+    for project in projects:
+        assert [user["id"] for user in project["users"]] == [1, 2]
+        assert len(project["tasks"]) == 4
+        assert project["tasks"][0]["assigned_user_id"] == {"id": 2, "username": "user1"}
+
+class RowCountingConnection:
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self.rows = 0
+
+    def execute(self, *args):
+        for row in self.conn.execute(*args):
+            self.rows += 1
+            yield row
+
+def test_board_loader_rows_grow_with_members_plus_tasks():
+    conn = make_board_db(1, tasks_per_project=0)
+    conn.executemany("INSERT INTO users (username, password) VALUES (?, 'x')", [(f"member{i}",) for i in range(18)])
+    conn.executemany("INSERT INTO user_projects (user_id, project_id) VALUES (?, 1)", [(i,) for i in range(6, 24)])
+    conn.executemany("""
+        INSERT INTO tasks (project_id, title, description, status, assigned_user_id, created_by, created_date, modified_date)
+        VALUES (1, ?, 'd', 'todo', 3, 1, '2025-01-01', '2025-01-01')
+    """, [(f"task{i}",) for i in range(500)])
+    counting = RowCountingConnection(conn)
+    projects = load_boards(counting, format_task_details)
+    assert len(projects[0]["users"]) == 20
+    assert len(projects[0]["tasks"]) == 500
+    # 1 project + 20 members + 500 tasks, not 20 x 500 joined rows
+    assert counting.rows == 1 + 20 + 500
+
+def test_board_page_query_count_is_constant_and_pages_cover_all_projects():
+    conn = make_board_db(25)
+    seen, after = [], 0
+    while True:
+        (page, cursor), queries = count_queries(conn, lambda c: load_board_page(c, 10, after))
+        assert queries == 3
+        seen.extend(project["id"] for project in page)
+        assert all(len(project["tasks"]) == 3 for project in page)
+        if not cursor:
+            break
+        after = decode_cursor(cursor)
+    assert seen == list(range(1, 26))
+
+def test_board_loader_filters_tasks():
+    conn = make_board_db(3)
+    conn.execute("UPDATE tasks SET status = 'done' WHERE id % 3 = 0")
+    projects = load_boards(conn, filters=TaskFilters(status="done"))
+    assert all(task["status"] == "done" for project in projects for task in project["tasks"])
+    assert sum(len(project["tasks"]) for project in projects) == 3
+
+def test_get_all_projects_paginated():
+    response = client.get("/projects/", params={"limit": 1})
+    assert response.status_code == 200
+    assert len(response.json()["projects"]) <= 1
+
+def test_iter_boards_matches_load_boards():
+    conn = make_board_db(30, tasks_per_project=7)
+    # Orphan rows pointing at a missing project must be skipped
+    conn.execute("INSERT INTO user_projects (user_id, project_id) VALUES (1, 999)")
+    conn.execute("""
+        INSERT INTO tasks (project_id, title, description, status, assigned_user_id, created_by, created_date, modified_date)
+        VALUES (0, 'orphan', 'd', 'todo', NULL, 1, '2025-01-01', '2025-01-01')
+    """)
+    assert list(iter_boards(conn, format_task_details, batch_size=4)) == load_boards(conn, format_task_details)
+
+def test_users_are_interned_once_per_response():
+    conn = make_board_db(3)
+    projects = load_boards(conn)
+    users = {id(user) for project in projects for user in project["users"]}
+    users |= {id(task[key]) for project in projects for task in project["tasks"] for key in ("assignedUser", "createdBy")}
+    # Two members, the assignee and the creator of every task, shared by all the projects
+    assert len(users) == 2
+    assert projects[0]["tasks"][0]["createdBy"] is projects[2]["users"][0]
+
+def test_board_payloads_match_the_declared_models():
+    response = client.get("/projects/", params={"status": "todo"})
+    assert response.status_code == 200
+    BoardList.model_validate_json(response.content)
+    BoardList.model_validate_json(client.get("/projects/").content)
+    BoardDetailsList.model_validate_json(client.get("/projects-with-details/").content)
+    conn = make_board_db(2)
+    BoardDetailsList.model_validate({"projects": load_boards(conn, format_task_details)})
+    assert BoardList.model_validate({"projects": load_boards(conn)}).projects[0].tasks[0].assignedUser.username == "user1"
+
+def test_get_all_projects_streamed_as_ndjson():
+    expected = client.get("/projects/").json()["projects"]
+    response = client.get("/projects/", params={"stream": True})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert [json.loads(line) for line in response.text.splitlines()] == expected
+
+def test_stream_refuses_pagination():
+    response = client.get("/projects/", params={"stream": True, "limit": 1})
+    assert response.status_code == 400 and "stream" in response.json()["detail"]
+
+def test_streams_past_the_limit_wait_and_leave_the_read_pool_to_other_requests(monkeypatch):
+    monkeypatch.setattr(streaming, "MAX_STREAMS", 1)
+
+    def numbers(conn):
+        yield from ({"n": n} for n in range(3))
+
+    async def scenario():
+        first = streaming.ndjson_response(numbers).body_iterator
+        second = streaming.ndjson_response(numbers).body_iterator
+        assert await first.__anext__() == b'{"n":0}\n{"n":1}\n{"n":2}\n'
+        # The first stream is still open: the second one waits for it
+        waiting = asyncio.create_task(second.__anext__())
+        await asyncio.sleep(0.05)
+        assert not waiting.done()
+        async with connect(read_only=True) as db:
+            assert (await db.fetchone("SELECT 1"))[0] == 1
+        await first.aclose()
+        assert (await waiting).startswith(b'{"n":0}')
+        await second.aclose()
+    asyncio.run(scenario())
+
+def test_get_projects_with_details_streamed_as_ndjson():
+    expected = client.get("/projects-with-details/").json()["projects"]
+    response = client.get("/projects-with-details/", params={"stream": True})
+    assert response.status_code == 200
+    assert [json.loads(line) for line in response.text.splitlines()] == expected
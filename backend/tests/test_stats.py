@@ -0,0 +1,58 @@
+import random
+from fastapi.testclient import TestClient
+from main import app
+from app.stats import check_counters, project_stats, rebuild_counters, user_workload
+from tests.test_projects import make_board_db
+
+client = TestClient(app)
+
+def test_counters_follow_every_kind_of_task_write():
+    conn = make_board_db(2, tasks_per_project=3)
+    assert project_stats(conn, 1) == {"project_id": 1, "total": 3, "by_status": {"todo": 3}}
+    conn.execute("UPDATE tasks SET status = 'done' WHERE id = 1")
+    conn.execute("UPDATE tasks SET assigned_user_id = 3 WHERE id = 2")
+    conn.execute("UPDATE tasks SET project_id = 2 WHERE id = 3")
+    conn.execute("UPDATE tasks SET status = NULL, assigned_user_id = NULL WHERE id = 4")
+    conn.execute("DELETE FROM tasks WHERE id = 5")
+    assert check_counters(conn) == []
+    assert project_stats(conn, 1)["by_status"] == {"done": 1, "todo": 1}
+    assert project_stats(conn, 2)["by_status"] == {"": 1, "todo": 2}
+    assert user_workload(conn, 2) == {"user_id": 2, "open": 2, "done": 1, "by_status": {"done": 1, "todo": 2}}
+    assert user_workload(conn, 3)["open"] == 1
+
+def test_checker_finds_and_repairs_drift():
+    conn = make_board_db(1, tasks_per_project=2)
+    conn.execute("UPDATE project_task_counts SET count = 5 WHERE project_id = 1")
+    conn.execute("DELETE FROM user_task_counts")
+    mismatches = check_counters(conn)
+    assert {"table": "project_task_counts", "project_id": 1, "status": "todo", "stored": 5, "actual": 2} in mismatches
+    assert {"table": "user_task_counts", "user_id": 2, "status": "todo", "stored": 0, "actual": 2} in mismatches
+    rebuild_counters(conn)
+    assert check_counters(conn) == []
+
+def test_stats_and_workload_endpoints():
+    project_id, user_id = random.randint(10**6, 10**9), random.randint(10**6, 10**9)
+    tasks = [
+        {
+            "id": None,
+            "title": f"Counted {i}",
+            "description": "d",
+            "status": status,
+            "assigned_user_id": user_id,
+            "project_id": project_id,
+            "created_by": 1,
+            "created_date": "2025-01-01T00:00:00Z",
+            "modified_date": "2025-01-01T00:00:00Z",
+        }
+        for i, status in enumerate(["todo", "todo", "inProgress", "done"])
+    ]
+    ids = [result["id"] for result in client.post("/tasks/bulk", json=tasks).json()["results"]]
+    client.patch(f"/tasks/{ids[0]}", json={"status": "done"})
+
+    stats = client.get(f"/projects/{project_id}/stats").json()
+    assert stats == {"project_id": project_id, "total": 4, "by_status": {"done": 2, "inProgress": 1, "todo": 1}}
+    workload = client.get(f"/users/{user_id}/workload").json()
+    assert (workload["open"], workload["done"]) == (2, 2)
+
+    client.request("DELETE", "/tasks/bulk", json=ids)
+    assert client.get(f"/projects/{project_id}/stats").json()["total"] == 0
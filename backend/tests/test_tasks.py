@@ -1,6 +1,10 @@
+import random
 import pytest
+from typing import List
 from fastapi.testclient import TestClient
+from pydantic import TypeAdapter
 from main import app
+from app.models import ProjectTask
 
 client = TestClient(app)
 
@@ -33,3 +37,212 @@ def test_create_update_delete_task():
 def test_get_all_tasks_by_project():
     response = client.get("/tasks", params={"project_id": 1})
     assert response.status_code in (200, 500)
+
+def create_tasks(project_id: int, count: int, assignee: int = 1) -> None:
+    for i in range(count):
+        response = client.post("/tasks/", json={
+            "id": None,
+            "title": f"Paged {i}",
+            "description": "Paged task",
+            "status": "done" if i % 2 else "todo",
+            "assigned_user_id": assignee if i < 2 else None,
+            "project_id": project_id,
+            "created_by": 1,
+            "created_date": "2025-01-01T00:00:00Z",
+            "modified_date": f"2025-01-0{i + 1}T00:00:00Z",
+        })
+        assert response.status_code == 200
+
+def test_get_tasks_keyset_pagination():
+    project_id = random.randint(10**6, 10**9)
+    create_tasks(project_id, 5)
+    seen, after, pages = [], None, 0
+    while True:
+        params = {"project_id": project_id, "limit": 2}
+        if after:
+            params["after"] = after
+        response = client.get("/tasks", params=params)
+        assert response.status_code == 200
+        seen.extend(task["id"] for task in response.json())
+        pages += 1
+        after = response.headers.get("x-next-cursor")
+        if not after:
+            break
+    assert pages == 3
+    assert len(seen) == 5 and seen == sorted(seen)
+
+def test_get_tasks_server_side_filters():
+    project_id = random.randint(10**6, 10**9)
+    create_tasks(project_id, 5)
+    done = client.get("/tasks", params={"project_id": project_id, "status": "done"}).json()
+    assert [task["status"] for task in done] == ["done", "done"]
+    assigned = client.get("/tasks", params={"project_id": project_id, "assigned_user_id": 1}).json()
+    assert len(assigned) == 2
+    recent = client.get("/tasks", params={
+        "project_id": project_id,
+        "modified_after": "2025-01-02",
+        "modified_before": "2025-01-04",
+    }).json()
+    assert [task["title"] for task in recent] == ["Paged 1", "Paged 2"]
+
+def test_get_tasks_payload_matches_the_declared_model(user_id):
+    project_id = random.randint(10**6, 10**9)
+    create_tasks(project_id, 3, assignee=user_id)
+    for params in ({}, {"status": "done"}, {"limit": 2}):
+        response = client.get("/tasks", params={"project_id": project_id, **params})
+        assert response.status_code == 200
+        tasks = TypeAdapter(List[ProjectTask]).validate_json(response.content)
+        assert tasks and all(task.projectId == project_id for task in tasks)
+    assigned = [task for task in tasks if task.assignedUser is not None]
+    assert [task.assignedUser.id for task in assigned] == [user_id, user_id]
+
+def test_get_tasks_rejects_invalid_cursor():
+    response = client.get("/tasks", params={"project_id": 1, "after": "not-a-cursor"})
+    assert response.status_code == 400
+
+def bulk_task(project_id: int, title: str) -> dict:
+    return {
+        "id": None,
+        "title": title,
+        "description": "Bulk task",
+        "status": "todo",
+        "assigned_user_id": None,
+        "project_id": project_id,
+        "created_by": 1,
+        "created_date": "2025-01-01T00:00:00Z",
+        "modified_date": "2025-01-01T00:00:00Z",
+    }
+
+def test_bulk_create_update_delete(user_id):
+    project_id, other_project = random.randint(10**6, 10**9), random.randint(10**6, 10**9)
+    response = client.post("/tasks/bulk", json=[bulk_task(project_id, f"Bulk {i}") for i in range(3)])
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [result["index"] for result in results] == [0, 1, 2]
+    ids = [result["id"] for result in results]
+    tasks = client.get("/tasks", params={"project_id": project_id}).json()
+    assert [(task["id"], task["title"]) for task in tasks] == [(ids[i], f"Bulk {i}") for i in range(3)]
+
+    response = client.patch("/tasks/bulk", json=[
+        {"id": ids[0], "status": "done"},
+        {"id": ids[1], "assigned_user_id": user_id, "title": "Reassigned"},
+        {"id": ids[2], "project_id": other_project},
+    ])
+    assert response.status_code == 200
+    tasks = {task["id"]: task for task in client.get("/tasks", params={"project_id": project_id}).json()}
+    assert tasks[ids[0]]["status"] == "done" and tasks[ids[0]]["title"] == "Bulk 0"
+    assert tasks[ids[1]]["title"] == "Reassigned" and tasks[ids[1]]["assignedUser"]["id"] == user_id
+    assert ids[2] not in tasks
+    assert [task["id"] for task in client.get("/tasks", params={"project_id": other_project}).json()] == [ids[2]]
+
+    response = client.request("DELETE", "/tasks/bulk", json=ids)
+    assert response.status_code == 200
+    assert client.get("/tasks", params={"project_id": project_id}).json() == []
+
+def test_bulk_patch_is_all_or_nothing():
+    project_id = random.randint(10**6, 10**9)
+    ids = [result["id"] for result in client.post("/tasks/bulk", json=[bulk_task(project_id, "Kept")]).json()["results"]]
+    response = client.patch("/tasks/bulk", json=[{"id": ids[0], "status": "done"}, {"id": 0, "status": "done"}])
+    assert response.status_code == 404
+    assert response.json()["detail"]["errors"] == [{"index": 1, "id": 0, "error": "Task not found"}]
+    assert client.get("/tasks", params={"project_id": project_id}).json()[0]["status"] == "todo"
+
+    response = client.patch("/tasks/bulk", json=[{"id": ids[0], "title": None}, {"id": ids[0], "status": "done"}])
+    assert response.status_code == 400
+    errors = response.json()["detail"]["errors"]
+    assert {(error["index"], error["error"]) for error in errors} == {(0, "title cannot be null"), (1, "Task listed more than once")}
+
+    # An item changing nothing is refused as a single PATCH would be, without touching the version
+    response = client.patch("/tasks/bulk", json=[{"id": ids[0], "version": 1}])
+    assert response.status_code == 400
+    assert response.json()["detail"]["errors"] == [{"index": 0, "id": ids[0], "error": "No field to update"}]
+    assert client.get("/tasks", params={"project_id": project_id}).json()[0]["version"] == 1
+
+    response = client.request("DELETE", "/tasks/bulk", json=[ids[0], 0])
+    assert response.status_code == 404
+    assert len(client.get("/tasks", params={"project_id": project_id}).json()) == 1
+
+def test_bulk_rejects_empty_and_oversized_arrays():
+    assert client.post("/tasks/bulk", json=[]).status_code == 422
+    assert client.request("DELETE", "/tasks/bulk", json=list(range(1, 1002))).status_code == 422
+
+def test_patch_updates_only_the_fields_sent():
+    project_id = random.randint(10**6, 10**9)
+    (result,) = client.post("/tasks/bulk", json=[bulk_task(project_id, "Keep my title")]).json()["results"]
+    response = client.patch(f"/tasks/{result['id']}", json={"status": "done"})
+    assert response.status_code == 200
+    task = response.json()
+    assert (task["title"], task["description"], task["status"], task["version"]) == ("Keep my title", "Bulk task", "done", 2)
+    assert response.headers["ETag"] == '"2"'
+    (listed,) = client.get("/tasks", params={"project_id": project_id}).json()
+    assert listed["title"] == "Keep my title" and listed["version"] == 2
+
+def test_patch_with_a_stale_version_is_refused():
+    project_id = random.randint(10**6, 10**9)
+    (result,) = client.post("/tasks/bulk", json=[bulk_task(project_id, "Contended")]).json()["results"]
+    task_id = result["id"]
+    # Two viewers drag the same card from version 1
+    assert client.patch(f"/tasks/{task_id}", json={"status": "inProgress", "version": 1}).status_code == 200
+    response = client.patch(f"/tasks/{task_id}", json={"status": "done"}, headers={"If-Match": '"1"'})
+    assert response.status_code == 409
+    detail = response.json()["detail"]
+    assert detail["version"] == 2 and detail["task"]["status"] == "inProgress"
+    # Retrying with the current version goes through
+    assert client.patch(f"/tasks/{task_id}", json={"status": "done"}, headers={"If-Match": '"2"'}).json()["version"] == 3
+    # * matches whatever the current version is
+    assert client.patch(f"/tasks/{task_id}", json={"status": "todo"}, headers={"If-Match": "*"}).json()["version"] == 4
+
+def test_put_reports_the_new_version():
+    project_id = random.randint(10**6, 10**9)
+    task = bulk_task(project_id, "Replaced")
+    (result,) = client.post("/tasks/bulk", json=[task]).json()["results"]
+    response = client.put(f"/tasks/{result['id']}", json={**task, "status": "done"})
+    assert response.json()["version"] == 2
+    changes = client.get("/changes", params={"project_id": project_id}).json()["changes"]
+    assert changes[-1]["op"] == "updated" and changes[-1]["data"]["version"] == 2
+
+def test_delete_of_a_missing_task_is_404():
+    response = client.delete("/tasks/0")
+    assert response.status_code == 404 and response.json()["detail"] == "Task not found"
+
+def test_patch_validation():
+    assert client.patch("/tasks/1", json={}).status_code == 400
+    assert client.patch("/tasks/1", json={"title": None}).status_code == 400
+    assert client.patch("/tasks/1", json={"status": "done"}, headers={"If-Match": "abc"}).status_code == 400
+    assert client.patch("/tasks/0", json={"status": "done"}).status_code == 404
+
+def test_bulk_patch_checks_versions():
+    project_id = random.randint(10**6, 10**9)
+    ids = [result["id"] for result in client.post("/tasks/bulk", json=[bulk_task(project_id, "A"), bulk_task(project_id, "B")]).json()["results"]]
+    response = client.patch("/tasks/bulk", json=[{"id": ids[0], "status": "done", "version": 1}, {"id": ids[1], "status": "done", "version": 7}])
+    assert response.status_code == 409
+    assert response.json()["detail"]["errors"] == [{"index": 1, "id": ids[1], "error": "Task was modified by someone else", "version": 1}]
+    response = client.patch("/tasks/bulk", json=[{"id": task_id, "status": "done", "version": 1} for task_id in ids])
+    assert [result["version"] for result in response.json()["results"]] == [2, 2]
+
+def test_search_ranks_title_matches_first_and_pages():
+    project_id = random.randint(10**6, 10**9)
+    word = f"zx{random.randint(10**8, 10**9)}"
+    tasks = [bulk_task(project_id, f"Plain task {i}") for i in range(3)]
+    tasks[1]["description"] = f"Mentions {word} in the description"
+    tasks[2]["title"] = f"Fix {word} crash"
+    ids = [result["id"] for result in client.post("/tasks/bulk", json=tasks).json()["results"]]
+
+    response = client.get("/tasks/search", params={"q": word, "project_id": project_id, "limit": 1})
+    (first,) = response.json()
+    assert first["id"] == ids[2] and first["titleSnippet"] == f"Fix <mark>{word}</mark> crash"
+    response = client.get("/tasks/search", params={"q": word, "project_id": project_id, "after": response.headers["X-Next-Cursor"]})
+    (second,) = response.json()
+    assert second["id"] == ids[1] and f"<mark>{word}</mark>" in second["descriptionSnippet"]
+    assert "X-Next-Cursor" not in response.headers
+
+    # A word typed with a * matches as a prefix, and the index follows updates and deletes
+    assert [task["id"] for task in client.get("/tasks/search", params={"q": f"fix {word[:6]}*", "project_id": project_id}).json()] == [ids[2]]
+    assert client.get("/tasks/search", params={"q": f"fix {word[:6]}", "project_id": project_id}).json() == []
+    client.patch(f"/tasks/{ids[2]}", json={"title": "Renamed"})
+    client.delete(f"/tasks/{ids[1]}")
+    assert client.get("/tasks/search", params={"q": word, "project_id": project_id}).json() == []
+
+def test_search_input_is_never_fts_syntax():
+    assert client.get("/tasks/search", params={"q": '"unbalanced AND (NEAR'}).status_code == 200
+    assert client.get("/tasks/search", params={"q": "!!"}).status_code == 400
@@ -0,0 +1,180 @@
+import csv
+import io
+import json
+import random
+from fastapi.testclient import TestClient
+from main import app
+from app.archive import archive_batch
+from app.stats import check_counters
+from app.transfer import CSV, NDJSON, TASKS, Importer, insert_chunk, iter_records
+from tests.test_projects import make_board_db
+
+client = TestClient(app)
+
+TASKS_CSV = (
+    "id,project_id,title,description,status,assigned_user_id,created_by,created_date,modified_date\r\n"
+    ',1,Café,"Two\r\nlines, and ""quotes""",todo,,1,2025-01-01,2025-01-01\r\n'
+    ",1,Bad,d,todo,,not-a-user,2025-01-01,2025-01-01\r\n"
+    ",2,Short,d\r\n"
+    "40,2,Kept id,d,done,3,1,2025-01-01,2025-01-02\r\n"
+)
+
+
+def feed_in_pieces(importer: Importer, data: bytes, size: int) -> list:
+    chunks = []
+    for start in range(0, len(data), size):
+        chunks += importer.feed(data[start:start + size])
+    return chunks + importer.finish()
+
+
+def test_csv_rows_parse_the_same_whatever_the_pieces_they_arrive_in():
+    data = TASKS_CSV.encode()
+    expected = None
+    # Pieces of 1 and 3 bytes split the "é" and the quoted line break
+    for size in (1, 3, len(data)):
+        importer = Importer(TASKS, CSV, chunk_size=1)
+        chunks = feed_in_pieces(importer, data, size)
+        assert [len(chunk) for chunk in chunks] == [1, 1]
+        rows = [(line, task.model_dump()) for chunk in chunks for line, task in chunk]
+        assert expected is None or rows == expected
+        expected = rows
+        assert [error["line"] for error in importer.errors] == [4, 5] and importer.failed == 2
+    (first_line, first), (last_line, last) = expected
+    assert (first_line, last_line) == (2, 6)
+    assert first["title"] == "Café" and first["description"] == 'Two\r\nlines, and "quotes"'
+    assert first["id"] is None and first["assigned_user_id"] is None
+    assert last["id"] == 40 and last["assigned_user_id"] == 3
+
+
+def test_ndjson_reports_bad_lines_and_keeps_the_others():
+    lines = [
+        {"name": "a", "description": "d"},
+        "not json",
+        [1, 2],
+        {"description": "no name"},
+        {"id": 9, "name": "b"},
+    ]
+    data = "\n".join(line if isinstance(line, str) else json.dumps(line) for line in lines).encode()
+    importer = Importer("projects", NDJSON)
+    chunks = feed_in_pieces(importer, data, 7)
+    assert [(line, project.model_dump()) for chunk in chunks for line, project in chunk] == [
+        (1, {"name": "a", "description": "d", "id": None}),
+        (5, {"name": "b", "description": None, "id": 9}),
+    ]
+    assert [error["line"] for error in importer.errors] == [2, 3, 4]
+    assert "name" in importer.errors[2]["error"]
+
+
+def test_insert_chunk_leaves_out_only_the_rows_at_fault():
+    conn = make_board_db(2)
+    importer = Importer(TASKS, NDJSON)
+    tasks = [
+        {"project_id": 1, "title": "new", "description": "d", "status": "todo", "created_by": 1, "created_date": "2025-01-01", "modified_date": "2025-01-01"},
+        # Task 3 exists already
+        {"id": 3, "project_id": 1, "title": "clash", "description": "d", "status": "todo", "created_by": 1, "created_date": "2025-01-01", "modified_date": "2025-01-01"},
+        {"project_id": 99, "title": "nowhere", "description": "d", "status": "todo", "created_by": 1, "created_date": "2025-01-01", "modified_date": "2025-01-01"},
+        {"id": 20, "project_id": 2, "title": "kept id", "description": "d", "status": "done", "assigned_user_id": 2, "created_by": 1, "created_date": "2025-01-01", "modified_date": "2025-01-01"},
+    ]
+    (chunk,) = feed_in_pieces(importer, "\n".join(map(json.dumps, tasks)).encode(), 1000)
+    with conn:
+        inserted, errors = insert_chunk(conn, TASKS, chunk)
+    # Ids are given past the largest one in use, the chunk's own included
+    assert [(task["id"], task["title"]) for task in inserted] == [(21, "new"), (20, "kept id")]
+    assert [line for line, _ in errors] == [2, 3]
+    assert "UNIQUE" in errors[0][1] and "project_id: 99" in errors[1][1]
+    assert conn.execute("SELECT title FROM tasks WHERE id = 3").fetchone()[0] == "task2"
+    changes = conn.execute("SELECT entity_id, op FROM changes ORDER BY version").fetchall()
+    assert [tuple(change) for change in changes] == [(21, "created"), (20, "created")]
+    assert check_counters(conn) == []
+    # The next task created the usual way does not collide with the imported ids
+    assert conn.execute("INSERT INTO tasks (project_id, title, description, created_by, created_date, modified_date) VALUES (1, 't', 'd', 1, '', '')").lastrowid == 22
+
+
+def test_archived_tasks_go_back_to_the_archive_and_keep_their_ids_apart():
+    conn = make_board_db(2)
+    conn.execute("UPDATE tasks SET status = 'done' WHERE id IN (1, 2)")
+    with conn:
+        archive_batch(conn, "2025-02-01")
+    exported = list(iter_records(conn, TASKS))
+    assert [(task["id"], task["archived_at"] is not None) for task in exported] == [(3, False), (4, False), (5, False), (6, False), (1, True), (2, True)]
+
+    restored = make_board_db(2, tasks_per_project=0)
+    rows = [*exported[-2:], {**exported[0], "id": 1}, {**exported[0], "id": 30, "archived_at": "2025-03-01"}, {**exported[1], "id": 30}]
+    (chunk,) = feed_in_pieces(Importer(TASKS, NDJSON), "\n".join(map(json.dumps, rows)).encode(), 1000)
+    with restored:
+        inserted, errors = insert_chunk(restored, TASKS, chunk)
+    # A task never exists in both tables, whichever the upload puts it in
+    assert [task["id"] for task in inserted] == [1, 2, 30]
+    assert errors == [(3, "id: 1 is listed more than once"), (5, "id: 30 is listed more than once")]
+    assert [row[0] for row in restored.execute("SELECT id FROM archived_tasks ORDER BY id")] == [1, 2, 30]
+    assert restored.execute("SELECT COUNT(*) FROM tasks").fetchone()[0] == 0
+    # Archived rows are on no board: nothing for the change log
+    assert restored.execute("SELECT COUNT(*) FROM changes").fetchone()[0] == 0
+    assert check_counters(restored) == []
+    (chunk,) = feed_in_pieces(Importer(TASKS, NDJSON), json.dumps({**exported[0], "id": 2, "archived_at": None}).encode(), 1000)
+    with restored:
+        assert insert_chunk(restored, TASKS, chunk)[1] == [(1, "id: 2 is an archived task")]
+    # New tasks are numbered past the archive, so restoring an archived one cannot collide
+    assert restored.execute("INSERT INTO tasks (project_id, title, description, created_by, created_date, modified_date) VALUES (1, 't', 'd', 1, '', '')").lastrowid == 31
+
+
+def test_import_then_export_round_trip(user_id):
+    project_id = random.randint(10**6, 10**9)
+    projects = f"id,name,description\r\n{project_id},Imported,\r\n"
+    response = client.post("/import/projects", content=projects.encode(), headers={"Content-Type": "text/csv"})
+    assert response.json() == {"imported": 1, "failed": 0, "errors": []}
+    memberships = [{"user_id": user_id, "project_id": project_id}] * 2
+    response = client.post("/import/memberships", content="\n".join(map(json.dumps, memberships)))
+    assert response.json()["imported"] == 1 and response.json()["errors"][0]["line"] == 2
+
+    tasks = [
+        {"project_id": project_id, "title": f"Imported {i}", "description": "d", "status": "todo", "assigned_user_id": user_id,
+         "created_by": user_id, "created_date": "2025-01-01T00:00:00Z", "modified_date": "2025-01-01T00:00:00Z"}
+        for i in range(3)
+    ]
+    response = client.post("/import/tasks?format=ndjson", content="\n".join(map(json.dumps, tasks)))
+    assert response.json()["imported"] == 3
+    board = client.get("/tasks", params={"project_id": project_id}).json()
+    assert [task["title"] for task in board] == ["Imported 0", "Imported 1", "Imported 2"]
+    assert board[0]["assignedUser"]["id"] == user_id
+
+    exported = [json.loads(line) for line in client.get("/export/tasks").text.splitlines()]
+    mine = [task for task in exported if task["project_id"] == project_id]
+    assert [task["id"] for task in mine] == [task["id"] for task in board]
+    assert {key: value for key, value in mine[0].items() if key != "id"} == {**tasks[0], "archived_at": None}
+
+    response = client.get("/export/projects", params={"format": "csv"})
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert rows[0] == ["id", "name", "description"] and [str(project_id), "Imported", ""] in rows
+    # Importing the export again only reports the ids it already has
+    response = client.post("/import/projects", content=response.content, headers={"Content-Type": "text/csv"})
+    assert response.json()["imported"] == 0 and response.json()["failed"] == len(rows) - 1
+
+
+def test_an_export_imports_into_a_database_that_has_its_rows_with_new_ids(user_id):
+    project_id = random.randint(10**6, 10**9)
+    task = {"project_id": project_id, "title": "Copied", "description": "d", "status": "todo", "assigned_user_id": None,
+            "created_by": user_id, "created_date": "2025-01-01T00:00:00Z", "modified_date": "2025-01-01T00:00:00Z"}
+    client.post("/import/projects", content=json.dumps({"id": project_id, "name": "Copies"}))
+    client.post("/import/tasks", content="\n".join([json.dumps(task)] * 2))
+    # Other tests leave tasks of projects that do not exist: only this project's lines are imported again
+    lines = [line for line in client.get("/export/tasks").text.splitlines() if json.loads(line)["project_id"] == project_id]
+    exported, count = "\n".join(lines), len(lines)
+    assert count == 2
+
+    response = client.post("/import/tasks", content=exported)
+    assert response.json()["imported"] == 0 and response.json()["failed"] == count
+    assert all(error["error"].startswith("UNIQUE constraint failed") for error in response.json()["errors"])
+    response = client.post("/import/tasks", params={"new_ids": True}, content=exported)
+    assert response.json() == {"imported": count, "failed": 0, "errors": []}
+    board = client.get("/tasks", params={"project_id": project_id}).json()
+    assert [task["title"] for task in board] == ["Copied"] * 4 and len({task["id"] for task in board}) == 4
+
+
+def test_unreadable_uploads_are_refused():
+    response = client.post("/import/tasks", content=b"title,description\r\nx,y\r\n", headers={"Content-Type": "text/csv"})
+    assert response.status_code == 400 and "created_by" in response.json()["detail"]["message"]
+    assert client.post("/import/tasks?format=csv", content=b"").status_code == 400
+    assert client.post("/import/users", content=b"{}").status_code == 404
+    assert client.get("/export/tasks", params={"format": "xml"}).status_code == 422
@@ -1,6 +1,9 @@
 import pytest
+import uuid
 from fastapi.testclient import TestClient
 from main import app
+from app.auth.security import BCRYPT_ROUNDS, make_context
+from app.database import pool
 
 client = TestClient(app)
 
@@ -22,3 +25,22 @@ def test_get_user_data():
     # Suppose user 1 existe
     response = client.get("/user-data/", params={"user_id": 1})
     assert response.status_code in (200, 500)
+
+def test_verify_and_update_rehashes_another_work_factor():
+    old_hash = make_context(4).hash("secret")
+    verified, new_hash = make_context(5).verify_and_update("secret", old_hash)
+    assert verified and new_hash.startswith("$2b$05$")
+    assert make_context(5).verify_and_update("wrong", old_hash) == (False, None)
+
+def test_login_upgrades_hash_to_the_current_work_factor():
+    username = f"rehash{uuid.uuid4().hex[:12]}"
+    assert client.post("/register/", json={"username": username, "password": "pw"}).status_code == 200
+    with pool.connection() as conn:
+        conn.execute("UPDATE users SET password = ? WHERE username = ?", (make_context(4).hash("pw"), username))
+        conn.commit()
+
+    assert client.post("/login/", json={"username": username, "password": "pw"}).status_code == 200
+    with pool.connection() as conn:
+        stored = conn.execute("SELECT password FROM users WHERE username = ?", (username,)).fetchone()[0]
+    assert stored.startswith(f"$2b${BCRYPT_ROUNDS:02d}$")
+    assert client.post("/login/", json={"username": username, "password": "bad"}).status_code == 401
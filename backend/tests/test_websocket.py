@@ -0,0 +1,138 @@
+import asyncio
+import time
+from fastapi.testclient import TestClient
+from main import app
+from app.database import connect
+from app.websocket_manager import PING, PONG, ConnectionManager
+
+# Recursive CTE that keeps SQLite busy for a few hundred milliseconds
+HEAVY_QUERY = """
+    WITH RECURSIVE counter(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM counter WHERE x < 3000000)
+    SELECT SUM(x) FROM counter
+"""
+
+async def run_heavy_query():
+    async with connect(read_only=True) as db:
+        return await db.fetchone(HEAVY_QUERY)
+
+def ping_latency(ws) -> float:
+    start = time.perf_counter()
+    ws.send_json({"type": PING, "sent": start})
+    assert ws.receive_json() == {"type": PONG, "sent": start}
+    return time.perf_counter() - start
+
+def test_websocket_latency_stays_flat_during_heavy_query():
+    with TestClient(app) as client, client.websocket_connect("/ws/kanban") as ws:
+        baseline = max(ping_latency(ws) for _ in range(20))
+
+        # Start the heavy query on the application's event loop
+        started = time.perf_counter()
+        heavy = client.portal.start_task_soon(run_heavy_query)
+        latencies = []
+        while not heavy.done():
+            latencies.append(ping_latency(ws))
+        heavy_duration = time.perf_counter() - started
+
+        assert heavy.result()[0] == 3000000 * 3000001 // 2
+        # The socket kept answering while the query ran, each round trip far shorter than the query
+        assert len(latencies) > 5
+        assert max(latencies) < max(heavy_duration / 4, baseline * 10)
+
+def test_client_frames_are_not_relayed_to_other_sockets():
+    with TestClient(app) as client, client.websocket_connect("/ws/kanban") as watcher, client.websocket_connect("/ws/kanban?project_id=1") as sender:
+        # A forged server event from one client reaches nobody
+        sender.send_json({"type": "task_events", "project_id": 1, "events": [{"op": "deleted", "id": 1}]})
+        sender.send_json({"type": PING, "sent": 1})
+        assert sender.receive_json() == {"type": PONG, "sent": 1}
+        watcher.send_json({"type": PING, "sent": 2})
+        # The watcher's next frame is its own pong, not the forged event
+        assert watcher.receive_json() == {"type": PONG, "sent": 2}
+
+class FakeWebSocket:
+    def __init__(self, delay: float = 0, fail: bool = False):
+        self.delay = delay
+        self.fail = fail
+        self.received = []
+        self.closed = False
+
+    async def accept(self):
+        pass
+
+    async def send_json(self, message):
+        if self.fail:
+            raise RuntimeError("connection reset")
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.received.append(message)
+
+    async def close(self, code: int = 1000):
+        self.closed = True
+
+async def drain(fast_sockets, expected: int, timeout: float = 5):
+    deadline = time.perf_counter() + timeout
+    while any(len(ws.received) < expected for ws in fast_sockets):
+        assert time.perf_counter() < deadline, "messages were not delivered"
+        await asyncio.sleep(0.01)
+
+def test_broadcast_is_scoped_to_project_rooms():
+    async def scenario():
+        manager = ConnectionManager()
+        project_a, project_b, everything = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+        await manager.connect(project_a, 1)
+        await manager.connect(project_b, 2)
+        await manager.connect(everything)
+        await manager.broadcast({"task": 1}, project_id=1)
+        await drain([project_a, everything], 1)
+        await asyncio.sleep(0.01)
+        assert project_b.received == []
+        manager.disconnect(project_a)
+        assert 1 not in manager.rooms and len(manager.subscribers) == 2
+        for ws in (project_b, everything):
+            manager.disconnect(ws)
+    asyncio.run(scenario())
+
+def test_pending_messages_with_same_key_are_coalesced():
+    async def scenario():
+        manager = ConnectionManager()
+        ws = FakeWebSocket(delay=0.05)
+        await manager.connect(ws, 1)
+        await manager.broadcast({"id": 7, "status": "todo"}, project_id=1, key=("task", 7))
+        await asyncio.sleep(0.01)
+        for status in ("inProgress", "done"):
+            await manager.broadcast({"id": 7, "status": status}, project_id=1, key=("task", 7))
+        await asyncio.sleep(0.3)
+        # The first send was already in flight, the two queued updates collapse into the last one
+        assert [message["status"] for message in ws.received] == ["todo", "done"]
+        manager.disconnect(ws)
+    asyncio.run(scenario())
+
+def test_load_thousands_of_sockets_with_slow_and_dead_clients():
+    async def scenario():
+        manager = ConnectionManager(queue_size=8, max_dropped=16)
+        fast = [FakeWebSocket() for _ in range(3000)]
+        slow = [FakeWebSocket(delay=60) for _ in range(20)]
+        dead = [FakeWebSocket(fail=True) for _ in range(20)]
+        for i, ws in enumerate(fast + slow + dead):
+            await manager.connect(ws, i % 3)
+        messages = 40
+        publish_times = []
+        for n in range(messages):
+            started = time.perf_counter()
+            for project_id in range(3):
+                await manager.broadcast({"n": n}, project_id=project_id)
+            publish_times.append(time.perf_counter() - started)
+            # Give the sender tasks a turn, as the event loop would between two writes
+            await asyncio.sleep(0.01)
+        # Publishing only queues, it never waits on a socket, slow ones included
+        assert max(publish_times) < 0.5
+        await drain(fast, messages)
+        assert all([m["n"] for m in ws.received] == list(range(messages)) for ws in fast)
+        # Dead sockets are dropped on their first failed send, slow ones once they exceed the drop limit
+        assert not any(ws in manager.subscribers for ws in dead)
+        assert not any(ws in manager.subscribers for ws in slow)
+        await asyncio.sleep(0.01)
+        assert all(ws.closed for ws in slow)
+        assert len(manager.subscribers) == len(fast)
+        for ws in fast:
+            manager.disconnect(ws)
+    asyncio.run(scenario())